@@ -0,0 +1,371 @@
+"""In-process stand-ins for the discord.py objects the cogs use
+
+The fakes implement just the attributes and coroutines the cogs touch. Every
+call that would reach the Discord API goes through FakeAPI, which counts it
+and can add a fixed latency to mimic the REST round trip.
+"""
+import asyncio
+import datetime
+import itertools
+from collections import Counter
+from typing import Dict, List, Optional
+import discord
+
+_ids = itertools.count(10**17)
+
+def snowflake() -> int:
+    return next(_ids)
+
+class FakeAPI:
+    """Counts the API calls made through the fakes and sleeps for the configured latency"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency  # Seconds per call
+        self.calls = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def call(self, route: str) -> None:
+        self.calls[route] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Yield to the loop even without latency, like a real request would
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+class FakeAsset:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+    def __init__(self, api: FakeAPI):
+        self.api = api
+
+    def replace(self, **kwargs):
+        return self
+
+    async def read(self) -> bytes:
+        await self.api.call("asset_read")
+        return b""
+
+class FakePermissions:
+    def __init__(self, **flags):
+        self.manage_channels = flags.get("manage_channels", True)
+        self.manage_roles = flags.get("manage_roles", True)
+        self.administrator = flags.get("administrator", False)
+
+class FakeRole:
+    def __init__(self, guild: "FakeGuild", name: str, position: int, role_id: Optional[int] = None, managed: bool = False):
+        self.guild = guild
+        self.id = role_id or snowflake()
+        self.name = name
+        self.position = position
+        self.managed = managed
+
+    @property
+    def mention(self) -> str:
+        return f"<@&{self.id}>"
+
+    def is_default(self) -> bool:
+        return self.id == self.guild.id
+
+    def __lt__(self, other):
+        return self.position < other.position
+
+    def __ge__(self, other):
+        return self.position >= other.position
+
+class FakeUser:
+    def __init__(self, api: FakeAPI, user_id: Optional[int] = None, name: Optional[str] = None, bot: bool = False):
+        self.id = user_id or snowflake()
+        self.name = name or f"user{self.id % 100000}"
+        self.display_name = self.name
+        self.bot = bot
+        self.display_avatar = FakeAsset(api)
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self.id}>"
+
+    def __str__(self):
+        return self.name
+
+class FakeMember(FakeUser):
+    def __init__(self, guild: "FakeGuild", user_id: Optional[int] = None, name: Optional[str] = None,
+                 bot: bool = False, roles: Optional[List[FakeRole]] = None):
+        super().__init__(guild.api, user_id, name, bot)
+        self.guild = guild
+        self.roles = [guild.default_role] + (roles or [])
+        self.joined_at = datetime.datetime.now(datetime.timezone.utc)
+        self.guild_permissions = FakePermissions()
+
+    @property
+    def top_role(self) -> FakeRole:
+        return max(self.roles)
+
+    async def edit(self, *, roles=None, reason=None):
+        await self.guild.api.call("member_edit")
+        if roles is not None:
+            self.roles = [self.guild.default_role] + [
+                role for role in (self.guild.get_role(obj.id) for obj in roles) if role and not role.is_default()
+            ]
+        return self
+
+    async def add_roles(self, *roles, reason=None):
+        for role in roles:
+            await self.guild.api.call("member_role_add")
+            role = self.guild.get_role(role.id)
+            if role and role not in self.roles:
+                self.roles.append(role)
+
+    async def remove_roles(self, *roles, reason=None):
+        for role in roles:
+            await self.guild.api.call("member_role_remove")
+            self.roles = [held for held in self.roles if held.id != role.id]
+
+class FakeMessage:
+    def __init__(self, channel: "FakeChannel", content: Optional[str] = None, embeds=None, author=None):
+        self.id = snowflake()
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content or ""
+        self.embeds = list(embeds or [])
+        self.attachments = []
+        self.author = author
+
+class FakeChannel:
+    def __init__(self, guild: "FakeGuild", name: str, category: Optional["FakeCategory"] = None):
+        self.guild = guild
+        self.id = snowflake()
+        self.name = name
+        self.category = category
+        self.messages: List[FakeMessage] = []
+        self.sent = 0
+
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+
+    async def send(self, content=None, *, embed=None, embeds=None, file=None, view=None, **kwargs) -> FakeMessage:
+        await self.guild.api.call("channel_send")
+        message = FakeMessage(self, content, [embed] if embed else embeds)
+        self.sent += 1
+        # Keep only recent messages, like the message cache
+        self.messages.append(message)
+        del self.messages[:-100]
+        return message
+
+    async def history(self, limit: int = 100):
+        await self.guild.api.call("channel_history")
+        for message in reversed(self.messages[-limit:]):
+            yield message
+
+    async def edit(self, *, name=None, category=None, reason=None, **kwargs):
+        await self.guild.api.call("channel_edit")
+        if name:
+            self.name = name
+        if category:
+            self.category = category
+
+    async def set_permissions(self, target, **kwargs):
+        await self.guild.api.call("channel_permissions")
+
+class FakeCategory:
+    def __init__(self, guild: "FakeGuild", name: str):
+        self.guild = guild
+        self.id = snowflake()
+        self.name = name
+        self.channels: List[FakeChannel] = []
+
+class FakeGuild:
+    def __init__(self, api: FakeAPI, name: str = "Benchmark Guild", bot_user: Optional[FakeUser] = None):
+        self.api = api
+        self.id = snowflake()
+        self.name = name
+        self.icon = None
+        self.chunked = False
+        self.unavailable = False
+        self.filesize_limit = 10 * 1024 * 1024
+        self.default_role = FakeRole(self, "@everyone", 0, role_id=self.id)
+        self.roles: List[FakeRole] = [self.default_role]
+        self.categories: List[FakeCategory] = []
+        self.channels: List[FakeChannel] = []
+        self._members: Dict[int, FakeMember] = {}
+        self._roles_by_id = {self.id: self.default_role}
+        self._channels_by_id: Dict[int, FakeChannel] = {}
+
+        # Above every role created later, so the bot can manage all of them
+        bot_role = self.add_role("LVBot", position=10**6)
+        self.me = self.add_member(FakeMember(self, bot_user.id if bot_user else None, "LVBot", bot=True, roles=[bot_role]))
+
+    @property
+    def members(self) -> List[FakeMember]:
+        return list(self._members.values())
+
+    @property
+    def member_count(self) -> int:
+        return len(self._members)
+
+    def add_role(self, name: str, position: Optional[int] = None) -> FakeRole:
+        role = FakeRole(self, name, position if position is not None else len(self.roles))
+        self.roles.append(role)
+        self._roles_by_id[role.id] = role
+        return role
+
+    def add_member(self, member: Optional[FakeMember] = None, **kwargs) -> FakeMember:
+        member = member or FakeMember(self, **kwargs)
+        self._members[member.id] = member
+        return member
+
+    def remove_member(self, user_id: int) -> Optional[FakeMember]:
+        return self._members.pop(user_id, None)
+
+    def add_channel(self, name: str, category: Optional[FakeCategory] = None) -> FakeChannel:
+        channel = FakeChannel(self, name, category)
+        self.channels.append(channel)
+        self._channels_by_id[channel.id] = channel
+        if category:
+            category.channels.append(channel)
+        return channel
+
+    def get_member(self, user_id: int) -> Optional[FakeMember]:
+        return self._members.get(user_id)
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return self._roles_by_id.get(role_id)
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self._channels_by_id.get(channel_id)
+
+    async def query_members(self, *, user_ids=(), cache=True) -> List[FakeMember]:
+        await self.api.call("query_members")
+        return [self._members[user_id] for user_id in user_ids if user_id in self._members]
+
+    async def create_category(self, name: str, reason=None) -> FakeCategory:
+        await self.api.call("create_category")
+        category = FakeCategory(self, name)
+        self.categories.append(category)
+        return category
+
+    async def create_text_channel(self, name: str, *, overwrites=None, category=None, topic=None, **kwargs) -> FakeChannel:
+        await self.api.call("create_text_channel")
+        return self.add_channel(name, category)
+
+class FakeResponse:
+    """Interaction response, every interaction can be answered once"""
+
+    def __init__(self, api: FakeAPI):
+        self.api = api
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def _respond(self, route: str) -> None:
+        if self.done:
+            raise RuntimeError("This interaction has already been responded to before")
+        self.done = True
+        await self.api.call(route)
+
+    async def send_message(self, content=None, **kwargs):
+        await self._respond("interaction_response")
+
+    async def send_modal(self, modal):
+        await self._respond("interaction_modal")
+
+    async def defer(self, **kwargs):
+        await self._respond("interaction_defer")
+
+class FakeFollowup:
+    def __init__(self, api: FakeAPI):
+        self.api = api
+
+    async def send(self, content=None, **kwargs):
+        await self.api.call("interaction_followup")
+
+class FakeInteraction:
+    def __init__(self, client: "FakeBot", guild: FakeGuild, user: FakeMember, channel: Optional[FakeChannel] = None,
+                 data: Optional[dict] = None, message: Optional[FakeMessage] = None,
+                 type: discord.InteractionType = discord.InteractionType.component):
+        self.id = snowflake()
+        self.type = type
+        self.client = client
+        self.guild = guild
+        self.guild_id = guild.id
+        self.user = user
+        self.channel = channel
+        self.channel_id = channel.id if channel else None
+        self.message = message
+        self.data = data or {}
+        self.extras = {}
+        self.command = None
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.response = FakeResponse(guild.api)
+        self.followup = FakeFollowup(guild.api)
+
+class FakeEmoji:
+    def __init__(self, name: str):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+class FakeReactionPayload:
+    """Same fields as discord.RawReactionActionEvent"""
+
+    def __init__(self, guild: FakeGuild, channel_id: int, message_id: int, user_id: int, emoji: str,
+                 member: Optional[FakeMember] = None):
+        self.guild_id = guild.id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.user_id = user_id
+        self.emoji = FakeEmoji(emoji)
+        self.member = member
+
+class FakeMemberRemovePayload:
+    """Same fields as discord.RawMemberRemoveEvent"""
+
+    def __init__(self, guild: FakeGuild, user: FakeUser):
+        self.guild_id = guild.id
+        self.user = user
+
+class FakeBot:
+    """Client the cogs see through self.bot and interaction.client"""
+
+    def __init__(self, api: Optional[FakeAPI] = None):
+        self.api = api or FakeAPI()
+        self.user = FakeUser(self.api, name="LVBot", bot=True)
+        self.cogs = {}
+        self.guilds: List[FakeGuild] = []
+        self._ready = asyncio.Event()
+
+    def add_guild(self, name: str = "Benchmark Guild") -> FakeGuild:
+        guild = FakeGuild(self.api, name, self.user)
+        self.guilds.append(guild)
+        return guild
+
+    def add_cog(self, cog) -> None:
+        """Register a cog and load its stores, without starting its background loops"""
+        self.cogs[type(cog).__name__] = cog
+        if hasattr(cog, "load_stores"):
+            cog.load_stores()
+
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+
+    def get_guild(self, guild_id: int) -> Optional[FakeGuild]:
+        for guild in self.guilds:
+            if guild.id == guild_id:
+                return guild
+        return None
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        for guild in self.guilds:
+            channel = guild.get_channel(channel_id)
+            if channel:
+                return channel
+        return None
+
+    async def wait_until_ready(self) -> None:
+        # The fake never connects, background loops waiting for ready stay idle
+        await self._ready.wait()
\ No newline at end of file
@@ -0,0 +1,383 @@
+"""Replay a recorded event log through the cogs against the fake REST layer
+
+Usage: python benchmarks/replay.py RECORDING [--speed N] [--api-latency MS] [--limit N]
+       python benchmarks/replay.py --synthesize PATH
+
+Recordings are written by the bot with RECORD_EVENTS=1 (see utils/event_recorder.py).
+Events are dispatched as their own tasks at their recorded offsets divided by
+--speed, the way discord.py dispatches gateway events. Guilds, members,
+channels, panels and shop items are created on first use in a recording.
+
+The report covers throughput, latency per event type (measured from the
+event's scheduled time, so loop delays count), queue depths and API calls.
+Timers inside the cogs, such as the role edit coalescing delay and the
+welcome burst window, keep running in real time. At 100x a 1.5 s coalescing
+window therefore covers 150 s of recorded traffic.
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import discord
+from benchmarks.fakes import FakeAPI, FakeBot, FakeGuild, FakeInteraction, FakeMember, FakeMemberRemovePayload, FakeMessage, FakeReactionPayload
+from cogs.economy import Economy
+from cogs.feedback import FeedbackModal, FeedbackSystem
+from cogs.roles import RoleReactionPanel
+from cogs.shop import Shop
+from cogs.ticket import TicketSystem
+from cogs.welcome import WelcomeSystem
+from utils.embed_builder import create_shop_embed
+from utils.event_recorder import RecordingWriter, read_recording
+from utils.interaction_router import make_custom_id, router
+from utils.member_resolver import member_resolver
+
+# Credits every replayed member starts with, enough for a few purchases
+STARTING_BALANCE = 50.0
+# Seconds between samples of the queue depths
+SAMPLE_INTERVAL = 0.05
+
+class ReplayWorld:
+    """Creates the fake guilds, members and channels a recording refers to, keyed by their aliases"""
+
+    def __init__(self, bot: FakeBot):
+        self.bot = bot
+        self.guilds: Dict[int, FakeGuild] = {}
+        self.members: Dict[tuple, FakeMember] = {}
+        self.channels: Dict[tuple, object] = {}
+        self.roles: Dict[tuple, int] = {}
+        self.items: Dict[int, FakeMessage] = {}
+
+    def guild(self, alias: Optional[int]) -> FakeGuild:
+        guild = self.guilds.get(alias)
+        if guild is None:
+            guild = self.guilds[alias] = self.bot.add_guild(f"Guild {alias}")
+            welcome = guild.add_channel("welcome")
+            feedback = guild.add_channel("feedback")
+            guild.add_channel("rules")
+            guild.add_role("Support", position=10)
+            guild.add_role("Seller", position=11)
+            self.bot.cogs["WelcomeSystem"].welcome_config[str(guild.id)] = {"channel_id": str(welcome.id)}
+            self.bot.cogs["FeedbackSystem"].config[str(guild.id)] = {"feedback_channel_id": str(feedback.id)}
+        return guild
+
+    def member(self, guild: FakeGuild, alias: int, bot: bool = False) -> FakeMember:
+        member = guild.get_member(alias)
+        if member is None:
+            member = guild.add_member(user_id=alias, bot=bot)
+            # Seeded in memory, a store write per new member would dominate the replay
+            self.bot.cogs["Economy"].currency.balances.data[str(alias)] = STARTING_BALANCE
+        return member
+
+    def channel(self, guild: FakeGuild, alias: Optional[int], name: str):
+        key = (guild.id, alias)
+        channel = self.channels.get(key)
+        if channel is None:
+            channel = self.channels[key] = guild.add_channel(name)
+        return channel
+
+    def role(self, guild: FakeGuild, key) -> int:
+        role_id = self.roles.get((guild.id, key))
+        if role_id is None:
+            role_id = self.roles[(guild.id, key)] = guild.add_role(f"Role {key}").id
+        return role_id
+
+    def panel(self, guild: FakeGuild, channel_alias: Optional[int], message_alias: int, mode: str) -> Dict:
+        """Get the role panel for a message, created as a reaction or select panel"""
+        roles_cog = self.bot.cogs["RoleReactionPanel"]
+        panel = roles_cog.reaction_roles.get(message_alias)
+        if panel is None:
+            channel = self.channel(guild, channel_alias, f"roles-{channel_alias}")
+            panel = roles_cog.reaction_roles[message_alias] = {
+                "channel_id": channel.id, "mode": mode, "duration": None, "roles": {}
+            }
+        return panel
+
+    def item(self, guild: FakeGuild) -> FakeMessage:
+        """The shop item message of a guild"""
+        message = self.items.get(guild.id)
+        if message is None:
+            message = self.items[guild.id] = FakeMessage(guild.add_channel("shop"), embeds=[
+                create_shop_embed("Launch Pack", "Launch day bundle", "Everything in one pack", "$10", "Asset")
+            ])
+        return message
+
+class Replayer:
+    """Dispatches recorded events to the cogs and measures how they are handled"""
+
+    def __init__(self, bot: FakeBot, speed: float):
+        self.bot = bot
+        self.world = ReplayWorld(bot)
+        self.speed = speed
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors = Counter()
+        self.skipped = Counter()
+        self.tasks = set()
+        self.depths: Dict[str, List[int]] = {}
+
+    async def run_event(self, event: list, scheduled: float) -> None:
+        event_type = event[1]
+        try:
+            handled = await self.dispatch(event_type, event[2:])
+        except Exception as e:
+            self.errors[event_type] += 1
+            if self.errors[event_type] == 1:
+                print(f"Error replaying {event_type}: {e!r}")
+            return
+        if handled:
+            self.latencies.setdefault(event_type, []).append(time.perf_counter() - scheduled)
+        else:
+            self.skipped[event_type] += 1
+
+    async def dispatch(self, event_type: str, fields: list) -> bool:
+        world = self.world
+        cogs = self.bot.cogs
+
+        if event_type in ("reaction_add", "reaction_remove"):
+            guild_alias, channel_alias, message_alias, user_alias, emoji, is_panel = fields
+            guild = world.guild(guild_alias)
+            member = world.member(guild, user_alias)
+            if is_panel:
+                panel = world.panel(guild, channel_alias, message_alias, "reactions")
+                panel["roles"].setdefault(emoji, world.role(guild, emoji))
+            channel = world.channel(guild, channel_alias, f"channel-{channel_alias}")
+            payload = FakeReactionPayload(
+                guild, channel.id, message_alias, member.id, emoji, member if event_type == "reaction_add" else None
+            )
+            if event_type == "reaction_add":
+                await cogs["RoleReactionPanel"].on_raw_reaction_add(payload)
+            else:
+                await cogs["RoleReactionPanel"].on_raw_reaction_remove(payload)
+            return True
+
+        if event_type == "member_join":
+            guild_alias, user_alias, is_bot = fields
+            guild = world.guild(guild_alias)
+            await cogs["WelcomeSystem"].on_member_join(world.member(guild, user_alias, is_bot))
+            return True
+
+        if event_type == "member_remove":
+            guild_alias, user_alias, is_bot = fields
+            guild = world.guild(guild_alias)
+            member = guild.remove_member(user_alias) or FakeMember(guild, user_alias, bot=is_bot)
+            await cogs["WelcomeSystem"].on_raw_member_remove(FakeMemberRemovePayload(guild, member))
+            return True
+
+        if event_type == "component":
+            guild_alias, channel_alias, user_alias, message_alias, kind, entity, values = fields
+            guild = world.guild(guild_alias)
+            user = world.member(guild, user_alias)
+            channel = world.channel(guild, channel_alias, f"channel-{channel_alias}")
+            message = None
+            data = {"custom_id": make_custom_id(kind, guild.id)}
+
+            if kind in ("shop_buy", "shop_info"):
+                seller = world.member(guild, entity) if entity else None
+                data["custom_id"] = make_custom_id(kind, guild.id, seller.id if seller else None)
+                message = world.item(guild)
+            elif kind == "ticket_close":
+                channel = world.channel(guild, channel_alias, f"ticket-{channel_alias}")
+                channel.name = channel.name.replace("closed-", "")
+            elif kind == "feedback":
+                feedback = guild.get_channel(int(cogs["FeedbackSystem"].config[str(guild.id)]["feedback_channel_id"]))
+                data["custom_id"] = make_custom_id(kind, guild.id, feedback.id)
+            elif kind == "role_panel":
+                panel = world.panel(guild, channel_alias, message_alias, "select")
+                role_ids = [world.role(guild, ("select", value)) for value in values]
+                for role_id in role_ids:
+                    panel["roles"].setdefault(str(role_id), role_id)
+                data["values"] = [str(role_id) for role_id in role_ids]
+                message = FakeMessage(channel)
+                message.id = message_alias
+
+            await router.dispatch(FakeInteraction(self.bot, guild, user, channel, data=data, message=message))
+            return kind in router.handlers
+
+        if event_type == "modal":
+            guild_alias, channel_alias, user_alias = fields
+            guild = world.guild(guild_alias)
+            feedback_id = int(cogs["FeedbackSystem"].config[str(guild.id)]["feedback_channel_id"])
+            modal = FeedbackModal(feedback_id)
+            modal.title_input._value = "Launch day"
+            modal.feedback_input._value = "Replayed feedback submission."
+            modal.rating_input._value = str(random.randint(1, 5))
+            interaction = FakeInteraction(
+                self.bot, guild, world.member(guild, user_alias), type=discord.InteractionType.modal_submit
+            )
+            await modal.on_submit(interaction)
+            return True
+
+        # Slash commands are not replayed, their arguments are not recorded
+        return False
+
+    def sample_depths(self) -> None:
+        roles_cog = self.bot.cogs["RoleReactionPanel"]
+        welcome_cog = self.bot.cogs["WelcomeSystem"]
+        samples = {
+            "handlers in flight": len(self.tasks),
+            "API calls in flight": self.bot.api.in_flight,
+            "role edits pending": len(roles_cog.role_queue.pending),
+            "welcomes buffered": sum(len(joins) for joins in welcome_cog.join_buffers.values()),
+            "member lookups pending": sum(len(waiting) for waiting in member_resolver.pending.values()),
+        }
+        for name, depth in samples.items():
+            self.depths.setdefault(name, []).append(depth)
+
+    async def monitor(self) -> None:
+        while True:
+            self.sample_depths()
+            await asyncio.sleep(SAMPLE_INTERVAL)
+
+    async def replay(self, path: str, limit: Optional[int] = None) -> Dict:
+        monitor = asyncio.create_task(self.monitor())
+        start = time.perf_counter()
+        last_offset = 0
+        count = 0
+
+        for event in read_recording(path):
+            if limit is not None and count >= limit:
+                break
+            count += 1
+            last_offset = event[0]
+            scheduled = start + event[0] / 1000 / self.speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            task = asyncio.create_task(self.run_event(event, scheduled))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+        if self.tasks:
+            await asyncio.gather(*list(self.tasks))
+        dispatched = time.perf_counter() - start
+
+        # Apply role edits still waiting for their coalescing delay
+        await self.bot.cogs["RoleReactionPanel"].role_queue.flush_all()
+        monitor.cancel()
+        self.sample_depths()
+
+        return {
+            "events": count,
+            "recorded_seconds": last_offset / 1000,
+            "wall_seconds": time.perf_counter() - start,
+            "dispatch_seconds": dispatched,
+        }
+
+def _percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def print_report(replayer: Replayer, summary: Dict, speed: float) -> None:
+    handled = sum(len(latencies) for latencies in replayer.latencies.values())
+    print(f"Replayed {summary['events']:,} events ({summary['recorded_seconds']:.1f} s recorded) "
+          f"at {speed:g}x in {summary['wall_seconds']:.1f} s")
+    print(f"Throughput: {handled / summary['dispatch_seconds']:,.1f} events/s handled, "
+          f"{sum(replayer.skipped.values()):,} skipped, {sum(replayer.errors.values()):,} failed")
+
+    print(f"\n{'event':<16} {'count':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for event_type, latencies in sorted(replayer.latencies.items()):
+        print(f"{event_type:<16} {len(latencies):>7,} {_percentile(latencies, 0.5) * 1000:>9.1f} "
+              f"{_percentile(latencies, 0.99) * 1000:>9.1f} {max(latencies) * 1000:>9.1f}")
+
+    print(f"\n{'queue':<24} {'max':>7} {'mean':>9}")
+    for name, depths in replayer.depths.items():
+        print(f"{name:<24} {max(depths):>7,} {sum(depths) / len(depths):>9.1f}")
+
+    calls = replayer.bot.api.calls
+    print(f"\nAPI calls: {sum(calls.values()):,} "
+          f"({', '.join(f'{route} {count:,}' for route, count in calls.most_common())})")
+
+async def replay(args) -> None:
+    workdir = tempfile.mkdtemp(prefix="lvbot-replay-")
+    recording = os.path.abspath(args.recording)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        bot = FakeBot(FakeAPI(args.api_latency / 1000))
+        cogs = [Economy(bot), Shop(bot), TicketSystem(bot), FeedbackSystem(bot), RoleReactionPanel(bot), WelcomeSystem(bot)]
+        for cog in cogs:
+            bot.add_cog(cog)
+            if hasattr(cog, "cog_load"):
+                await cog.cog_load()
+        # Only the dispatch paths are replayed, not the periodic flush loops
+        cogs[1].flush_analytics.cancel()
+
+        replayer = Replayer(bot, args.speed)
+        summary = await replayer.replay(recording, args.limit)
+        print_report(replayer, summary, args.speed)
+
+        for cog in cogs:
+            if hasattr(cog, "cog_unload"):
+                result = cog.cog_unload()
+                if asyncio.iscoroutine(result):
+                    await result
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def synthesize(path: str, seed: int = 1) -> None:
+    """Write a launch day shaped recording: a join wave, reaction spam on a panel and a checkout rush"""
+    rng = random.Random(seed)
+    events = []
+    guild, panel_channel, panel_message, shop_channel, ticket_channel = 1, 2, 3, 4, 5
+    users = list(range(100, 3100))
+    emojis = ["🎮", "🎨", "🎵", "📢", "🧪"]
+
+    # Join wave: 2,000 joins in the first two minutes, peaking after 30 seconds
+    for user in users[:2000]:
+        events.append([int(rng.triangular(0, 120, 30) * 1000), "member_join", guild, user, False])
+
+    # Reaction spam: new members pick roles on the panel, some change their mind
+    for user in users[:2000]:
+        joined = 30_000 + rng.random() * 120_000
+        for emoji in rng.sample(emojis, rng.randint(1, 3)):
+            events.append([int(joined), "reaction_add", guild, panel_channel, panel_message, user, emoji, True])
+            if rng.random() < 0.2:
+                events.append([int(joined + rng.random() * 10_000), "reaction_remove", guild, panel_channel,
+                               panel_message, user, emoji, True])
+
+    # Checkout rush: 600 purchase clicks in 30 seconds once the store opens
+    for user in rng.sample(users, 600):
+        events.append([int((150 + rng.random() * 30) * 1000), "component", guild, shop_channel, user, 6,
+                       "shop_buy", 7, []])
+
+    # Support tickets and feedback trickle in over the whole period
+    for user in rng.sample(users, 150):
+        events.append([int(rng.random() * 180_000), "component", guild, ticket_channel, user, 8, "ticket_create", None, []])
+    for user in rng.sample(users, 200):
+        submitted = rng.random() * 180_000
+        events.append([int(submitted), "component", guild, 9, user, 10, "feedback", 9, []])
+        events.append([int(submitted + 20_000), "modal", guild, 9, user])
+
+    writer = RecordingWriter(path)
+    writer.write(sorted(events, key=lambda event: event[0]))
+    writer.close()
+    print(f"Wrote {len(events):,} synthetic events to {path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded gateway events through the cogs")
+    parser.add_argument("recording", nargs="?", help="Recording to replay (.jsonl.gz)")
+    parser.add_argument("--speed", type=float, default=10.0, help="Replay speed, 1 is real time (1-100)")
+    parser.add_argument("--api-latency", type=float, default=50.0, metavar="MS", help="Latency of each fake API call")
+    parser.add_argument("--limit", type=int, help="Replay only the first N events")
+    parser.add_argument("--synthesize", metavar="PATH", help="Write a synthetic launch day recording to PATH and exit")
+    args = parser.parse_args()
+
+    if args.synthesize:
+        synthesize(args.synthesize)
+    elif not args.recording:
+        parser.error("a recording is required unless --synthesize is given")
+    elif not 1 <= args.speed <= 100:
+        parser.error("--speed must be between 1 and 100")
+    else:
+        asyncio.run(replay(args))
\ No newline at end of file
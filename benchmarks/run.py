@@ -0,0 +1,288 @@
+"""Offline benchmarks of the bot's hot paths against in-process Discord fakes
+
+Usage: python benchmarks/run.py [--only NAME ...] [--scale N] [--api-latency MS] [--save-baseline] [--check]
+
+Every scenario drives real cog code (currency operations, purchases, tickets,
+reaction roles, welcome joins, feedback) through the fakes in fakes.py and
+reports ops/sec and p50/p99 latency. Results are compared with baseline.json,
+--save-baseline replaces it and --check exits with status 1 on a regression.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import discord
+from benchmarks.fakes import FakeAPI, FakeBot, FakeInteraction, FakeMessage, FakeReactionPayload
+from cogs.economy import Economy
+from cogs.feedback import FeedbackModal, FeedbackSystem
+from cogs.roles import RoleReactionPanel
+from cogs.shop import Shop
+from cogs.welcome import WelcomeSystem
+from utils.currency_manager import CurrencyManager
+from utils.embed_builder import create_shop_embed
+from utils.ticket_system import handle_shop_buy, handle_ticket_close, handle_ticket_create
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Slowdown against the baseline reported as a regression
+DEFAULT_TOLERANCE = 0.25
+
+# Operation run once per iteration, and an optional drain awaited after the last one
+Op = Callable[[int], Awaitable[None]]
+Scenario = Callable[[FakeBot, int], Awaitable[Tuple[Op, Optional[Callable[[], Awaitable[None]]]]]]
+
+SCENARIOS: Dict[str, Tuple[Scenario, int]] = {}
+
+def scenario(name: str, ops: int):
+    """Register a scenario with its number of operations at scale 1"""
+    def decorator(func):
+        SCENARIOS[name] = (func, ops)
+        return func
+    return decorator
+
+@scenario("currency_add", 2000)
+async def currency_add(bot, ops):
+    currency = CurrencyManager()
+    users = [str(user_id) for user_id in range(1000)]
+
+    async def op(i):
+        await currency.add_balance(users[i % len(users)], 10, guild_id=1)
+    return op, None
+
+@scenario("currency_purchase", 2000)
+async def currency_purchase(bot, ops):
+    currency = CurrencyManager()
+    buyers = [str(user_id) for user_id in range(1000)]
+    for buyer in buyers:
+        currency.balances.set(buyer, 1_000_000.0)
+
+    async def op(i):
+        await currency.process_purchase(buyers[i % len(buyers)], "seller", 5.0, guild_id=1)
+    return op, None
+
+@scenario("shop_purchase", 500)
+async def shop_purchase(bot, ops):
+    guild = bot.add_guild()
+    guild.add_role("Seller", position=10)
+    seller = guild.add_member(name="seller")
+    assets = guild.add_channel("private-assets")
+    for number in range(50):
+        assets.messages.append(FakeMessage(assets, f"Changelog {number}"))
+    assets.messages.append(FakeMessage(assets, "Castle Pack download: https://example.com/castle-pack"))
+
+    bot.add_cog(Economy(bot))
+    shop = Shop(bot)
+    bot.add_cog(shop)
+    shop.flush_analytics.cancel()
+
+    item = FakeMessage(guild.add_channel("shop"), embeds=[
+        create_shop_embed("Castle Pack", "Modular castle kit", "Walls, towers and gates", "$10", "Asset")
+    ])
+    buyers = [guild.add_member() for _ in range(ops)]
+    for buyer in buyers:
+        bot.cogs["Economy"].currency.balances.set(str(buyer.id), 25.0)
+
+    async def op(i):
+        interaction = FakeInteraction(bot, guild, buyers[i % len(buyers)], message=item)
+        await handle_shop_buy(interaction, guild.id, str(seller.id))
+    return op, None
+
+@scenario("ticket_create", 1000)
+async def ticket_create(bot, ops):
+    guild = bot.add_guild()
+    guild.add_role("Support", position=10)
+    users = [guild.add_member() for _ in range(ops)]
+
+    async def op(i):
+        await handle_ticket_create(FakeInteraction(bot, guild, users[i % len(users)]), guild.id, None)
+    return op, None
+
+@scenario("ticket_close", 1000)
+async def ticket_close(bot, ops):
+    guild = bot.add_guild()
+    category = await guild.create_category("Support Tickets")
+    users = [guild.add_member() for _ in range(ops)]
+    channels = [guild.add_channel(f"ticket-{user.name}", category) for user in users]
+
+    async def op(i):
+        channel = channels[i % len(channels)]
+        channel.name = channel.name.replace("closed-", "")
+        await handle_ticket_close(FakeInteraction(bot, guild, users[i % len(users)], channel), guild.id, None)
+    return op, None
+
+@scenario("reaction_roles", 5000)
+async def reaction_roles(bot, ops):
+    guild = bot.add_guild()
+    emojis = ["🎮", "🎨", "🎵", "📢", "🧪"]
+    roles = {emoji: guild.add_role(f"Role {emoji}").id for emoji in emojis}
+    members = [guild.add_member() for _ in range(ops // 5)]
+    channel = guild.add_channel("roles")
+
+    cog = RoleReactionPanel(bot)
+    bot.add_cog(cog)
+    message_id = 1
+    cog.reaction_roles[message_id] = {"channel_id": channel.id, "mode": "reactions", "duration": None, "roles": roles}
+
+    async def op(i):
+        member = members[i % len(members)]
+        emoji = emojis[i // len(members) % len(emojis)]
+        payload = FakeReactionPayload(guild, channel.id, message_id, member.id, emoji, member)
+        # Every fourth event takes a reaction back, like members changing their mind
+        if i % 4 == 3:
+            await cog.on_raw_reaction_remove(payload)
+        else:
+            await cog.on_raw_reaction_add(payload)
+
+    async def drain():
+        # Role edits are coalesced per member, apply what is still pending
+        await cog.role_queue.flush_all()
+    return op, drain
+
+@scenario("welcome_join", 2000)
+async def welcome_join(bot, ops):
+    guild = bot.add_guild()
+    welcome = guild.add_channel("welcome")
+    guild.add_channel("rules")
+
+    cog = WelcomeSystem(bot)
+    bot.add_cog(cog)
+    # Burst batching off, so every join sends its own welcome
+    cog.welcome_config[str(guild.id)] = {"channel_id": str(welcome.id), "burst_threshold": 0}
+
+    async def op(i):
+        await cog.on_member_join(guild.add_member())
+
+    async def drain():
+        cog.cog_unload()
+    return op, drain
+
+@scenario("feedback_submit", 2000)
+async def feedback_submit(bot, ops):
+    guild = bot.add_guild()
+    channel = guild.add_channel("feedback")
+    users = [guild.add_member() for _ in range(100)]
+
+    cog = FeedbackSystem(bot)
+    bot.add_cog(cog)
+    cog.config[str(guild.id)] = {"feedback_channel_id": str(channel.id)}
+
+    async def op(i):
+        modal = FeedbackModal(channel.id)
+        modal.title_input._value = "Great assets"
+        modal.feedback_input._value = "The castle pack saved me a week of work."
+        modal.rating_input._value = str(i % 5 + 1)
+        await modal.on_submit(FakeInteraction(bot, guild, users[i % len(users)]))
+    return op, None
+
+def _percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+async def run_scenario(name: str, scale: float, api_latency: float) -> Dict:
+    """Run one scenario in a fresh working directory and measure it"""
+    func, base_ops = SCENARIOS[name]
+    ops = max(1, int(base_ops * scale))
+    workdir = tempfile.mkdtemp(prefix=f"lvbot-bench-{name}-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        bot = FakeBot(FakeAPI(api_latency / 1000))
+        op, drain = await func(bot, ops)
+
+        latencies = []
+        start = time.perf_counter()
+        for i in range(ops):
+            op_start = time.perf_counter()
+            await op(i)
+            latencies.append(time.perf_counter() - op_start)
+        if drain:
+            await drain()
+        total = time.perf_counter() - start
+
+        return {
+            "ops": ops,
+            "ops_per_sec": round(ops / total, 1),
+            "p50_ms": round(_percentile(latencies, 0.5) * 1000, 3),
+            "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+            "api_calls": sum(bot.api.calls.values()),
+        }
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Print results next to the baseline and return the scenarios that regressed"""
+    regressions = []
+    print(f"{'scenario':<18} {'ops/sec':>10} {'p50 ms':>9} {'p99 ms':>9} {'calls/op':>9}  vs baseline")
+    for name, result in results.items():
+        line = (f"{name:<18} {result['ops_per_sec']:>10,.0f} {result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f} "
+                f"{result['api_calls'] / result['ops']:>9.1f}")
+        base = baseline.get(name)
+        if base:
+            throughput = result["ops_per_sec"] / base["ops_per_sec"] - 1
+            p50 = result["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+            p99 = result["p99_ms"] / base["p99_ms"] - 1 if base["p99_ms"] else 0.0
+            line += f"  ops/sec {throughput:+.0%}, p50 {p50:+.0%}, p99 {p99:+.0%}"
+            # The tail of sub-millisecond operations is too noisy to fail on, p99 is informational
+            if throughput < -tolerance or p50 > tolerance:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+def load_baseline() -> Dict:
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, 'r') as f:
+        return json.load(f).get("results", {})
+
+async def main(args) -> int:
+    names = args.only or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenario(s): {', '.join(unknown)}. Available: {', '.join(SCENARIOS)}")
+        return 2
+
+    results = {}
+    for name in names:
+        results[name] = await run_scenario(name, args.scale, args.api_latency)
+
+    regressions = compare(results, load_baseline(), args.tolerance)
+
+    if args.save_baseline:
+        # Scenarios that were not run keep their previous baseline
+        merged = {**load_baseline(), **results}
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump({
+                "python": platform.python_version(),
+                "discord.py": discord.__version__,
+                "machine": platform.machine(),
+                "scale": args.scale,
+                "api_latency_ms": args.api_latency,
+                "results": merged,
+            }, f, indent=4)
+        print(f"Saved baseline to {BASELINE_FILE}")
+
+    if regressions:
+        print(f"Regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+    return 1 if regressions and args.check else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the bot's hot paths offline")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="Scenarios to run (default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the number of operations")
+    parser.add_argument("--api-latency", type=float, default=0.0, metavar="MS", help="Latency of each fake API call")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown against the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if a scenario regressed")
+    sys.exit(asyncio.run(main(parser.parse_args())))
\ No newline at end of file
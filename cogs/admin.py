@@ -0,0 +1,165 @@
+import asyncio
+import discord
+import os
+import time
+from discord import app_commands
+from discord.ext import commands
+from utils.exporter import DATASETS, EXPORT_FORMATS, export_dataset
+from utils.tracing import summarize
+
+class Admin(commands.Cog):
+    """Administrative tools for stored data and slash commands"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.exporting = set()  # Guild IDs with an export in progress
+
+    async def _run_export(self, guild: discord.Guild, dataset: str, fmt: str, send) -> None:
+        """Export a dataset of a guild and upload it part by part with the given send coroutine"""
+        if guild.id in self.exporting:
+            await send("An export is already running for this server.")
+            return
+
+        self.exporting.add(guild.id)
+        paths = []
+        try:
+            # Stream the log to disk in a thread so the event loop keeps running
+            paths, count = await asyncio.to_thread(export_dataset, dataset, fmt, guild.id, guild.filesize_limit)
+
+            if count == 0:
+                await send(f"There is no {dataset} data to export.")
+                return
+
+            for number, path in enumerate(paths, start=1):
+                content = f"**{dataset}** export: {count:,} rows"
+                if len(paths) > 1:
+                    content += f" (part {number}/{len(paths)})"
+                await send(content, file=discord.File(path))
+                os.remove(path)
+        except Exception as e:
+            print(f"Error exporting {dataset}: {e}")
+            await send(f"An error occurred while exporting: {str(e)}")
+        finally:
+            # Remove the parts that were not uploaded
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            self.exporting.discard(guild.id)
+
+    @commands.command(name="export")
+    @commands.has_permissions(administrator=True)
+    async def export_prefix(self, ctx, dataset: str, fmt: str = "csv"):
+        """Export stored data as a compressed file
+
+        Usage: !export <feedback|transactions|tickets> [csv|jsonl]
+        """
+        if dataset not in DATASETS:
+            await ctx.send(f"Dataset must be one of: {', '.join(DATASETS)}")
+            return
+        if fmt not in EXPORT_FORMATS:
+            await ctx.send(f"Format must be one of: {', '.join(EXPORT_FORMATS)}")
+            return
+
+        async with ctx.typing():
+            await self._run_export(ctx.guild, dataset, fmt, ctx.send)
+
+    @app_commands.command(name="export", description="Export stored data as a compressed file")
+    @app_commands.describe(dataset="The data to export", fmt="File format of the export")
+    @app_commands.rename(fmt="format")
+    @app_commands.choices(
+        dataset=[app_commands.Choice(name=name.capitalize(), value=name) for name in DATASETS],
+        fmt=[app_commands.Choice(name=fmt.upper(), value=fmt) for fmt in EXPORT_FORMATS]
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def export_slash(self, interaction: discord.Interaction, dataset: str, fmt: str = "csv"):
+        """Export stored data via slash command"""
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        async def send(content, **kwargs):
+            await interaction.followup.send(content, ephemeral=True, **kwargs)
+
+        await self._run_export(interaction.guild, dataset, fmt, send)
+
+    async def _sync_commands(self, guild: discord.Guild, scope: str) -> str:
+        """Force a command sync and describe the result"""
+        if scope == "guild":
+            self.bot.tree.copy_global_to(guild=guild)
+            synced = await self.bot.command_syncer.sync(guild, force=True)
+        else:
+            synced = await self.bot.command_syncer.sync(force=True)
+        return f"Synced {len(synced)} command(s) ({scope})."
+
+    @commands.command(name="synccommands")
+    @commands.is_owner()
+    async def sync_commands_prefix(self, ctx, scope: str = "global"):
+        """Sync slash commands even if they did not change (Owner only)
+
+        Usage: !synccommands [global|guild]
+        """
+        if scope not in ("global", "guild"):
+            await ctx.send("Scope must be `global` or `guild`")
+            return
+
+        try:
+            await ctx.send(await self._sync_commands(ctx.guild, scope))
+        except Exception as e:
+            await ctx.send(f"Failed to sync commands: {str(e)}")
+
+    @app_commands.command(name="synccommands", description="Sync slash commands even if they did not change")
+    @app_commands.describe(scope="Sync globally or to this server only")
+    @app_commands.choices(scope=[
+        app_commands.Choice(name="Global", value="global"),
+        app_commands.Choice(name="This server", value="guild")
+    ])
+    @app_commands.default_permissions(administrator=True)
+    async def sync_commands_slash(self, interaction: discord.Interaction, scope: str = "global"):
+        """Force a command sync via slash command"""
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("Only the bot owner can sync commands.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            await interaction.followup.send(await self._sync_commands(interaction.guild, scope), ephemeral=True)
+        except Exception as e:
+            await interaction.followup.send(f"Failed to sync commands: {str(e)}", ephemeral=True)
+
+    async def _trace_summary_embed(self, hours: int) -> discord.Embed:
+        """Build an embed with the slowest traced flows and steps"""
+        summary = await asyncio.to_thread(summarize, since=time.time() - hours * 3600)
+
+        embed = discord.Embed(title=f"Slowest flows (last {hours}h)", color=discord.Color.blue())
+        if not summary["flows"]:
+            embed.description = "No traces recorded yet. Raise TRACE_SAMPLE_RATE to trace more flows."
+            return embed
+
+        def format_rows(rows):
+            return "\n".join(
+                f"`{row['name']}`: p50 {row['p50_ms']:,.0f} ms, p95 {row['p95_ms']:,.0f} ms, "
+                f"max {row['max_ms']:,.0f} ms ({row['count']} traces"
+                + (f", {row['errors']} errors" if row['errors'] else "") + ")"
+                for row in rows
+            )[:1024] or "None"  # Flows that returned before their first step have no steps
+
+        embed.add_field(name="Flows", value=format_rows(summary["flows"]), inline=False)
+        embed.add_field(name="Steps", value=format_rows(summary["steps"]), inline=False)
+        return embed
+
+    @commands.command(name="traces")
+    @commands.has_permissions(administrator=True)
+    async def traces_prefix(self, ctx, hours: int = 24):
+        """Show the slowest traced flows and steps
+
+        Usage: !traces [hours]
+        """
+        await ctx.send(embed=await self._trace_summary_embed(hours))
+
+    @app_commands.command(name="traces", description="Show the slowest traced flows and steps")
+    @app_commands.describe(hours="How many hours of traces to include")
+    @app_commands.default_permissions(administrator=True)
+    async def traces_slash(self, interaction: discord.Interaction, hours: app_commands.Range[int, 1, 720] = 24):
+        """Show the trace summary via slash command"""
+        await interaction.response.send_message(embed=await self._trace_summary_embed(hours), ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(Admin(bot))
\ No newline at end of file
@@ -2,20 +2,26 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from utils.currency_manager import CurrencyManager
+from utils.lazy_stores import LazyStores
 
-class Economy(commands.Cog):
+class Economy(LazyStores, commands.Cog):
     """Economy system with user balances and transactions"""
     
+    STORES = ("currency",)
+    
     def __init__(self, bot):
         self.bot = bot
-        self.currency = CurrencyManager()
         self.currency_name = "Credits"  # Can be customized
+    
+    def load_stores(self):
+        """Load balances from disk (blocking, run in a thread at startup)"""
+        self.currency = CurrencyManager()
         
     @commands.command(name="balance", aliases=["bal"])
     async def check_balance_prefix(self, ctx, member: discord.Member = None):
         """Check your balance or another user's balance"""
         target = member or ctx.author
-        balance = self.currency.get_balance(target.id)
+        balance = await self.currency.get_balance(target.id)
         
         embed = discord.Embed(
             title=f"{target.display_name}'s Balance",
@@ -31,7 +37,7 @@ class Economy(commands.Cog):
     async def check_balance_slash(self, interaction: discord.Interaction, member: discord.Member = None):
         """Check balance via slash command"""
         target = member or interaction.user
-        balance = self.currency.get_balance(target.id)
+        balance = await self.currency.get_balance(target.id)
         
         embed = discord.Embed(
             title=f"{target.display_name}'s Balance",
@@ -51,7 +57,7 @@ class Economy(commands.Cog):
                 await ctx.send("Amount must be positive!")
                 return
                 
-            new_balance = self.currency.add_balance(member.id, amount)
+            new_balance = await self.currency.add_balance(member.id, amount, guild_id=member.guild.id)
             
             embed = discord.Embed(
                 title="Balance Updated",
@@ -78,7 +84,7 @@ class Economy(commands.Cog):
                 await interaction.response.send_message("Amount must be positive!", ephemeral=True)
                 return
                 
-            new_balance = self.currency.add_balance(member.id, amount)
+            new_balance = await self.currency.add_balance(member.id, amount, guild_id=member.guild.id)
             
             embed = discord.Embed(
                 title="Balance Updated",
@@ -101,7 +107,7 @@ class Economy(commands.Cog):
                 await ctx.send("Amount must be positive!")
                 return
                 
-            new_balance = self.currency.remove_balance(member.id, amount)
+            new_balance = await self.currency.remove_balance(member.id, amount, guild_id=member.guild.id)
             
             embed = discord.Embed(
                 title="Balance Updated",
@@ -128,7 +134,7 @@ class Economy(commands.Cog):
                 await interaction.response.send_message("Amount must be positive!", ephemeral=True)
                 return
                 
-            new_balance = self.currency.remove_balance(member.id, amount)
+            new_balance = await self.currency.remove_balance(member.id, amount, guild_id=member.guild.id)
             
             embed = discord.Embed(
                 title="Balance Updated",
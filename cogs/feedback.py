@@ -1,13 +1,23 @@
 import discord
 from discord import app_commands
-from discord.ext import commands
-from discord.ui import Button, View, Modal, TextInput
-import json
-import os
+from discord.ext import commands, tasks
+from discord.ui import Button, Modal, TextInput
+from utils.feedback_digest import FeedbackDigestQueue, FEEDBACK_DIGEST_FILE
+from utils.feedback_store import FeedbackStore, FEEDBACK_STATS_FILE, STATS_PERIODS, rebuild_stale_stats
+from utils.interaction_router import RoutedView, make_custom_id, router
+from utils.lazy_stores import LazyStores
+from utils.metrics import instrument
+from utils.store import CLUSTER_ID, log_store_error, open_store
 
 # Config file to store feedback channel IDs
 FEEDBACK_CONFIG_FILE = 'feedback_config.json'
 
+# Seconds feedback waits in digest mode before it is posted
+DEFAULT_DIGEST_INTERVAL = 60
+
+# Seconds between writes of the rating statistics to their store
+STATS_FLUSH_INTERVAL = 30
+
 class FeedbackModal(Modal):
     """Modal for collecting user feedback"""
     
@@ -45,6 +55,7 @@ class FeedbackModal(Modal):
         )
         self.add_item(self.rating_input)
     
+    @instrument("modal", "feedback")
     async def on_submit(self, interaction: discord.Interaction):
         """Process the submitted feedback"""
         # Validate rating
@@ -66,6 +77,17 @@ class FeedbackModal(Modal):
             )
             return
         
+        # Persist the submission and update the rating statistics
+        feedback_cog = interaction.client.get_cog('FeedbackSystem')
+        if feedback_cog and interaction.guild_id:
+            feedback_cog.store.add(
+                interaction.guild_id,
+                interaction.user.id,
+                self.title_input.value,
+                self.feedback_input.value,
+                rating
+            )
+        
         # Create stars representation
         stars = "⭐" * rating
         
@@ -84,6 +106,19 @@ class FeedbackModal(Modal):
         
         embed.add_field(name="Rating", value=f"{stars} ({rating}/5)", inline=False)
         
+        # In digest mode the feedback is queued and posted with others
+        if feedback_cog and feedback_cog.is_digest_enabled(interaction.guild_id):
+            try:
+                await feedback_cog.digest.enqueue(interaction.guild_id, feedback_channel.id, embed)
+                await interaction.response.send_message(
+                    "Thank you for your feedback! It has been submitted successfully.",
+                    ephemeral=True
+                )
+                return
+            except Exception as e:
+                # Could not persist the queue, post directly instead
+                print(f"Error queueing feedback: {e}")
+        
         # Send feedback to the designated channel
         try:
             await feedback_channel.send(embed=embed)
@@ -97,11 +132,11 @@ class FeedbackModal(Modal):
                 ephemeral=True
             )
 
-class FeedbackView(View):
+class FeedbackView(RoutedView):
     """View with feedback button"""
     
-    def __init__(self, feedback_channel_id: int):
-        super().__init__(timeout=None)  # Persistent view
+    def __init__(self, feedback_channel_id: int, guild_id: int = None):
+        super().__init__()  # Persistent view, dispatched by the interaction router
         self.feedback_channel_id = feedback_channel_id
         
         # Add feedback button
@@ -109,41 +144,90 @@ class FeedbackView(View):
             style=discord.ButtonStyle.primary,
             label="Give Feedback",
             emoji="📝",
-            custom_id=f"feedback_button_{feedback_channel_id}"
+            custom_id=make_custom_id("feedback", guild_id, feedback_channel_id)
         )
-        feedback_button.callback = self.feedback_callback
         self.add_item(feedback_button)
-    
-    async def feedback_callback(self, interaction: discord.Interaction):
-        """Open feedback modal when button is clicked"""
-        modal = FeedbackModal(self.feedback_channel_id)
-        await interaction.response.send_modal(modal)
 
-class FeedbackSystem(commands.Cog):
+async def handle_feedback_button(interaction: discord.Interaction, guild_id, entity):
+    """Open feedback modal when the button is clicked"""
+    modal = FeedbackModal(int(entity))
+    await interaction.response.send_modal(modal)
+
+class FeedbackSystem(LazyStores, commands.Cog):
     """System for collecting user feedback"""
     
+    STORES = ("config", "store", "digest")
+    
     def __init__(self, bot):
         self.bot = bot
+    
+    def load_stores(self):
+        """Load configuration, rating statistics and queued digests from disk (blocking, run in a thread at startup)"""
+        self.config_store = open_store(FEEDBACK_CONFIG_FILE)
         self.config = self._load_config()
+        stats_store = open_store(FEEDBACK_STATS_FILE)
+        if CLUSTER_ID is None:
+            # In a cluster the launcher does this before any worker appends to the log
+            rebuild_stale_stats(stats_store)
+        self.store = FeedbackStore(stats_store)
+        channel_guilds = {
+            int(guild_config["feedback_channel_id"]): int(guild_id)
+            for guild_id, guild_config in self.config.items() if "feedback_channel_id" in guild_config
+        }
+        self.digest = FeedbackDigestQueue(open_store(FEEDBACK_DIGEST_FILE), channel_guilds)
+    
+    async def cog_load(self):
+        """Route the feedback buttons of every panel to the modal"""
+        router.register("feedback", handle_feedback_button)
+    
+    def on_stores_loaded(self):
+        """Post queued digests and save statistics once the stores are loaded"""
+        self.flush_digest.start()
+        self.flush_stats.start()
+    
+    async def cog_unload(self):
+        router.unregister("feedback")
+        self.flush_digest.cancel()
+        self.flush_stats.cancel()
+        if self.stores_loaded():
+            self.store.flush()
+    
+    def is_digest_enabled(self, guild_id) -> bool:
+        """Check whether feedback of a guild is posted in digests"""
+        return self.config.get(str(guild_id), {}).get("digest_enabled", False)
+    
+    @tasks.loop(seconds=5)
+    async def flush_digest(self):
+        """Post queued feedback whose channel is due"""
+        intervals = {
+            int(guild_config["feedback_channel_id"]): guild_config.get("digest_interval", DEFAULT_DIGEST_INTERVAL)
+            for guild_config in self.config.values()
+            if "feedback_channel_id" in guild_config and guild_config.get("digest_enabled")
+        }
+        guild_channels = {
+            int(guild_id): int(guild_config["feedback_channel_id"])
+            for guild_id, guild_config in self.config.items()
+            if "feedback_channel_id" in guild_config
+        }
+        await self.digest.flush(self.bot, intervals, guild_channels)
+    
+    @flush_digest.before_loop
+    async def before_flush_digest(self):
+        await self.bot.wait_until_ready()
+    
+    @tasks.loop(seconds=STATS_FLUSH_INTERVAL)
+    async def flush_stats(self):
+        """Periodically write the rating statistics to their store"""
+        self.store.flush()
     
     def _load_config(self):
-        """Load feedback configuration from file"""
-        if os.path.exists(FEEDBACK_CONFIG_FILE):
-            try:
-                with open(FEEDBACK_CONFIG_FILE, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading feedback config: {e}")
-                return {}
-        return {}
+        """Load feedback configuration from the shared store"""
+        return dict(self.config_store.items())
     
-    def _save_config(self):
-        """Save feedback configuration to file"""
-        try:
-            with open(FEEDBACK_CONFIG_FILE, 'w') as f:
-                json.dump(self.config, f, indent=4)
-        except Exception as e:
-            print(f"Error saving feedback config: {e}")
+    def _save_config(self, guild_id):
+        """Save the feedback configuration of a guild"""
+        guild_id = str(guild_id)
+        self.config_store.aset(guild_id, self.config[guild_id]).add_done_callback(log_store_error)
     
     @commands.command(name="setfeedback")
     @commands.has_permissions(administrator=True)
@@ -155,11 +239,11 @@ class FeedbackSystem(commands.Cog):
         
         # Store configuration
         guild_id = str(ctx.guild.id)
-        self.config[guild_id] = {
+        self.config.setdefault(guild_id, {}).update({
             "panel_channel_id": ctx.channel.id,
             "feedback_channel_id": feedback_channel.id
-        }
-        self._save_config()
+        })
+        self._save_config(guild_id)
         
         # Create the panel
         await self._create_feedback_panel(ctx.channel, feedback_channel, ctx.author)
@@ -182,11 +266,11 @@ class FeedbackSystem(commands.Cog):
         """Set up a feedback panel using slash command"""
         # Store configuration
         guild_id = str(interaction.guild_id)
-        self.config[guild_id] = {
+        self.config.setdefault(guild_id, {}).update({
             "panel_channel_id": interaction.channel_id,
             "feedback_channel_id": feedback_channel.id
-        }
-        self._save_config()
+        })
+        self._save_config(guild_id)
         
         # Create the panel
         await self._create_feedback_panel(
@@ -230,18 +314,132 @@ class FeedbackSystem(commands.Cog):
         embed.set_footer(text=f"Feedback System • Created by {creator.name}")
         
         # Create button view
-        view = FeedbackView(feedback_channel.id)
+        view = FeedbackView(feedback_channel.id, feedback_channel.guild.id)
         
         # Send the panel
         await panel_channel.send(embed=embed, view=view)
         return embed
     
-    @commands.Cog.listener()
-    async def on_ready(self):
-        """Register persistent feedback views when bot starts"""
-        for guild_id, guild_config in self.config.items():
-            if "feedback_channel_id" in guild_config:
-                self.bot.add_view(FeedbackView(guild_config["feedback_channel_id"]))
+    def _set_digest_config(self, guild_id, enabled, interval):
+        """Store the digest settings for a guild"""
+        guild_config = self.config.setdefault(str(guild_id), {})
+        if enabled is not None:
+            guild_config["digest_enabled"] = enabled
+        if interval is not None:
+            guild_config["digest_interval"] = interval
+        self._save_config(guild_id)
+    
+    def _build_digest_embed(self, guild_id):
+        """Build the digest status embed with the queue metrics"""
+        guild_config = self.config.get(str(guild_id), {})
+        metrics = self.digest.metrics
+        
+        embed = discord.Embed(
+            title="📬 Feedback Digest",
+            description=(
+                f"Digest mode is **{'enabled' if guild_config.get('digest_enabled') else 'disabled'}**, "
+                f"posting every {guild_config.get('digest_interval', DEFAULT_DIGEST_INTERVAL)} seconds."
+            ),
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Queued", value=str(self.digest.depth), inline=True)
+        embed.add_field(name="Oldest", value=f"{self.digest.oldest_age():.0f}s", inline=True)
+        embed.add_field(name="Max Queued", value=str(metrics["max_depth"]), inline=True)
+        embed.add_field(name="Received", value=str(metrics["enqueued"]), inline=True)
+        embed.add_field(name="Posted", value=f"{metrics['posted']} in {metrics['messages']} message(s)", inline=True)
+        embed.add_field(name="Failed Posts", value=str(metrics["failures"]), inline=True)
+        embed.add_field(name="Undeliverable", value=str(self.digest.undeliverable), inline=True)
+        embed.add_field(name="Rerouted", value=str(metrics["rerouted"]), inline=True)
+        embed.set_footer(text="Feedback System • Digest")
+        return embed
+    
+    @commands.command(name="feedbackdigest")
+    @commands.has_permissions(administrator=True)
+    async def feedback_digest_prefix(self, ctx, enabled: bool = None, interval: int = None):
+        """Configure digest mode or show its status
+        
+        Usage: !feedbackdigest [on|off] [interval_seconds]
+        """
+        if interval is not None and interval < 5:
+            await ctx.send("Interval must be at least 5 seconds.")
+            return
+            
+        if enabled is not None or interval is not None:
+            self._set_digest_config(ctx.guild.id, enabled, interval)
+        await ctx.send(embed=self._build_digest_embed(ctx.guild.id))
+    
+    @app_commands.command(name="feedbackdigest", description="Configure feedback digest mode or show its status")
+    @app_commands.describe(
+        enabled="Queue feedback and post it in combined messages",
+        interval="Seconds between digest posts"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def feedback_digest_slash(
+        self,
+        interaction: discord.Interaction,
+        enabled: bool = None,
+        interval: app_commands.Range[int, 5, 3600] = None
+    ):
+        """Configure digest mode via slash command"""
+        if enabled is not None or interval is not None:
+            self._set_digest_config(interaction.guild_id, enabled, interval)
+        await interaction.response.send_message(embed=self._build_digest_embed(interaction.guild_id), ephemeral=True)
+    
+    def _build_stats_embed(self, guild, period: str):
+        """Build the rating statistics embed from the stored aggregates"""
+        stats = self.store.summary(guild.id, period)
+        labels = {"day": "Today", "week": "Last 7 Days", "month": "This Month", "all": "All Time"}
+        
+        embed = discord.Embed(
+            title=f"📊 Feedback Statistics • {labels[period]}",
+            color=discord.Color.blue()
+        )
+        
+        if not stats["count"]:
+            embed.description = "No feedback has been submitted in this period."
+            return embed
+        
+        average = stats["sum"] / stats["count"]
+        embed.add_field(name="Submissions", value=str(stats["count"]), inline=True)
+        embed.add_field(name="Average Rating", value=f"{'⭐' * round(average)} ({average:.2f}/5)", inline=True)
+        
+        # Rating distribution as bars
+        highest = max(stats["histogram"])
+        lines = []
+        for rating in range(5, 0, -1):
+            count = stats["histogram"][rating - 1]
+            bar = "█" * round(count / highest * 10) if highest else ""
+            lines.append(f"`{rating}★` {bar} {count}")
+        embed.add_field(name="Distribution", value="\n".join(lines), inline=False)
+        
+        embed.set_footer(text="Feedback System • Statistics")
+        return embed
+    
+    @commands.command(name="feedbackstats")
+    @commands.has_permissions(administrator=True)
+    async def feedback_stats_prefix(self, ctx, period: str = "month"):
+        """Show feedback rating statistics
+        
+        Usage: !feedbackstats [day|week|month|all]
+        """
+        if period not in STATS_PERIODS:
+            await ctx.send(f"Period must be one of: {', '.join(STATS_PERIODS)}")
+            return
+            
+        await ctx.send(embed=self._build_stats_embed(ctx.guild, period))
+    
+    @app_commands.command(name="feedbackstats", description="Show feedback rating statistics")
+    @app_commands.describe(period="Time period to show statistics for")
+    @app_commands.choices(period=[
+        app_commands.Choice(name="Today", value="day"),
+        app_commands.Choice(name="Last 7 days", value="week"),
+        app_commands.Choice(name="This month", value="month"),
+        app_commands.Choice(name="All time", value="all")
+    ])
+    @app_commands.default_permissions(administrator=True)
+    async def feedback_stats_slash(self, interaction: discord.Interaction, period: str = "month"):
+        """Show feedback rating statistics via slash command"""
+        await interaction.response.send_message(embed=self._build_stats_embed(interaction.guild, period), ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(FeedbackSystem(bot))
\ No newline at end of file
@@ -2,129 +2,662 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from typing import List, Dict, Optional
-import json
-import os
+import io
 import asyncio
+from utils.interaction_router import RoutedView, make_custom_id, router
+from utils.lazy_stores import LazyStores
+from utils.member_resolver import member_resolver
+from utils.metrics import instrument
+from utils.panel_spec import load_panel_spec, diff_panel, export_panel_spec, MAX_SELECT_OPTIONS
+from utils.role_queue import RoleMutationQueue
+from utils.role_scheduler import TempRoleScheduler, TEMP_ROLE_GRANTS_FILE, parse_duration
+from utils.store import log_store_error, open_store
 
 # File to store reaction role data
 REACTION_ROLES_FILE = 'reaction_roles.json'
 
-class RoleReactionPanel(commands.Cog):
+# Maximum number of concurrent API requests while reconciling panels on startup
+RECONCILE_CONCURRENCY = 4
+
+# Also remove roles from members who hold them without reacting. Off by default
+# because roles may be granted by other means than the panel. Only applied to
+# chunked guilds (the full cache profile), otherwise role holders are unknown.
+RECONCILE_REMOVE_UNREACTED = False
+
+# Maximum number of concurrent API requests while applying a panel spec
+SPEC_CONCURRENCY = 5
+
+# Seconds before an expired temporary role is revoked again when its guild is unavailable
+TEMP_ROLE_RETRY_DELAY = 60
+
+class RolePanelView(RoutedView):
+    """Persistent select menu for component based role panels"""
+    
+    def __init__(self, guild_id: int, options: List[discord.SelectOption]):
+        super().__init__()  # Dispatched by the interaction router
+        self.add_item(discord.ui.Select(
+            custom_id=make_custom_id("role_panel", guild_id),
+            placeholder="Select your roles",
+            min_values=0,
+            max_values=len(options),
+            options=options
+        ))
+
+class RoleReactionPanel(LazyStores, commands.Cog):
+    STORES = ("reaction_roles", "temp_roles")
+    
     def __init__(self, bot):
         self.bot = bot
+        self.members = member_resolver
+        self.role_queue = RoleMutationQueue(bot, self.members)
+        self._reconcile_task = None
+    
+    def load_stores(self):
+        """Load panels and temporary role grants from disk (blocking, run in a thread at startup)"""
+        self.panel_store = open_store(REACTION_ROLES_FILE)
         self.reaction_roles = {}
         self._load_reaction_roles()
+        self.temp_roles = TempRoleScheduler(self._revoke_temp_role, open_store(TEMP_ROLE_GRANTS_FILE))
+        
+    async def cog_load(self):
+        """Route select panel interactions to this cog"""
+        router.register("role_panel", self._handle_role_panel)
+        
+    async def cog_unload(self):
+        """Apply queued role changes before the cog is removed"""
+        router.unregister("role_panel")
+        if self.stores_loaded():
+            self.temp_roles.stop()
+        if self._reconcile_task and not self._reconcile_task.done():
+            self._reconcile_task.cancel()
+        await self.role_queue.flush_all()
         
     def _load_reaction_roles(self):
-        """Load reaction roles from file"""
-        if os.path.exists(REACTION_ROLES_FILE):
-            try:
-                with open(REACTION_ROLES_FILE, 'r') as f:
-                    # Convert string keys back to integers for message_id and role_id
-                    data = json.load(f)
-                    for message_id, reactions in data.items():
-                        self.reaction_roles[int(message_id)] = {
-                            emoji: int(role_id) for emoji, role_id in reactions.items()
-                        }
-            except Exception as e:
-                print(f"Error loading reaction roles: {e}")
-        
-    def _save_reaction_roles(self):
-        """Save reaction roles to file"""
+        """Load reaction roles from the shared store"""
         try:
-            with open(REACTION_ROLES_FILE, 'w') as f:
-                # Convert int keys to strings for JSON serialization
-                serializable_data = {
-                    str(message_id): {
-                        emoji: str(role_id) for emoji, role_id in reactions.items()
-                    } for message_id, reactions in self.reaction_roles.items()
+            # Convert string keys back to integers for message_id, channel_id and role_id
+            for message_id, panel in self.panel_store.items():
+                # Older files stored the emoji -> role mapping directly
+                if "roles" not in panel:
+                    panel = {"channel_id": None, "roles": panel}
+                
+                self.reaction_roles[int(message_id)] = {
+                    **panel,
+                    "channel_id": int(panel["channel_id"]) if panel.get("channel_id") else None,
+                    "roles": {
+                        emoji: int(role_id) for emoji, role_id in panel["roles"].items()
+                    }
                 }
-                json.dump(serializable_data, f, indent=4)
         except Exception as e:
-            print(f"Error saving reaction roles: {e}")
+            print(f"Error loading reaction roles: {e}")
+        
+    def _save_reaction_roles(self, *message_ids):
+        """Save the given panels, or delete them from the store if they were removed"""
+        for message_id in message_ids:
+            panel = self.reaction_roles.get(message_id)
+            if panel is None:
+                self.panel_store.adelete(str(message_id)).add_done_callback(log_store_error)
+                continue
+            
+            # Convert int keys to strings for JSON serialization
+            self.panel_store.aset(str(message_id), {
+                **panel,
+                "channel_id": str(panel["channel_id"]) if panel.get("channel_id") else None,
+                "roles": {
+                    emoji: str(role_id) for emoji, role_id in panel["roles"].items()
+                }
+            }).add_done_callback(log_store_error)
     
     @commands.Cog.listener()
+    async def on_ready(self):
+        """Reconcile reaction role panels once and start expiring temporary roles"""
+        if self._reconcile_task is not None:
+            return
+        self._reconcile_task = asyncio.create_task(self._reconcile_panels())
+        self.temp_roles.start()
+    
+    def _revoke_temp_role(self, guild_id: int, user_id: int, role_id: int):
+        """Remove an expired temporary role, batched with other changes for the member"""
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            print(f"Dropping expired temporary role {role_id} of {user_id}, the bot is no longer in guild {guild_id}")
+            return
+        if guild.unavailable:
+            # Keep the grant and try again once the guild is back
+            self.temp_roles.schedule(guild_id, user_id, role_id, TEMP_ROLE_RETRY_DELAY)
+            return
+        self.role_queue.queue(guild_id, user_id, role_id, False)
+    
+    def grant_temp_role(self, guild_id: int, user_id: int, role_id: int, seconds: float) -> float:
+        """Give a member a role that is removed again after a number of seconds"""
+        self.role_queue.queue(guild_id, user_id, role_id, True)
+        return self.temp_roles.schedule(guild_id, user_id, role_id, seconds)
+    
+    async def _reconcile_panels(self):
+        """Apply reactions that were added or removed while the bot was offline"""
+        semaphore = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+        panels = list(self.reaction_roles.items())
+        
+        results = await asyncio.gather(
+            *(self._reconcile_panel(message_id, panel, semaphore) for message_id, panel in panels),
+            return_exceptions=True
+        )
+        
+        # Report a summary per panel
+        for (message_id, panel), result in zip(panels, results):
+            if isinstance(result, Exception):
+                result = f"failed ({result})"
+            print(f"Reaction role panel {message_id}: {result}")
+    
+    async def _reconcile_panel(self, message_id, panel, semaphore):
+        """Diff the reactions on one panel against role membership and queue the fixes"""
+        if panel.get("mode") == "select":
+            return "skipped (select panel)"
+        
+        channel = self.bot.get_channel(panel["channel_id"]) if panel.get("channel_id") else None
+        if panel.get("channel_id") is None:
+            # Panels saved before channel IDs were stored are searched for once
+            if panel.get("unresolved"):
+                return "skipped (message not found in an earlier search)"
+            message = await self._find_panel_message(message_id, semaphore)
+            if not message:
+                # Don't search every channel again on the next start, a reaction still resolves it
+                panel["unresolved"] = True
+                self._save_reaction_roles(message_id)
+                return "skipped (message not found in any channel)"
+            panel["channel_id"] = message.channel.id
+            self._save_reaction_roles(message_id)
+        elif not channel:
+            return "skipped (channel unknown)"
+        else:
+            try:
+                async with semaphore:
+                    message = await channel.fetch_message(message_id)
+            except discord.NotFound:
+                return "skipped (message deleted)"
+        
+        guild = message.guild
+        reactions = {str(reaction.emoji): reaction for reaction in message.reactions}
+        
+        # Page the reaction users of every role concurrently
+        emojis = [emoji for emoji in panel["roles"] if emoji in reactions]
+        user_sets = await asyncio.gather(
+            *(self._reaction_user_ids(reactions[emoji], semaphore) for emoji in emojis)
+        )
+        reacted_by_emoji = dict(zip(emojis, user_sets))
+        
+        added = checked = removed = 0
+        for emoji, role_id in panel["roles"].items():
+            role = guild.get_role(role_id)
+            if not role:
+                continue
+            
+            reacted = reacted_by_emoji.get(emoji, set())
+            
+            # Members who reacted but are missing the role
+            for user_id in reacted:
+                member = guild.get_member(user_id)
+                if member and role in member.roles:
+                    continue
+                # Temporary roles stay revoked once their grant expired, the reaction remains
+                if panel.get("duration") and not self.temp_roles.is_active(guild.id, user_id, role_id):
+                    continue
+                self.role_queue.queue(guild.id, user_id, role_id, True)
+                # Uncached members are resolved by the queue and may already hold the role
+                if member:
+                    added += 1
+                else:
+                    checked += 1
+            
+            # Members who hold the role without a reaction
+            if RECONCILE_REMOVE_UNREACTED and guild.chunked:
+                for member in role.members:
+                    if member.bot or member.id in reacted:
+                        continue
+                    self.role_queue.queue(guild.id, member.id, role_id, False)
+                    if panel.get("duration"):
+                        self.temp_roles.cancel(guild.id, member.id, role_id)
+                    removed += 1
+        
+        result = f"{added} role(s) to add, {checked} role(s) to check, {removed} role(s) to remove"
+        if RECONCILE_REMOVE_UNREACTED and not guild.chunked:
+            result += " (removal skipped, members are not chunked)"
+        return result
+    
+    async def _find_panel_message(self, message_id, semaphore):
+        """Search the text channels of every guild for a panel message"""
+        for guild in self.bot.guilds:
+            for channel in guild.text_channels:
+                if not channel.permissions_for(guild.me).read_message_history:
+                    continue
+                try:
+                    async with semaphore:
+                        return await channel.fetch_message(message_id)
+                except (discord.NotFound, discord.Forbidden):
+                    continue
+        return None
+    
+    async def _reaction_user_ids(self, reaction, semaphore):
+        """Collect the IDs of every non-bot user who added a reaction"""
+        async with semaphore:
+            return {user.id async for user in reaction.users() if not user.bot}
+    
+    @commands.Cog.listener()
+    @instrument("listener")
     async def on_raw_reaction_add(self, payload):
         """Event handler for when a reaction is added to a message"""
+        self._queue_reaction_role(payload, add=True)
+    
+    @commands.Cog.listener()
+    @instrument("listener")
+    async def on_raw_reaction_remove(self, payload):
+        """Event handler for when a reaction is removed from a message"""
+        self._queue_reaction_role(payload, add=False)
+    
+    def _queue_reaction_role(self, payload, add: bool):
+        """Queue the role change for a reaction event, changes are applied in batches per member"""
         if payload.user_id == self.bot.user.id:
             return  # Ignore bot's own reactions
         
         # Check if this is a role reaction message
-        message_id = payload.message_id
-        if message_id in self.reaction_roles:
-            emoji = str(payload.emoji)
+        panel = self.reaction_roles.get(payload.message_id)
+        if not panel or panel.get("mode") == "select":
+            return
+        
+        # Remember the channel of panels saved before channel IDs were stored
+        if panel.get("channel_id") is None:
+            panel["channel_id"] = payload.channel_id
+            panel.pop("unresolved", None)
+            self._save_reaction_roles(payload.message_id)
+        
+        # Check if this emoji is registered for a role
+        role_id = panel["roles"].get(str(payload.emoji))
+        if role_id is None or payload.guild_id is None:
+            return
+        
+        # Add events carry the member, which saves a lookup if it isn't cached
+        if payload.member:
+            self.members.remember(payload.member)
+        
+        # Panels with a duration grant temporary roles
+        if panel.get("duration") and add:
+            self.grant_temp_role(payload.guild_id, payload.user_id, role_id, panel["duration"])
+            return
+        if panel.get("duration"):
+            self.temp_roles.cancel(payload.guild_id, payload.user_id, role_id)
+        
+        self.role_queue.queue(payload.guild_id, payload.user_id, role_id, add)
+    
+    def _build_panel_embed(self, title: str, description: str, roles_data: List[Dict], mode: str = "reactions"):
+        """Create the embed shown on a role panel"""
+        embed = discord.Embed(
+            title=title,
+            description=description,
+            color=discord.Color.blue()
+        )
+        
+        # Add each role to the embed
+        for role_info in roles_data:
+            embed.add_field(
+                name=f"{role_info['emoji']} {role_info['name']}", 
+                value=(
+                    f"Select {role_info['name']} in the menu below to get this role"
+                    if mode == "select" else
+                    f"React with {role_info['emoji']} to get this role"
+                ), 
+                inline=False
+            )
             
-            # Check if this emoji is registered for a role
-            if emoji in self.reaction_roles[message_id]:
-                role_id = self.reaction_roles[message_id][emoji]
-                guild = self.bot.get_guild(payload.guild_id)
-                
-                if not guild:
-                    return
-                
-                # Get the role and member objects
-                role = guild.get_role(role_id)
-                member = guild.get_member(payload.user_id)
-                
-                if role and member:
-                    try:
-                        await member.add_roles(role, reason="Reaction role assignment")
-                    except discord.Forbidden:
-                        print(f"Missing permissions to assign role {role.name}")
-                    except Exception as e:
-                        print(f"Error assigning role: {e}")
+        if mode == "select":
+            embed.set_footer(text="Update your selection to get or remove roles")
+        else:
+            embed.set_footer(text="React to get or remove a role")
+        return embed
     
-    @commands.Cog.listener()
-    async def on_raw_reaction_remove(self, payload):
-        """Event handler for when a reaction is removed from a message"""
-        # Skip bot reactions
-        if payload.user_id == self.bot.user.id:
+    def _build_panel_view(self, guild_id: int, roles_data: List[Dict]):
+        """Create the persistent select menu view for a select panel"""
+        return RolePanelView(
+            guild_id,
+            [
+                discord.SelectOption(label=role_info['name'], value=str(role_info['id']), emoji=role_info['emoji'])
+                for role_info in roles_data
+            ]
+        )
+    
+    def _panel_record(self, channel_id, title, description, roles_data, mode="reactions", duration=None, key=None):
+        """Create the stored configuration of a panel"""
+        return {
+            "channel_id": channel_id,
+            "key": key,
+            "mode": mode,
+            "duration": duration,
+            "title": title,
+            "description": description,
+            "names": {role_info['emoji']: role_info['name'] for role_info in roles_data},
+            "roles": {role_info['emoji']: role_info['id'] for role_info in roles_data}
+        }
+    
+    async def _handle_role_panel(self, interaction: discord.Interaction, guild_id, entity):
+        """Interaction router handler for select panels"""
+        await self.apply_select_panel(interaction, interaction.data.get("values", []))
+    
+    async def apply_select_panel(self, interaction: discord.Interaction, values: List[str]):
+        """Apply a select panel submission with a single role edit"""
+        panel = self.reaction_roles.get(interaction.message.id)
+        if not panel:
+            await interaction.response.send_message("This role panel is no longer active.", ephemeral=True)
             return
         
-        # Check if this is a role reaction message
-        message_id = payload.message_id
-        if message_id in self.reaction_roles:
-            emoji = str(payload.emoji)
+        guild = interaction.guild
+        member = interaction.user
+        panel_role_ids = set(panel["roles"].values())
+        selected = {int(value) for value in values} & panel_role_ids
+        
+        # Diff the selection against the panel roles the member holds
+        current = {role.id for role in member.roles if not role.is_default()}
+        to_add = selected - current
+        to_remove = (panel_role_ids - selected) & current
+        
+        # Leave out roles the bot cannot manage
+        for role_id in list(to_add | to_remove):
+            role = guild.get_role(role_id)
+            if not role or role.managed or role >= guild.me.top_role:
+                to_add.discard(role_id)
+                to_remove.discard(role_id)
+        
+        if not to_add and not to_remove:
+            await interaction.response.send_message("Your roles are already up to date.", ephemeral=True)
+            return
+        
+        try:
+            await member.edit(
+                roles=[discord.Object(id=role_id) for role_id in (current | to_add) - to_remove],
+                reason="Role panel selection"
+            )
+        except discord.Forbidden:
+            await interaction.response.send_message(
+                "I don't have permission to update your roles. Please contact an administrator.",
+                ephemeral=True
+            )
+            return
+        finally:
+            # A resolved copy of the member would still hold the old roles
+            self.members.forget(guild.id, member.id)
+        
+        # Track expiry for panels with a duration
+        if panel.get("duration"):
+            for role_id in to_add:
+                self.temp_roles.schedule(guild.id, member.id, role_id, panel["duration"])
+            for role_id in to_remove:
+                self.temp_roles.cancel(guild.id, member.id, role_id)
+        
+        # Confirm the changes
+        lines = [f"➕ <@&{role_id}>" for role_id in to_add] + [f"➖ <@&{role_id}>" for role_id in to_remove]
+        await interaction.response.send_message(
+            "Your roles have been updated:\n" + "\n".join(lines),
+            ephemeral=True,
+            allowed_mentions=discord.AllowedMentions.none()
+        )
+    
+    @commands.command(name="temprole")
+    @commands.has_permissions(administrator=True)
+    async def temp_role_prefix(self, ctx, member: discord.Member, role: discord.Role, duration: str):
+        """Give a member a role for a limited time (Admin only)
+        
+        Usage: !temprole @member @role 7d
+        """
+        try:
+            seconds = parse_duration(duration)
+        except ValueError as e:
+            await ctx.send(f"Error: {str(e)}")
+            return
             
-            # Check if this emoji is registered for a role
-            if emoji in self.reaction_roles[message_id]:
-                role_id = self.reaction_roles[message_id][emoji]
-                guild = self.bot.get_guild(payload.guild_id)
-                
-                if not guild:
-                    return
-                
-                # Get the role and member objects
-                role = guild.get_role(role_id)
-                member = guild.get_member(payload.user_id)
-                
-                if role and member:
-                    try:
-                        await member.remove_roles(role, reason="Reaction role removal")
-                    except discord.Forbidden:
-                        print(f"Missing permissions to remove role {role.name}")
-                    except Exception as e:
-                        print(f"Error removing role: {e}")
+        expires_at = self.grant_temp_role(ctx.guild.id, member.id, role.id, seconds)
+        await ctx.send(f"Gave {role.mention} to {member.mention} until <t:{int(expires_at)}:f>.")
+    
+    @app_commands.command(name="temprole", description="Give a member a role for a limited time")
+    @app_commands.describe(
+        member="The member to give the role to",
+        role="The role to give",
+        duration="How long the member keeps the role (e.g. 30m, 12h, 7d)"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def temp_role_slash(self, interaction: discord.Interaction, member: discord.Member, role: discord.Role, duration: str):
+        """Give a member a temporary role via slash command"""
+        try:
+            seconds = parse_duration(duration)
+        except ValueError as e:
+            await interaction.response.send_message(f"Error: {str(e)}", ephemeral=True)
+            return
+            
+        expires_at = self.grant_temp_role(interaction.guild_id, member.id, role.id, seconds)
+        await interaction.response.send_message(
+            f"Gave {role.mention} to {member.mention} until <t:{int(expires_at)}:f>.",
+            ephemeral=True
+        )
+    
+    @commands.command(name="rolespanels")
+    @commands.has_permissions(administrator=True)
+    async def role_panels_prefix(self, ctx, action: str = "apply"):
+        """Create, update or diff role panels from a spec file (Admin only)
+        
+        Usage: !rolespanels [apply|diff|export]
+        Attach a JSON or YAML spec for apply and diff
+        """
+        if action not in ("apply", "diff", "export"):
+            await ctx.send("Action must be `apply`, `diff` or `export`.")
+            return
+            
+        attachment = ctx.message.attachments[0] if ctx.message.attachments else None
+        content, file = await self._run_panel_spec(ctx.guild, action, attachment)
+        if file:
+            await ctx.send(content, file=file)
+        else:
+            await ctx.send(content)
+    
+    @app_commands.command(name="rolespanels", description="Create, update or diff role panels from a spec file")
+    @app_commands.describe(
+        action="Apply the spec, only show the differences, or export the current panels",
+        spec="JSON or YAML panel spec (required for apply and diff)"
+    )
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Apply", value="apply"),
+        app_commands.Choice(name="Diff", value="diff"),
+        app_commands.Choice(name="Export", value="export")
+    ])
+    @app_commands.default_permissions(administrator=True)
+    async def role_panels_slash(
+        self,
+        interaction: discord.Interaction,
+        action: str = "apply",
+        spec: Optional[discord.Attachment] = None
+    ):
+        """Manage role panels from a spec file via slash command"""
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        content, file = await self._run_panel_spec(interaction.guild, action, spec)
+        if file:
+            await interaction.followup.send(content, file=file, ephemeral=True)
+        else:
+            await interaction.followup.send(content, ephemeral=True)
+    
+    async def _run_panel_spec(self, guild, action: str, attachment):
+        """Run a spec action and return the response text and an optional file"""
+        # Only panels in this guild's channels can be exported or matched
+        records = {
+            message_id: record for message_id, record in self.reaction_roles.items()
+            if record.get("channel_id") and guild.get_channel(record["channel_id"])
+        }
+        if action == "export":
+            file = discord.File(io.BytesIO(export_panel_spec(records).encode('utf-8')), filename="role_panels.json")
+            return f"Exported {len(records)} role panel(s).", file
+        
+        if not attachment:
+            return "Please attach a JSON or YAML panel spec.", None
+        
+        # Parse and validate the spec against the guild
+        try:
+            panels = load_panel_spec(await attachment.read(), attachment.filename)
+            for panel in panels:
+                label = panel["key"] or panel["title"]
+                if panel["message_id"] in self.reaction_roles and panel["message_id"] not in records:
+                    raise ValueError(f"{label}: message {panel['message_id']} is a panel of another server")
+                channel = guild.get_channel(panel["channel_id"])
+                if not channel:
+                    raise ValueError(f"{label}: channel {panel['channel_id']} not found")
+                for role_info in panel["roles"]:
+                    role = guild.get_role(role_info["id"])
+                    if not role:
+                        raise ValueError(f"{label}: role {role_info['id']} not found")
+                    role_info["name"] = role_info["name"] or role.name
+        except (ValueError, UnicodeDecodeError) as e:
+            return f"Invalid spec: {str(e)}", None
+        except Exception as e:
+            return f"Error reading spec: {str(e)}", None
+        
+        # Match spec entries to existing panels by message ID or key
+        keys = {record["key"]: message_id for message_id, record in records.items() if record.get("key")}
+        plans = []
+        for panel in panels:
+            message_id = panel["message_id"] if panel["message_id"] in records else keys.get(panel["key"])
+            record = records.get(message_id)
+            plans.append((message_id, record, panel, diff_panel(record, panel)))
+        
+        if action == "diff":
+            lines = [
+                f"• `{panel['key'] or panel['title']}`: " + (", ".join(changes) if changes else "unchanged")
+                for message_id, record, panel, changes in plans
+            ]
+            return self._truncate("**Spec differences**\n" + "\n".join(lines)), None
+        
+        # Apply all changed panels concurrently within the request limit
+        before = set(self.reaction_roles)
+        semaphore = asyncio.Semaphore(SPEC_CONCURRENCY)
+        results = await asyncio.gather(
+            *(self._apply_panel(guild, message_id, record, panel, semaphore)
+              for message_id, record, panel, changes in plans if changes),
+            return_exceptions=True
+        )
+        # Save edited panels and the ones that were reposted or removed
+        self._save_reaction_roles(
+            *{message_id for message_id, record, panel, changes in plans if message_id and changes},
+            *(before ^ set(self.reaction_roles))
+        )
+        
+        lines = []
+        results = iter(results)
+        for message_id, record, panel, changes in plans:
+            label = panel['key'] or panel['title']
+            if not changes:
+                lines.append(f"✔️ `{label}` unchanged")
+                continue
+            result = next(results)
+            if isinstance(result, Exception):
+                lines.append(f"❌ `{label}`: {result}")
+            else:
+                lines.append(f"{'➕' if record is None else '✏️'} `{label}` {result}")
+        return self._truncate("**Role panels applied**\n" + "\n".join(lines)), None
+    
+    async def _apply_panel(self, guild, message_id, record, panel, semaphore):
+        """Create or edit one panel from its spec, reposting only when it moved channel"""
+        channel = guild.get_channel(panel["channel_id"])
+        embed = self._build_panel_embed(panel["title"], panel["description"], panel["roles"], panel["mode"])
+        view = self._build_panel_view(guild.id, panel["roles"]) if panel["mode"] == "select" else None
+        
+        async def limited(coro):
+            async with semaphore:
+                return await coro
+        
+        # Messages can't move between channels, so remove the old panel
+        if record and record["channel_id"] != panel["channel_id"]:
+            old_channel = guild.get_channel(record["channel_id"])
+            if old_channel:
+                try:
+                    await limited(old_channel.get_partial_message(message_id).delete())
+                except discord.NotFound:
+                    pass
+            self.reaction_roles.pop(message_id, None)
+            record = None
+        
+        # Edit the existing panel in place
+        message = None
+        old_emojis = set()
+        if record:
+            message = channel.get_partial_message(message_id)
+            try:
+                await limited(message.edit(embed=embed, view=view))
+                if record.get("mode", "reactions") == "reactions":
+                    old_emojis = set(record["roles"])
+            except discord.NotFound:
+                # The panel was deleted, post it again
+                self.reaction_roles.pop(message_id, None)
+                message = None
+        
+        if message is None:
+            message = await limited(channel.send(embed=embed, view=view))
+            action = f"created in {channel.mention}"
+        else:
+            action = "updated"
+        
+        # Sync the bot's reactions in parallel
+        new_emojis = [role_info["emoji"] for role_info in panel["roles"]] if panel["mode"] == "reactions" else []
+        await asyncio.gather(
+            *(limited(message.add_reaction(emoji)) for emoji in new_emojis if emoji not in old_emojis),
+            *(limited(message.clear_reaction(emoji)) for emoji in old_emojis - set(new_emojis))
+        )
+        
+        self.reaction_roles[message.id] = self._panel_record(
+            channel.id, panel["title"], panel["description"], panel["roles"],
+            panel["mode"], panel["duration"], key=panel["key"]
+        )
+        return action
+    
+    def _truncate(self, text: str, limit: int = 2000) -> str:
+        """Keep a response within Discord's message length"""
+        return text if len(text) <= limit else text[:limit - 3] + "..."
     
     @commands.command(name="rolespanel")
     @commands.has_permissions(administrator=True)
-    async def roles_panel_prefix(self, ctx):
-        """Create a role reaction panel (prefix command)
+    async def roles_panel_prefix(self, ctx, mode: str = "reactions", duration: str = None):
+        """Create a role panel (prefix command)
         
-        Usage: !rolespanel
+        Usage: !rolespanel [reactions|select] [duration]
         Then follow the interactive setup instructions
         """
-        await self._interactive_panel_setup(ctx)
+        if mode not in ("reactions", "select"):
+            await ctx.send("Mode must be `reactions` or `select`.")
+            return
+        
+        try:
+            seconds = parse_duration(duration) if duration else None
+        except ValueError as e:
+            await ctx.send(f"Error: {str(e)}")
+            return
+        
+        await self._interactive_panel_setup(ctx, mode, seconds)
     
-    @app_commands.command(name="rolespanel", description="Create a role reaction panel")
+    @app_commands.command(name="rolespanel", description="Create a role panel")
+    @app_commands.describe(
+        mode="Use emoji reactions or a select menu to pick roles",
+        duration="Make the roles temporary (e.g. 7d)"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="Reactions", value="reactions"),
+        app_commands.Choice(name="Select menu", value="select")
+    ])
     @app_commands.default_permissions(administrator=True)
-    async def roles_panel_slash(self, interaction: discord.Interaction):
-        """Create a role reaction panel (slash command)"""
+    async def roles_panel_slash(self, interaction: discord.Interaction, mode: str = "reactions", duration: str = None):
+        """Create a role panel (slash command)"""
+        try:
+            seconds = parse_duration(duration) if duration else None
+        except ValueError as e:
+            await interaction.response.send_message(f"Error: {str(e)}", ephemeral=True)
+            return
+        
         await interaction.response.send_message("Starting role panel setup. Please answer the following questions:", ephemeral=True)
-        await self._interactive_panel_setup(interaction)
+        await self._interactive_panel_setup(interaction, mode, seconds)
     
-    async def _interactive_panel_setup(self, ctx_or_interaction):
-        """Interactive setup for role reaction panel"""
+    async def _interactive_panel_setup(self, ctx_or_interaction, mode: str = "reactions", duration: Optional[int] = None):
+        """Interactive setup for role panels"""
         is_interaction = isinstance(ctx_or_interaction, discord.Interaction)
         channel = ctx_or_interaction.channel
         user = ctx_or_interaction.user
@@ -189,6 +722,13 @@ class RoleReactionPanel(commands.Cog):
             
             if entry.lower() == 'done':
                 break
+            
+            if mode == "select" and len(roles_data) >= MAX_SELECT_OPTIONS:
+                if is_interaction:
+                    await ctx_or_interaction.followup.send(f"A select menu holds at most {MAX_SELECT_OPTIONS} roles. Type `done` to finish.", ephemeral=True)
+                else:
+                    await channel.send(f"A select menu holds at most {MAX_SELECT_OPTIONS} roles. Type `done` to finish.")
+                continue
                 
             # Parse the entry: ROLE_ID EMOJI ROLE_NAME
             parts = entry.split(' ', 2)
@@ -242,21 +782,7 @@ class RoleReactionPanel(commands.Cog):
             return
             
         # 4. Create the panel embed
-        embed = discord.Embed(
-            title=title,
-            description=description,
-            color=discord.Color.blue()
-        )
-        
-        # Add each role to the embed
-        for role_info in roles_data:
-            embed.add_field(
-                name=f"{role_info['emoji']} {role_info['name']}", 
-                value=f"React with {role_info['emoji']} to get this role", 
-                inline=False
-            )
-            
-        embed.set_footer(text="React to get or remove a role")
+        embed = self._build_panel_embed(title, description, roles_data, mode)
         
         # 5. Ask for target channel
         if is_interaction:
@@ -297,18 +823,25 @@ class RoleReactionPanel(commands.Cog):
                 await channel.send("Invalid channel. Setup cancelled.")
             return
         
-        # 6. Send the panel message
-        panel_message = await target_channel.send(embed=embed)
-        
-        # 7. Add reactions
-        role_emoji_mapping = {}
-        for role_info in roles_data:
-            await panel_message.add_reaction(role_info['emoji'])
-            role_emoji_mapping[role_info['emoji']] = role_info['id']
+        if mode == "select":
+            # 6. Send the panel message with a persistent select menu
+            panel_message = await target_channel.send(
+                embed=embed,
+                view=self._build_panel_view(ctx_or_interaction.guild.id, roles_data)
+            )
+        else:
+            # 6. Send the panel message
+            panel_message = await target_channel.send(embed=embed)
+            
+            # 7. Add reactions
+            for role_info in roles_data:
+                await panel_message.add_reaction(role_info['emoji'])
         
-        # 8. Save reaction roles configuration
-        self.reaction_roles[panel_message.id] = role_emoji_mapping
-        self._save_reaction_roles()
+        # 8. Save role panel configuration
+        self.reaction_roles[panel_message.id] = self._panel_record(
+            target_channel.id, title, description, roles_data, mode, duration
+        )
+        self._save_reaction_roles(panel_message.id)
         
         # 9. Confirm completion
         if is_interaction:
@@ -1,13 +1,47 @@
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 from utils.embed_builder import create_shop_embed
-from utils.ticket_system import ItemView  # Updated import path
+from utils.ticket_system import ItemView, handle_shop_buy, handle_shop_info  # Updated import path
+from utils.interaction_router import router
+from utils.lazy_stores import LazyStores
+from utils.shop_analytics import ShopAnalytics, SHOP_ANALYTICS_FILE, WINDOWS
+from utils.store import worker_file
 from typing import List, Optional
 
-class Shop(commands.Cog):
+class Shop(LazyStores, commands.Cog):
+    STORES = ("analytics",)
+    
     def __init__(self, bot):
         self.bot = bot
+        self.flush_analytics.start()
+    
+    def load_stores(self):
+        """Load analytics buckets from disk (blocking, run in a thread at startup)"""
+        self.analytics = ShopAnalytics(worker_file(SHOP_ANALYTICS_FILE))
+        
+    async def cog_load(self):
+        """Route the shop item buttons to their handlers"""
+        router.register("shop_buy", handle_shop_buy)
+        router.register("shop_info", handle_shop_info)
+        
+    def cog_unload(self):
+        """Stop the flush loop and write any pending analytics"""
+        router.unregister("shop_buy")
+        router.unregister("shop_info")
+        self.flush_analytics.cancel()
+        if self.stores_loaded():
+            self.analytics.flush()
+    
+    @tasks.loop(minutes=5)
+    async def flush_analytics(self):
+        """Periodically persist the analytics buckets"""
+        if self.stores_loaded():
+            self.analytics.flush()
+    
+    @flush_analytics.before_loop
+    async def before_flush_analytics(self):
+        await self.bot.wait_until_ready()
         
     # Category choices for slash command
     CATEGORIES = [
@@ -63,7 +97,7 @@ class Shop(commands.Cog):
         )
         
         # Add interactive view with item title and seller ID
-        view = ItemView(item_title=title, seller_id=ctx.author.id, price=price)
+        view = ItemView(item_title=title, seller_id=ctx.author.id, price=price, guild_id=ctx.guild.id)
         await ctx.send(embed=embed, view=view)
 
     # Updated slash command with direct image upload support
@@ -119,9 +153,80 @@ class Shop(commands.Cog):
         )
         
         # Add interactive view with item title and seller ID
-        # Use a new instance with specific timeout for each message
-        view = ItemView(timeout=None, item_title=title, seller_id=interaction.user.id, price=price)
+        view = ItemView(item_title=title, seller_id=interaction.user.id, price=price, guild_id=interaction.guild_id)
         await interaction.response.send_message(embed=embed, view=view)
 
+    def _build_stats_embed(self, guild, window: str, member: Optional[discord.Member] = None):
+        """Build the shop statistics embed from the rolling aggregates"""
+        embed = discord.Embed(
+            title=f"📊 Shop Statistics ({window})",
+            color=discord.Color.gold()
+        )
+        
+        # Seller summary when a member is given
+        if member:
+            totals = self.analytics.seller_stats(guild.id, window).get(str(member.id))
+            if not totals:
+                embed.description = f"No shop activity for {member.mention} in the last {window}."
+                return embed
+            embed.description = (
+                f"**Seller:** {member.mention}\n"
+                f"**Views:** {int(totals['views'])} • **Purchase attempts:** {int(totals['attempts'])}\n"
+                f"**Sales:** {int(totals['sales'])} • **Revenue:** {totals['revenue']:,.2f} Credits"
+            )
+            return embed
+        
+        # Otherwise list the top items
+        top_items = self.analytics.top_items(guild.id, window)
+        if not top_items:
+            embed.description = f"No shop activity in the last {window}."
+            return embed
+            
+        for title, totals in top_items:
+            conversion = (totals["sales"] / totals["attempts"] * 100) if totals["attempts"] else 0.0
+            embed.add_field(
+                name=title,
+                value=(
+                    f"👁️ {int(totals['views'])} views • 🛒 {int(totals['attempts'])} attempts\n"
+                    f"✅ {int(totals['sales'])} sales ({conversion:.0f}%) • 💰 {totals['revenue']:,.2f} Credits"
+                ),
+                inline=False
+            )
+        
+        embed.set_footer(text="Unreal Engine 5 Asset Shop • Statistics")
+        return embed
+
+    @commands.command(name="shopstats")
+    @commands.has_permissions(administrator=True)
+    async def shop_stats_prefix(self, ctx, window: str = "24h", member: discord.Member = None):
+        """Show shop sales statistics (Admin only)
+        
+        Usage: !shopstats [1h|24h|30d] [@seller]
+        """
+        if window not in WINDOWS:
+            await ctx.send(f"Window must be one of: {', '.join(WINDOWS)}")
+            return
+            
+        await ctx.send(embed=self._build_stats_embed(ctx.guild, window, member))
+
+    @app_commands.command(name="shopstats", description="Show shop sales statistics")
+    @app_commands.describe(
+        window="Time window to aggregate over",
+        seller="Only show statistics for this seller"
+    )
+    @app_commands.choices(window=[
+        app_commands.Choice(name=name, value=name) for name in WINDOWS
+    ])
+    @app_commands.default_permissions(administrator=True)
+    async def shop_stats_slash(
+        self,
+        interaction: discord.Interaction,
+        window: str = "24h",
+        seller: Optional[discord.Member] = None
+    ):
+        """Show shop sales statistics via slash command"""
+        embed = self._build_stats_embed(interaction.guild, window, seller)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 async def setup(bot):
     await bot.add_cog(Shop(bot))
\ No newline at end of file
@@ -1,11 +1,21 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from utils.ticket_system import CreateTicketView
+from utils.ticket_system import CreateTicketView, handle_ticket_create, handle_ticket_close
+from utils.interaction_router import router
 
 class TicketSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        
+    async def cog_load(self):
+        """Route the ticket buttons to their handlers"""
+        router.register("ticket_create", handle_ticket_create)
+        router.register("ticket_close", handle_ticket_close)
+        
+    async def cog_unload(self):
+        router.unregister("ticket_create")
+        router.unregister("ticket_close")
 
     @commands.command(name="setticket")
     @commands.has_permissions(administrator=True)
@@ -72,7 +82,7 @@ class TicketSystem(commands.Cog):
         embed.set_footer(text=f"Ticket System • Created by {user.name}")
         
         # Create button view
-        view = CreateTicketView()
+        view = CreateTicketView(channel.guild.id if hasattr(channel, 'guild') else None)
         
         # Send the panel
         await channel.send(embed=embed, view=view)
@@ -1,39 +1,224 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import os
+from collections import deque
+import asyncio
+import io
+import time
+from utils.lazy_stores import LazyStores
+from utils.metrics import instrument
+from utils.store import log_store_error, open_store
+from utils.welcome_template import WelcomeTemplate, DEFAULT_WELCOME_MESSAGE
+from utils.welcome_card import WelcomeCardRenderer
 
 # File to store welcome message settings
 WELCOME_CONFIG_FILE = 'welcome_config.json'
 
-class WelcomeSystem(commands.Cog):
+# Default join burst settings, can be overridden per guild
+DEFAULT_BURST_THRESHOLD = 10  # Joins within the window that switch to batched welcomes (0 disables)
+DEFAULT_BURST_WINDOW = 10  # Seconds
+DEFAULT_BURST_MAX_MENTIONS = 20  # Members mentioned in one batched welcome
+MAX_BURST_MENTIONS = 50
+# Characters of mentions in a batched welcome, message content is limited to 2000
+MAX_MENTIONS_LENGTH = 1900
+
+class WelcomeSystem(LazyStores, commands.Cog):
+    STORES = ("welcome_config",)
+    
     def __init__(self, bot):
         self.bot = bot
+        self.member_counts = {}  # guild_id -> number of non-bot members
+        self.join_times = {}  # guild_id -> timestamps of recent joins
+        self.join_buffers = {}  # guild_id -> [(member, member number)] waiting for a batched welcome
+        self.flush_tasks = {}  # guild_id -> task sending the batched welcome
+        self.templates = {}  # guild_id -> compiled welcome message
+        self.rules_channels = {}  # guild_id -> rules channel ID, or None if the guild has none
+        self.cards = WelcomeCardRenderer()
+    
+    def load_stores(self):
+        """Load welcome configuration from disk (blocking, run in a thread at startup)"""
+        self.config_store = open_store(WELCOME_CONFIG_FILE)
         self.welcome_config = self._load_config()
     
+    def cog_unload(self):
+        """Stop the welcome card render pool"""
+        self.cards.close()
+    
     def _load_config(self):
-        """Load welcome configuration from file"""
-        if os.path.exists(WELCOME_CONFIG_FILE):
-            try:
-                with open(WELCOME_CONFIG_FILE, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading welcome config: {e}")
-                return {}
-        return {}
-    
-    def _save_config(self):
-        """Save welcome configuration to file"""
-        try:
-            with open(WELCOME_CONFIG_FILE, 'w') as f:
-                json.dump(self.welcome_config, f, indent=4)
-        except Exception as e:
-            print(f"Error saving welcome config: {e}")
+        """Load welcome configuration from the shared store"""
+        return dict(self.config_store.items())
+    
+    def _save_config(self, guild_id):
+        """Save the welcome configuration of a guild"""
+        # Recompile welcome messages after any config change
+        self.templates.clear()
+        guild_id = str(guild_id)
+        self.config_store.aset(guild_id, self.welcome_config[guild_id]).add_done_callback(log_store_error)
+    
+    def _template(self, guild_id, guild_config):
+        """Get the compiled welcome message of a guild"""
+        template = self.templates.get(guild_id)
+        if template is None:
+            template = self.templates[guild_id] = WelcomeTemplate(guild_config.get("message", DEFAULT_WELCOME_MESSAGE))
+        return template
+    
+    def _rules_channel(self, guild):
+        """Get the rules channel of a guild, resolved once and cached by ID"""
+        if guild.id not in self.rules_channels:
+            rules_channel = discord.utils.get(guild.channels, name="rules")
+            self.rules_channels[guild.id] = rules_channel.id if rules_channel else None
+        
+        channel_id = self.rules_channels[guild.id]
+        return guild.get_channel(channel_id) if channel_id else None
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        """Resolve the rules channel again when channels change"""
+        self.rules_channels.pop(channel.guild.id, None)
     
     @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        """Resolve the rules channel again when channels change"""
+        self.rules_channels.pop(channel.guild.id, None)
+    
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        """Resolve the rules channel again when a channel is renamed"""
+        if before.name != after.name:
+            self.rules_channels.pop(after.guild.id, None)
+    
+    def _count_members(self, guild):
+        """Count the non-bot members of a guild once"""
+        if guild.chunked:
+            self.member_counts[guild.id] = sum(1 for m in guild.members if not m.bot)
+        else:
+            # Members are not all cached, so start from the count Discord sent without the bots
+            # that are cached. Uncached bots are still counted, the numbering is approximate
+            bots = sum(1 for m in guild.members if m.bot)
+            self.member_counts[guild.id] = max((guild.member_count or 0) - bots, 0)
+    
+    def _member_count(self, guild):
+        """Get the tracked non-bot member count, counting the guild if it is unknown"""
+        if guild.id not in self.member_counts:
+            self._count_members(guild)
+        return self.member_counts[guild.id]
+    
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        """Initialize the member counter when a guild becomes available"""
+        self._count_members(guild)
+    
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        """Initialize the member counter when the bot joins a guild"""
+        self._count_members(guild)
+    
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        """Forget the member counter of a guild the bot left"""
+        self.member_counts.pop(guild.id, None)
+    
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload):
+        """Keep the member counter current when a member leaves
+        
+        The raw event also fires for members that aren't cached under the lighter cache profiles.
+        """
+        if not payload.user.bot and payload.guild_id in self.member_counts:
+            self.member_counts[payload.guild_id] -= 1
+    
+    @commands.Cog.listener()
+    @instrument("listener")
     async def on_member_join(self, member):
         """Send welcome message when a new member joins"""
+        # Keep the member counter current
+        if not member.bot and member.guild.id in self.member_counts:
+            self.member_counts[member.guild.id] += 1
+        
+        guild_config = self.welcome_config.get(str(member.guild.id))
+        if not guild_config or "channel_id" not in guild_config:
+            return
+        
+        # Buffer joins while the guild is in a join burst
+        if self._is_burst(member.guild.id, guild_config):
+            self.join_buffers.setdefault(member.guild.id, []).append((member, self._member_count(member.guild)))
+            if member.guild.id not in self.flush_tasks:
+                task = self.flush_tasks[member.guild.id] = asyncio.create_task(
+                    self._flush_joins_later(member.guild, guild_config.get("burst_window", DEFAULT_BURST_WINDOW))
+                )
+                task.add_done_callback(self._log_flush_error)
+            return
+        
+        await self._send_welcome(member)
+    
+    def _is_burst(self, guild_id, guild_config):
+        """Record a join and check whether the join rate is above the burst threshold"""
+        threshold = guild_config.get("burst_threshold", DEFAULT_BURST_THRESHOLD)
+        window = guild_config.get("burst_window", DEFAULT_BURST_WINDOW)
+        
+        now = time.monotonic()
+        times = self.join_times.setdefault(guild_id, deque())
+        times.append(now)
+        while times and times[0] <= now - window:
+            times.popleft()
+        
+        # Keep batching until the pending batch is sent
+        if guild_id in self.flush_tasks:
+            return True
+        return threshold > 0 and len(times) > threshold
+    
+    def _log_flush_error(self, task):
+        """Report batched welcomes that failed, nothing else awaits the flush task"""
+        if not task.cancelled() and task.exception():
+            print(f"Error sending batched welcome: {task.exception()}")
+    
+    async def _flush_joins_later(self, guild, window):
+        """Send one combined welcome for every join buffered during the window"""
+        try:
+            await asyncio.sleep(window)
+        finally:
+            self.flush_tasks.pop(guild.id, None)
+        
+        joins = self.join_buffers.pop(guild.id, [])
+        if joins:
+            await self._send_batch_welcome(guild, joins)
+    
+    async def _send_batch_welcome(self, guild, joins):
+        """Send a combined welcome message mentioning up to the configured number of members"""
+        guild_config = self.welcome_config.get(str(guild.id), {})
+        channel = guild.get_channel(int(guild_config.get("channel_id", 0)))
+        if not channel:
+            return
+        
+        # Configurations saved before the limit was enforced may hold larger values
+        max_mentions = min(guild_config.get("burst_max_mentions", DEFAULT_BURST_MAX_MENTIONS), MAX_BURST_MENTIONS)
+        mentioned = []
+        length = 0
+        for member, _ in joins[:max_mentions]:
+            length += len(member.mention) + 1
+            if length > MAX_MENTIONS_LENGTH:
+                break
+            mentioned.append(member.mention)
+        mentions = " ".join(mentioned)
+        if len(joins) > len(mentioned):
+            mentions += f" and {len(joins) - len(mentioned)} more"
+        
+        embed = discord.Embed(
+            title=f"Welcome to {guild.name}!",
+            description=f"Please welcome our {len(joins)} newest members: {mentions}",
+            color=discord.Color.green()
+        )
+        
+        if guild.icon:
+            embed.set_thumbnail(url=guild.icon.url)
+        
+        numbers = [number for _, number in joins]
+        embed.set_footer(text=f"Members #{min(numbers)}–#{max(numbers)}")
+        
+        await channel.send(content=mentions, embed=embed)
+    
+    async def _send_welcome(self, member):
+        """Send the welcome message for a member"""
         guild_id = str(member.guild.id)
         
         # Check if welcome messages are enabled for this guild
@@ -52,10 +237,19 @@ class WelcomeSystem(commands.Cog):
         if not channel:
             return
             
+        member_count = self._member_count(member.guild)
+        rules_channel = self._rules_channel(member.guild)
+        
         # Create welcome embed
         embed = discord.Embed(
             title=f"Welcome to {member.guild.name}!",
-            description=guild_config.get("message", f"Welcome {member.mention} to our server! We're glad to have you here."),
+            description=self._template(member.guild.id, guild_config).render(
+                user=member.mention,
+                user_name=member.display_name,
+                guild=member.guild.name,
+                member_count=str(member_count),
+                rules=rules_channel.mention if rules_channel else "#rules"
+            ),
             color=discord.Color.green()
         )
         
@@ -67,7 +261,6 @@ class WelcomeSystem(commands.Cog):
         embed.set_author(name=member.name, icon_url=member.display_avatar.url)
         
         # Add footer with join position
-        member_count = len([m for m in member.guild.members if not m.bot])
         embed.set_footer(text=f"Member #{member_count} • Joined {member.joined_at.strftime('%Y-%m-%d')}")
         
         # Add info fields if configured
@@ -80,7 +273,6 @@ class WelcomeSystem(commands.Cog):
                 )
         
         # Add rules field
-        rules_channel = discord.utils.get(member.guild.channels, name="rules")
         if rules_channel:
             embed.add_field(
                 name="📜 Server Rules",
@@ -88,8 +280,22 @@ class WelcomeSystem(commands.Cog):
                 inline=False
             )
             
+        # Attach a rendered welcome card, the text embed is used on its own if rendering fails
+        card = None
+        if guild_config.get("card_enabled"):
+            card = await self.cards.render(
+                member,
+                guild_config.get("card_background"),
+                f"Welcome, {member.display_name}!",
+                f"Member #{member_count} of {member.guild.name}"
+            )
+        
         # Send welcome message
-        await channel.send(content=member.mention, embed=embed)
+        if card:
+            embed.set_image(url="attachment://welcome.png")
+            await channel.send(content=member.mention, embed=embed, file=discord.File(io.BytesIO(card), filename="welcome.png"))
+        else:
+            await channel.send(content=member.mention, embed=embed)
     
     @commands.command(name="setwelcome")
     @commands.has_permissions(administrator=True)
@@ -105,14 +311,14 @@ class WelcomeSystem(commands.Cog):
             self.welcome_config[guild_id] = {}
             
         self.welcome_config[guild_id]["channel_id"] = channel.id
-        self._save_config()
+        self._save_config(guild_id)
         
         await ctx.send(f"Welcome channel set to {channel.mention}!")
     
     @app_commands.command(name="setwelcome", description="Set the welcome channel and message")
     @app_commands.describe(
         channel="The channel to send welcome messages to",
-        message="Custom welcome message (use {user} to mention the new member)"
+        message="Custom welcome message (placeholders: {user}, {user_name}, {guild}, {member_count}, {rules})"
     )
     @app_commands.default_permissions(administrator=True)
     async def set_welcome_slash(
@@ -134,11 +340,9 @@ class WelcomeSystem(commands.Cog):
         self.welcome_config[guild_id]["channel_id"] = channel.id
         
         if message:
-            # Replace {user} with mention placeholder
-            message = message.replace("{user}", "{}")
             self.welcome_config[guild_id]["message"] = message
             
-        self._save_config()
+        self._save_config(guild_id)
         
         await interaction.response.send_message(
             f"Welcome channel set to {channel.mention}!" + 
@@ -146,12 +350,106 @@ class WelcomeSystem(commands.Cog):
             ephemeral=True
         )
         
+    def _set_burst_config(self, guild_id, threshold, window, max_mentions):
+        """Store the join burst settings for a guild"""
+        guild_config = self.welcome_config.setdefault(str(guild_id), {})
+        guild_config["burst_threshold"] = threshold
+        guild_config["burst_window"] = window
+        guild_config["burst_max_mentions"] = max_mentions
+        self._save_config(guild_id)
+    
+    @commands.command(name="welcomeburst")
+    @commands.has_permissions(administrator=True)
+    async def welcome_burst_prefix(
+        self,
+        ctx,
+        threshold: int = DEFAULT_BURST_THRESHOLD,
+        window: int = DEFAULT_BURST_WINDOW,
+        max_mentions: int = DEFAULT_BURST_MAX_MENTIONS
+    ):
+        """Configure batched welcomes during join bursts
+        
+        Usage: !welcomeburst [threshold] [window_seconds] [max_mentions]
+        A threshold of 0 disables batching
+        """
+        if not 0 <= threshold <= 1000 or not 1 <= window <= 300 or not 1 <= max_mentions <= MAX_BURST_MENTIONS:
+            await ctx.send(
+                f"Threshold must be 0 to 1000, window 1 to 300 seconds and max mentions 1 to {MAX_BURST_MENTIONS}."
+            )
+            return
+            
+        self._set_burst_config(ctx.guild.id, threshold, window, max_mentions)
+        await ctx.send(
+            f"Welcomes will be batched when more than {threshold} members join within {window} seconds."
+            if threshold else "Batched welcomes disabled."
+        )
+    
+    @app_commands.command(name="welcomeburst", description="Configure batched welcomes during join bursts")
+    @app_commands.describe(
+        threshold="Joins within the window that switch to batched welcomes (0 disables)",
+        window="Length of the window in seconds",
+        max_mentions="Members mentioned in one batched welcome"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def welcome_burst_slash(
+        self,
+        interaction: discord.Interaction,
+        threshold: app_commands.Range[int, 0, 1000] = DEFAULT_BURST_THRESHOLD,
+        window: app_commands.Range[int, 1, 300] = DEFAULT_BURST_WINDOW,
+        max_mentions: app_commands.Range[int, 1, MAX_BURST_MENTIONS] = DEFAULT_BURST_MAX_MENTIONS
+    ):
+        """Configure batched welcomes via slash command"""
+        self._set_burst_config(interaction.guild_id, threshold, window, max_mentions)
+        await interaction.response.send_message(
+            f"Welcomes will be batched when more than {threshold} members join within {window} seconds."
+            if threshold else "Batched welcomes disabled.",
+            ephemeral=True
+        )
+    
+    def _set_card_config(self, guild_id, enabled, background=None):
+        """Store the welcome card settings for a guild"""
+        guild_config = self.welcome_config.setdefault(str(guild_id), {})
+        guild_config["card_enabled"] = enabled
+        if background is not None:
+            guild_config["card_background"] = background or None
+        self.cards.invalidate(guild_id)
+        self._save_config(guild_id)
+    
+    @commands.command(name="welcomecard")
+    @commands.has_permissions(administrator=True)
+    async def welcome_card_prefix(self, ctx, enabled: bool = True, background: str = None):
+        """Enable or disable rendered welcome cards
+        
+        Usage: !welcomecard [on|off] [background_image_url]
+        """
+        if enabled and not self.cards.available:
+            await ctx.send("Welcome cards require Pillow to be installed.")
+            return
+            
+        self._set_card_config(ctx.guild.id, enabled, background)
+        await ctx.send(f"Welcome cards {'enabled' if enabled else 'disabled'}.")
+    
+    @app_commands.command(name="welcomecard", description="Enable or disable rendered welcome cards")
+    @app_commands.describe(
+        enabled="Attach a welcome card image to welcome messages",
+        background="URL of a background image for the card"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def welcome_card_slash(self, interaction: discord.Interaction, enabled: bool = True, background: str = None):
+        """Configure welcome cards via slash command"""
+        if enabled and not self.cards.available:
+            await interaction.response.send_message("Welcome cards require Pillow to be installed.", ephemeral=True)
+            return
+            
+        self._set_card_config(interaction.guild_id, enabled, background)
+        await interaction.response.send_message(f"Welcome cards {'enabled' if enabled else 'disabled'}.", ephemeral=True)
+    
     @app_commands.command(name="testwelcome", description="Test the welcome message")
     @app_commands.default_permissions(administrator=True)
     async def test_welcome(self, interaction: discord.Interaction):
         """Test the welcome message"""
-        # Simulate the member join event for the command user
-        await self.on_member_join(interaction.user)
+        # Send the welcome message for the command user without counting a join
+        await self._send_welcome(interaction.user)
         await interaction.response.send_message("Test welcome message sent!", ephemeral=True)
 
 async def setup(bot):
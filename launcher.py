@@ -0,0 +1,140 @@
+import os
+import asyncio
+import multiprocessing
+import secrets
+import signal
+import time
+import aiohttp
+from dotenv import load_dotenv
+from typing import Dict, List
+
+# Load environment variables
+load_dotenv()
+TOKEN = os.getenv('DISCORD_TOKEN')
+WORKERS = int(os.getenv('WORKERS', str(os.cpu_count() or 1)))
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', '0'))  # 0 uses the count Discord recommends
+
+IDENTIFY_DELAY = 5.5  # Seconds per shard between worker starts, Discord allows one identify every 5 seconds
+MIN_RESTART_DELAY = 5
+MAX_RESTART_DELAY = 300
+STABLE_AFTER = 600  # Seconds a worker has to run before its restart delay is reset
+
+async def fetch_recommended_shards(token: str) -> int:
+    """Ask Discord how many shards the bot should use"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"}
+        ) as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+def shard_ranges(shard_count: int, workers: int) -> List[List[int]]:
+    """Split the shards into contiguous, evenly sized ranges, one per worker"""
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for worker in range(workers):
+        end = start + size + (1 if worker < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+def run_worker(cluster_id: int, shard_ids: List[int], shard_count: int, store_address: str, store_authkey: str):
+    """Entry point of a worker process, runs the bot for a range of shards"""
+    os.environ.update({
+        "CLUSTER_ID": str(cluster_id),
+        "SHARD_IDS": ",".join(str(shard) for shard in shard_ids),
+        "SHARD_COUNT": str(shard_count),
+        "STORE_ADDRESS": store_address,
+        "STORE_AUTHKEY": store_authkey,
+    })
+    # Imported here so the bot reads the variables above
+    import main
+    asyncio.run(main.main())
+
+class Launcher:
+    """Runs one worker process per shard range and restarts workers that exit"""
+
+    def __init__(self, shard_count: int, workers: int):
+        self.shard_count = shard_count
+        self.ranges = shard_ranges(shard_count, workers)
+        self.context = multiprocessing.get_context("spawn")
+        self.processes: Dict[int, multiprocessing.Process] = {}
+        self.started_at: Dict[int, float] = {}
+        self.restart_delay: Dict[int, float] = {}
+        self.restart_at: Dict[int, float] = {}
+        self.running = True
+        self.store_address = None
+        self.store_authkey = secrets.token_hex(16)
+
+    def _start(self, cluster_id: int) -> None:
+        shard_ids = self.ranges[cluster_id]
+        process = self.context.Process(
+            target=run_worker,
+            args=(cluster_id, shard_ids, self.shard_count, self.store_address, self.store_authkey),
+            name=f"lvbot-worker-{cluster_id}"
+        )
+        process.start()
+        self.processes[cluster_id] = process
+        self.started_at[cluster_id] = time.monotonic()
+        print(f"Started worker {cluster_id} (pid {process.pid}) for shards {shard_ids[0]}-{shard_ids[-1]}")
+
+    def stop(self, *args) -> None:
+        """Stop all workers"""
+        self.running = False
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+
+    def run(self) -> None:
+        # Imported here so workers don't start a coordinator of their own
+        from utils.feedback_store import FEEDBACK_STATS_FILE, rebuild_stale_stats
+        from utils.store import JsonStore, serve_stores
+
+        # Workers append to the feedback log from the start, so stale stats are rebuilt first
+        rebuild_stale_stats(JsonStore(FEEDBACK_STATS_FILE))
+        host, port = serve_stores(bytes.fromhex(self.store_authkey))
+        self.store_address = f"{host}:{port}"
+        print(f"Store coordinator listening on {self.store_address}")
+
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+        # Stagger the workers so their shards don't identify at the same time
+        for cluster_id, shard_ids in enumerate(self.ranges):
+            if not self.running:
+                break
+            self._start(cluster_id)
+            time.sleep(len(shard_ids) * IDENTIFY_DELAY)
+
+        while self.running:
+            self._check_workers()
+            time.sleep(1)
+
+        for process in self.processes.values():
+            process.join(timeout=10)
+
+    def _check_workers(self) -> None:
+        """Restart workers that exited, backing off when they keep crashing"""
+        now = time.monotonic()
+        for cluster_id, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+
+            if cluster_id not in self.restart_at:
+                uptime = now - self.started_at[cluster_id]
+                delay = self.restart_delay.get(cluster_id, MIN_RESTART_DELAY)
+                if uptime >= STABLE_AFTER:
+                    delay = MIN_RESTART_DELAY
+                self.restart_delay[cluster_id] = min(delay * 2, MAX_RESTART_DELAY)
+                self.restart_at[cluster_id] = now + delay
+                print(f"Worker {cluster_id} exited with code {process.exitcode} after {uptime:.0f}s, restarting in {delay:.0f}s")
+            elif now >= self.restart_at[cluster_id]:
+                del self.restart_at[cluster_id]
+                self._start(cluster_id)
+
+if __name__ == "__main__":
+    shard_count = SHARD_COUNT or asyncio.run(fetch_recommended_shards(TOKEN))
+    print(f"Launching {shard_count} shard(s) across {min(WORKERS, shard_count)} worker(s)")
+    Launcher(shard_count, WORKERS).run()
\ No newline at end of file
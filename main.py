@@ -1,50 +1,238 @@
+import time
+PROCESS_START = time.perf_counter()
+
 import os
 import discord
+from discord import app_commands
 from discord.ext import commands
 from dotenv import load_dotenv
 import asyncio
+from utils.cache_profile import cache_options, DEFAULT_CACHE_PROFILE
+from utils.command_sync import CommandSyncer
+from utils.event_recorder import EventRecorder
+from utils.loop_watchdog import LoopWatchdog, DEFAULT_THRESHOLD
+from utils.metrics import GATEWAY_LATENCY, HANDLER_SECONDS, MetricsServer, http_trace, registry
 from utils.persistent_views import PersistentViewHandler
+from utils.store import CLUSTER_ID, SHARD_IDS
+from utils.tracing import tracer
 
 # Load environment variables
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
 PREFIX = os.getenv('COMMAND_PREFIX', '!')
+DEV_GUILD_ID = os.getenv('DEV_GUILD_ID')  # Sync commands to this guild only while developing
+LAZY_COGS = {name.strip() for name in os.getenv('LAZY_COGS', '').split(',') if name.strip()}  # Extensions whose stores load on first use
+
+CACHE_PROFILE = os.getenv('CACHE_PROFILE', DEFAULT_CACHE_PROFILE)  # full, balanced or lean
+
+# Prometheus metrics, served on METRICS_PORT (plus the cluster ID for workers) when set
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+# Seconds the event loop may be blocked before the watchdog logs the blocking stack, 0 disables it
+LOOP_WATCHDOG_THRESHOLD = float(os.getenv('LOOP_WATCHDOG_THRESHOLD', str(DEFAULT_THRESHOLD)))
+# Record anonymized reactions, joins and interactions to recordings/ for replay
+RECORD_EVENTS = os.getenv('RECORD_EVENTS', '').lower() in ('1', 'true', 'yes')
+# Fraction of ticket and purchase flows traced to traces.jsonl
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.1'))
+
+# Sharding, SHARD_IDS and SHARD_COUNT are set per worker by launcher.py
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', '0')) or None
+SHARDED = os.getenv('SHARDED', '').lower() in ('1', 'true', 'yes') or bool(SHARD_IDS) or SHARD_COUNT is not None
 
 # Set up intents
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True  # Enable member intents for welcome messages
 
+class LVCommandTree(app_commands.CommandTree):
+    """Command tree that times slash commands for the handler histogram"""
+
+    async def interaction_check(self, interaction):
+        interaction.extras["started_at"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction, error):
+        observe_slash_command(interaction, "error")
+        await super().on_error(interaction, error)
+
+def observe_slash_command(interaction, status):
+    started_at = interaction.extras.get("started_at")
+    if started_at is None or interaction.command is None:
+        return
+    HANDLER_SECONDS.observe(
+        time.perf_counter() - started_at, kind="slash", name=interaction.command.qualified_name, status=status
+    )
+
+class LVBot(commands.AutoShardedBot if SHARDED else commands.Bot):
+    """Bot that does its startup work once in setup_hook instead of on every ready"""
+
+    def __init__(self, **kwargs):
+        super().__init__(tree_cls=LVCommandTree, http_trace=http_trace(), **kwargs)
+        self.command_syncer = CommandSyncer(self)
+        self.startup_timings = {}  # phase -> seconds
+        self.cog_timings = {}  # extension -> {"import", "init", "stores"} seconds
+        self.started = False
+        self._store_tasks = []
+        self._first_interaction = False
+        self.metrics_server = None
+        self.event_recorder = EventRecorder() if RECORD_EVENTS else None
+        tracer.sample_rate = TRACE_SAMPLE_RATE
+        self.loop_watchdog = LoopWatchdog(LOOP_WATCHDOG_THRESHOLD) if LOOP_WATCHDOG_THRESHOLD > 0 else None
+
+    async def _phase(self, name, coro):
+        """Run a startup phase and record how long it took"""
+        start = time.perf_counter()
+        await coro
+        self.startup_timings[name] = time.perf_counter() - start
+        print(f"Startup phase {name}: {self.startup_timings[name] * 1000:.0f} ms")
+
+    async def setup_hook(self):
+        """Load extensions, stores, views and commands once before connecting to the gateway"""
+        await self._phase("metrics", self.start_metrics())
+        if self.event_recorder:
+            self.event_recorder.attach(self)
+        await self._phase("extensions", self.load_extensions())
+        await self._phase("stores", self.load_stores())
+        await self._phase("views", PersistentViewHandler(self).register_views())
+        await self._phase("commands", self.sync_commands())
+        self.started = True
+        self.print_startup_report()
+
+    async def start_metrics(self):
+        """Start the event loop watchdog and serve metrics if METRICS_PORT is set"""
+        if self.loop_watchdog:
+            self.loop_watchdog.start()
+        if not METRICS_PORT:
+            return
+        registry.add_collector(self.collect_gateway_latency)
+        port = METRICS_PORT + int(CLUSTER_ID or 0)
+        try:
+            self.metrics_server = MetricsServer(METRICS_HOST, port)
+            await self.metrics_server.start()
+        except OSError as e:
+            print(f"Failed to start metrics server on port {port}: {e}")
+            self.metrics_server = None
+
+    def collect_gateway_latency(self):
+        latencies = self.latencies if SHARDED else [(0, self.latency)]
+        for shard_id, latency in latencies:
+            GATEWAY_LATENCY.set(latency, shard=shard_id)
+
+    async def close(self):
+        if self.loop_watchdog:
+            self.loop_watchdog.stop()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        if self.event_recorder:
+            self.event_recorder.close()
+        tracer.close()
+        await super().close()
+
+    async def invoke(self, ctx):
+        """Run a prefix command and record how long it took"""
+        if ctx.command is None:
+            return await super().invoke(ctx)
+        start = time.perf_counter()
+        await super().invoke(ctx)
+        HANDLER_SECONDS.observe(
+            time.perf_counter() - start, kind="prefix", name=ctx.command.qualified_name,
+            status="error" if ctx.command_failed else "ok"
+        )
+
+    async def on_app_command_completion(self, interaction, command):
+        observe_slash_command(interaction, "ok")
+
+    def print_startup_report(self):
+        print(f"Startup finished in {(time.perf_counter() - PROCESS_START) * 1000:.0f} ms since process start")
+        for extension, timings in sorted(self.cog_timings.items()):
+            if "stores" in timings:
+                stores = f"{timings['stores'] * 1000:.0f} ms"
+            else:
+                stores = "lazy" if extension in LAZY_COGS else "none"
+            print(f"  {extension}: import {timings.get('import', 0) * 1000:.0f} ms, "
+                  f"init {timings.get('init', 0) * 1000:.0f} ms, stores {stores}")
+
+    async def on_interaction(self, interaction):
+        if not self._first_interaction:
+            self._first_interaction = True
+            self.startup_timings["first_interaction"] = time.perf_counter() - PROCESS_START
+            print(f"First interaction {self.startup_timings['first_interaction']:.2f} s after process start")
+
+    async def add_cog(self, cog, **kwargs):
+        extension = cog.__module__.rsplit('.', 1)[-1]
+        timings = self.cog_timings.setdefault(extension, {})
+        start = time.perf_counter()
+        if "loading" in timings:
+            # Import of the module and construction of the cog
+            timings["import"] = start - timings.pop("loading")
+
+        await super().add_cog(cog, **kwargs)
+        timings["init"] = time.perf_counter() - start
+
+        if not hasattr(cog, "load_stores") or extension in LAZY_COGS:
+            return
+        if self.started:
+            # Cogs loaded after startup load their stores right away
+            await self._load_cog_stores(cog, timings)
+        else:
+            # Read the stores in a thread while the next extensions load. Yielding once lets the
+            # task hand the read to its thread before the next import blocks the loop
+            self._store_tasks.append(asyncio.create_task(self._load_cog_stores(cog, timings)))
+            await asyncio.sleep(0)
+
+    async def _load_cog_stores(self, cog, timings):
+        start = time.perf_counter()
+        await asyncio.to_thread(cog.load_stores)
+        timings["stores"] = time.perf_counter() - start
+        cog.on_stores_loaded()
+
+    async def _load_extension_timed(self, extension):
+        self.cog_timings.setdefault(extension, {})["loading"] = time.perf_counter()
+        await self.load_extension(f'cogs.{extension}')
+        print(f'Loaded extension: {extension}')
+
+    async def load_extensions(self):
+        """Load every cog in the cogs folder, one after another
+
+        Imports block the event loop, so loading them concurrently gains nothing. The
+        store reads run in threads meanwhile (see add_cog).
+        """
+        extensions = [filename[:-3] for filename in os.listdir('./cogs') if filename.endswith('.py')]
+        for extension in extensions:
+            await self._load_extension_timed(extension)
+
+    async def load_stores(self):
+        """Wait for the store reads started while the extensions loaded"""
+        tasks, self._store_tasks = self._store_tasks, []
+        await asyncio.gather(*tasks)
+
+    async def sync_commands(self):
+        """Sync slash commands, skipped when the command tree is unchanged"""
+        if CLUSTER_ID not in (None, "0"):
+            return  # Commands are global, the first worker syncs them for the cluster
+        try:
+            if DEV_GUILD_ID:
+                dev_guild = discord.Object(id=int(DEV_GUILD_ID))
+                self.tree.copy_global_to(guild=dev_guild)
+                await self.command_syncer.sync(dev_guild)
+            else:
+                await self.command_syncer.sync()
+        except Exception as e:
+            print(f"Failed to sync commands: {e}")
+
 # Initialize the bot with both prefix and slash command support
-bot = commands.Bot(command_prefix=PREFIX, intents=intents)
+shard_options = {"shard_ids": SHARD_IDS or None, "shard_count": SHARD_COUNT} if SHARDED else {}
+bot = LVBot(command_prefix=PREFIX, intents=intents, **cache_options(CACHE_PROFILE, intents), **shard_options)
 
 @bot.event
 async def on_ready():
+    # Runs again on every reconnect, startup work belongs in setup_hook
     print(f'{bot.user.name} has connected to Discord!')
-    print(f'Bot is in {len(bot.guilds)} guilds')
-    
-    # Register persistent views
-    view_handler = PersistentViewHandler(bot)
-    await view_handler.register_views()
-    
-    # Sync slash commands
-    try:
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} command(s)")
-    except Exception as e:
-        print(f"Failed to sync commands: {e}")
-
-# Load cogs
-async def load_extensions():
-    for filename in os.listdir('./cogs'):
-        if filename.endswith('.py'):
-            await bot.load_extension(f'cogs.{filename[:-3]}')
-            print(f'Loaded extension: {filename[:-3]}')
+    print(f'Bot is in {len(bot.guilds)} guilds' + (f' on shards {sorted(bot.shards)}' if SHARDED else ''))
 
 # Run the bot
 async def main():
     async with bot:
-        await load_extensions()
         await bot.start(TOKEN)
 
 if __name__ == "__main__":
@@ -0,0 +1,122 @@
+"""Measure the cache memory of each cache profile on a synthetic large guild
+
+Usage: python tools/memory_profile.py [members] [joins] [messages]
+
+Feeds a synthetic guild through discord.py's connection state the way the
+gateway would: the guild create, member chunks when the profile chunks at
+startup, member joins and message creates. Reports the memory still held
+afterwards per profile, measured with tracemalloc.
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from discord.state import ConnectionState
+from utils.cache_profile import CACHE_PROFILES, cache_options
+
+GUILD_ID = 1
+CHANNEL_ID = 2
+BOT_ID = 3
+
+def _user(user_id: int) -> dict:
+    return {
+        "id": str(user_id),
+        "username": f"user{user_id}",
+        "discriminator": "0",
+        "global_name": f"User {user_id}",
+        "avatar": "a" * 32,
+    }
+
+def _member(user_id: int) -> dict:
+    return {
+        "user": _user(user_id),
+        "roles": [],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+def _guild(member_count: int) -> dict:
+    return {
+        "id": str(GUILD_ID),
+        "name": "Synthetic",
+        "owner_id": str(BOT_ID),
+        "member_count": member_count,
+        "large": True,
+        "roles": [{"id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0, "color": 0,
+                   "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [{"id": str(CHANNEL_ID), "type": 0, "name": "general", "position": 0, "permission_overwrites": []}],
+        "members": [_member(BOT_ID)],
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+    }
+
+def _message(message_id: int, author_id: int) -> dict:
+    return {
+        "id": str(message_id),
+        "channel_id": str(CHANNEL_ID),
+        "guild_id": str(GUILD_ID),
+        "author": _user(author_id),
+        "member": {"roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0},
+        "content": "Is this asset compatible with UE 5.4?",
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+    }
+
+def build_state(profile: str, members: int, joins: int, messages: int) -> ConnectionState:
+    """Replay startup and some traffic for a guild into a connection state"""
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.members = True
+    options = cache_options(profile, intents)
+
+    state = ConnectionState(dispatch=lambda *args: None, handlers={}, hooks={}, http=None, intents=intents, **options)
+    state.user = discord.ClientUser(state=state, data={**_user(BOT_ID), "bot": True})
+    guild = state._add_guild_from_data(_guild(members))
+
+    # Startup chunking, cached the way discord.py caches chunk responses
+    if options["chunk_guilds_at_startup"]:
+        for user_id in range(1000, 1000 + members):
+            member = discord.Member(data=_member(user_id), guild=guild, state=state)
+            if state.member_cache_flags.joined:
+                guild._add_member(member)
+
+    for user_id in range(10_000_000, 10_000_000 + joins):
+        state.parse_guild_member_add({**_member(user_id), "guild_id": str(GUILD_ID)})
+
+    for message_id in range(messages):
+        state.parse_message_create(_message(100_000_000 + message_id, 1000 + message_id % max(members, 1)))
+
+    return state
+
+def measure(profile: str, members: int, joins: int, messages: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    state = build_state(profile, members, joins, messages)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    guild = state._get_guild(GUILD_ID)
+    print(f"{profile:>9}: {used / 1024 / 1024:8.1f} MiB  "
+          f"({len(guild._members):,} members, {len(state._messages or []):,} messages cached)")
+    return used
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    members, joins, messages = args + [100_000, 1_000, 5_000][len(args):]
+    print(f"Synthetic guild: {members:,} members, {joins:,} joins, {messages:,} messages")
+    for profile in CACHE_PROFILES:
+        measure(profile, members, joins, messages)
\ No newline at end of file
@@ -0,0 +1,33 @@
+import discord
+from typing import Any, Dict
+
+# Member and message caching policies, from most to least memory
+CACHE_PROFILES = ("full", "balanced", "lean")
+DEFAULT_CACHE_PROFILE = "full"  # The lighter profiles are opt-in, see the README for what they change
+
+def cache_options(profile: str, intents: discord.Intents) -> Dict[str, Any]:
+    """Client options for a cache profile
+
+    full: every member of every guild is chunked at startup (discord.py defaults, the default profile)
+    balanced: only members who join or speak in voice while the bot runs are cached
+    lean: only the bot's own member is cached, everything else is resolved on demand
+    """
+    if profile == "full":
+        return {
+            "member_cache_flags": discord.MemberCacheFlags.from_intents(intents),
+            "chunk_guilds_at_startup": intents.members,
+            "max_messages": 1000
+        }
+    if profile == "balanced":
+        return {
+            "member_cache_flags": discord.MemberCacheFlags.from_intents(intents),
+            "chunk_guilds_at_startup": False,
+            "max_messages": 200
+        }
+    if profile == "lean":
+        return {
+            "member_cache_flags": discord.MemberCacheFlags.none(),
+            "chunk_guilds_at_startup": False,
+            "max_messages": 50
+        }
+    raise ValueError(f"Unknown cache profile {profile!r}, expected one of: {', '.join(CACHE_PROFILES)}")
\ No newline at end of file
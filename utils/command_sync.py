@@ -0,0 +1,58 @@
+import discord
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+# Fingerprints of the last synced command trees
+COMMAND_SYNC_FILE = 'command_sync.json'
+
+def tree_fingerprint(tree: discord.app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """Hash the payload a sync would send, so identical trees give identical fingerprints"""
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda command: (command.get("type", 1), command["name"]))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+class CommandSyncer:
+    """Syncs the application command tree only when it changed since the last sync"""
+
+    def __init__(self, bot, sync_file=COMMAND_SYNC_FILE):
+        self.bot = bot
+        self.sync_file = sync_file
+        self.fingerprints = self._load_fingerprints()
+
+    def _load_fingerprints(self) -> Dict[str, str]:
+        """Load fingerprints from file"""
+        if os.path.exists(self.sync_file):
+            try:
+                with open(self.sync_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading command sync state: {e}")
+        return {}
+
+    def _save_fingerprints(self) -> None:
+        """Save fingerprints to file"""
+        try:
+            with open(self.sync_file, 'w') as f:
+                json.dump(self.fingerprints, f, indent=4)
+        except Exception as e:
+            print(f"Error saving command sync state: {e}")
+
+    def _scope(self, guild: Optional[discord.abc.Snowflake]) -> str:
+        # Fingerprints are kept per application, a different token means a different remote tree
+        return f"{self.bot.application_id}:{guild.id if guild else 'global'}"
+
+    async def sync(self, guild: Optional[discord.abc.Snowflake] = None, force: bool = False) -> Optional[List[discord.app_commands.AppCommand]]:
+        """Sync global or guild commands, returns None when the tree is unchanged"""
+        scope = self._scope(guild)
+        fingerprint = tree_fingerprint(self.bot.tree, guild)
+        if not force and self.fingerprints.get(scope) == fingerprint:
+            print(f"Commands unchanged for {scope}, skipping sync")
+            return None
+
+        synced = await self.bot.tree.sync(guild=guild)
+        self.fingerprints[scope] = fingerprint
+        self._save_fingerprints()
+        print(f"Synced {len(synced)} command(s) for {scope}")
+        return synced
\ No newline at end of file
@@ -1,70 +1,68 @@
+import datetime
 import json
-import os
 from typing import Dict, Optional, Union
+from utils.store import open_store
+
+# Append-only ledger of every balance change
+TRANSACTIONS_FILE = 'transactions.jsonl'
 
 class CurrencyManager:
     """Manages user currency balances and transactions"""
     
-    def __init__(self, currency_file='user_balances.json'):
+    def __init__(self, currency_file='user_balances.json', transactions_file=TRANSACTIONS_FILE):
         self.currency_file = currency_file
-        self.balances = self._load_balances()
-        
-    def _load_balances(self) -> Dict[str, float]:
-        """Load user balances from file"""
-        if os.path.exists(self.currency_file):
-            try:
-                with open(self.currency_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading balances: {e}")
-                return {}
-        return {}
+        self.transactions_file = transactions_file
+        # Balances are shared by all workers, changes go through atomic increments
+        self.balances = open_store(currency_file)
     
-    def _save_balances(self) -> None:
-        """Save user balances to file"""
+    def _record_transaction(self, user_id: str, amount: float, balance: float, reason: str, counterparty_id=None, guild_id=None) -> None:
+        """Append a balance change to the transaction ledger"""
+        entry = {
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "guild_id": str(guild_id) if guild_id else None,
+            "user_id": str(user_id),
+            "amount": amount,
+            "balance": balance,
+            "reason": reason,
+            "counterparty_id": str(counterparty_id) if counterparty_id else None
+        }
         try:
-            with open(self.currency_file, 'w') as f:
-                json.dump(self.balances, f, indent=4)
+            with open(self.transactions_file, 'a') as f:
+                f.write(json.dumps(entry) + "\n")
         except Exception as e:
-            print(f"Error saving balances: {e}")
+            print(f"Error saving transaction: {e}")
     
-    def get_balance(self, user_id: str) -> float:
+    async def get_balance(self, user_id: str) -> float:
         """Get a user's current balance"""
-        return float(self.balances.get(str(user_id), 0))
+        return float(await self.balances.aget(str(user_id), 0))
     
-    def add_balance(self, user_id: str, amount: float) -> float:
+    async def add_balance(self, user_id: str, amount: float, reason: str = "adjustment", counterparty_id=None, guild_id=None) -> float:
         """Add to a user's balance"""
         if amount <= 0:
             raise ValueError("Amount must be positive")
             
         user_id = str(user_id)
-        current = self.get_balance(user_id)
-        new_balance = current + amount
-        self.balances[user_id] = new_balance
-        self._save_balances()
+        new_balance = await self.balances.aincr(user_id, amount)
+        self._record_transaction(user_id, amount, new_balance, reason, counterparty_id, guild_id)
         return new_balance
     
-    def remove_balance(self, user_id: str, amount: float) -> float:
+    async def remove_balance(self, user_id: str, amount: float, reason: str = "adjustment", counterparty_id=None, guild_id=None) -> float:
         """Remove from a user's balance"""
         if amount <= 0:
             raise ValueError("Amount must be positive")
             
         user_id = str(user_id)
-        current = self.get_balance(user_id)
         
-        if current < amount:
-            raise ValueError("Insufficient balance")
-            
-        new_balance = current - amount
-        self.balances[user_id] = new_balance
-        self._save_balances()
+        # Fails with "Insufficient balance" instead of going negative
+        new_balance = await self.balances.aincr(user_id, -amount, minimum=0)
+        self._record_transaction(user_id, -amount, new_balance, reason, counterparty_id, guild_id)
         return new_balance
     
-    def has_sufficient_balance(self, user_id: str, amount: float) -> bool:
+    async def has_sufficient_balance(self, user_id: str, amount: float) -> bool:
         """Check if user has sufficient balance for a transaction"""
-        return self.get_balance(user_id) >= amount
+        return await self.get_balance(user_id) >= amount
     
-    def transfer(self, from_user_id: str, to_user_id: str, amount: float) -> Dict[str, float]:
+    async def transfer(self, from_user_id: str, to_user_id: str, amount: float, reason: str = "transfer", guild_id=None) -> Dict[str, float]:
         """Transfer currency from one user to another"""
         if amount <= 0:
             raise ValueError("Transfer amount must be positive")
@@ -72,34 +70,34 @@ class CurrencyManager:
         from_user_id, to_user_id = str(from_user_id), str(to_user_id)
         
         # Check if sender has sufficient funds
-        if not self.has_sufficient_balance(from_user_id, amount):
+        if not await self.has_sufficient_balance(from_user_id, amount):
             raise ValueError("Insufficient balance for transfer")
         
         # Remove from sender
-        from_balance = self.remove_balance(from_user_id, amount)
+        from_balance = await self.remove_balance(from_user_id, amount, reason, to_user_id, guild_id)
         
         # Add to receiver
-        to_balance = self.add_balance(to_user_id, amount)
+        to_balance = await self.add_balance(to_user_id, amount, reason, from_user_id, guild_id)
         
         return {
             "from_balance": from_balance,
             "to_balance": to_balance
         }
     
-    def process_purchase(self, user_id: str, seller_id: str, amount: float) -> Dict[str, Union[bool, float, str]]:
+    async def process_purchase(self, user_id: str, seller_id: str, amount: float, guild_id=None) -> Dict[str, Union[bool, float, str]]:
         """Process a purchase transaction"""
         user_id, seller_id = str(user_id), str(seller_id)
         
         try:
-            if not self.has_sufficient_balance(user_id, amount):
+            if not await self.has_sufficient_balance(user_id, amount):
                 return {
                     "success": False,
                     "error": "Insufficient balance",
-                    "user_balance": self.get_balance(user_id)
+                    "user_balance": await self.get_balance(user_id)
                 }
             
             # Transfer funds from buyer to seller
-            balances = self.transfer(user_id, seller_id, amount)
+            balances = await self.transfer(user_id, seller_id, amount, reason="purchase", guild_id=guild_id)
             
             return {
                 "success": True,
@@ -112,5 +110,5 @@ class CurrencyManager:
             return {
                 "success": False,
                 "error": str(e),
-                "user_balance": self.get_balance(user_id)
+                "user_balance": await self.get_balance(user_id)
             }
\ No newline at end of file
@@ -0,0 +1,187 @@
+import asyncio
+import datetime
+import gzip
+import json
+import os
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional
+import discord
+from utils.interaction_router import parse_custom_id
+from utils.store import CLUSTER_ID, worker_file
+
+# Directory for event recordings, one file per process start
+RECORDINGS_DIR = 'recordings'
+RECORDING_VERSION = 1
+
+# Seconds between writes of the buffered events
+FLUSH_INTERVAL = 5
+# Buffered events that trigger a write before the interval is over
+FLUSH_EVENTS = 1000
+
+class Anonymizer:
+    """Replaces Discord IDs with small numbers that are only stable within one recording"""
+
+    def __init__(self):
+        self.aliases: Dict[int, int] = {}
+
+    def __call__(self, snowflake) -> Optional[int]:
+        if snowflake is None:
+            return None
+        snowflake = int(snowflake)
+        alias = self.aliases.get(snowflake)
+        if alias is None:
+            alias = self.aliases[snowflake] = len(self.aliases) + 1
+        return alias
+
+    def emoji(self, emoji: discord.PartialEmoji) -> str:
+        # Unicode emojis carry no identity, custom emojis are replaced by an alias
+        if emoji.id is None:
+            return emoji.name
+        return f"custom:{self(emoji.id)}"
+
+class RecordingWriter:
+    """Appends events to a gzip JSONL file, one compact JSON array per line
+
+    The first line is a header. Every following line is [milliseconds since
+    the start, event type, fields...]. The stream is sync-flushed after every
+    write, so a recording cut off by a crash can still be read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = gzip.open(path, 'wb')
+        self.write_line({
+            "version": RECORDING_VERSION,
+            "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "cluster": CLUSTER_ID,
+        })
+
+    def write_line(self, data) -> None:
+        self.file.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+
+    def write(self, events: List[list]) -> None:
+        for event in events:
+            self.write_line(event)
+        self.file.flush(zlib.Z_SYNC_FLUSH)
+
+    def close(self) -> None:
+        self.file.close()
+
+def read_recording(path: str) -> Iterator[list]:
+    """Yield the events of a recording, stopping quietly at a cut off end"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            header = json.loads(next(f))
+            if header.get("version") != RECORDING_VERSION:
+                raise ValueError(f"Unsupported recording version {header.get('version')}")
+            for line in f:
+                yield json.loads(line)
+        except (EOFError, StopIteration):
+            return
+
+class EventRecorder:
+    """Records reactions, joins, leaves and interactions for replay, with IDs anonymized
+
+    Only the shape of the traffic is kept: timing, event type, aliased IDs,
+    emojis and component kinds. Message contents, names and command
+    arguments are never recorded.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d-%H%M%S")
+        self.path = path or worker_file(os.path.join(RECORDINGS_DIR, f"events-{stamp}.jsonl")) + ".gz"
+        self.writer = None
+        self.anonymize = Anonymizer()
+        self.buffer: List[list] = []
+        self.started = time.monotonic()
+        self.recorded = 0
+        self.bot = None
+        self._flush_task = None
+
+    def attach(self, bot) -> None:
+        """Start recording the events of a bot"""
+        self.bot = bot
+        self.writer = RecordingWriter(self.path)
+        self.started = time.monotonic()
+        bot.add_listener(self.on_raw_reaction_add)
+        bot.add_listener(self.on_raw_reaction_remove)
+        bot.add_listener(self.on_member_join)
+        bot.add_listener(self.on_raw_member_remove)
+        bot.add_listener(self.on_interaction)
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+        print(f"Recording events to {self.path}")
+
+    def close(self) -> None:
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self.writer:
+            self.flush()
+            self.writer.close()
+            self.writer = None
+            print(f"Recorded {self.recorded} events to {self.path}")
+
+    def record(self, event_type: str, *fields) -> None:
+        self.buffer.append([int((time.monotonic() - self.started) * 1000), event_type, *fields])
+        if len(self.buffer) >= FLUSH_EVENTS:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buffer or not self.writer:
+            return
+        events, self.buffer = self.buffer, []
+        try:
+            self.writer.write(events)
+            self.recorded += len(events)
+        except Exception as e:
+            print(f"Error writing event recording: {e}")
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            self.flush()
+
+    def _is_panel(self, message_id: int) -> bool:
+        roles_cog = self.bot.get_cog('RoleReactionPanel')
+        return bool(roles_cog and roles_cog.stores_loaded() and message_id in roles_cog.reaction_roles)
+
+    def _reaction(self, event_type: str, payload: discord.RawReactionActionEvent) -> None:
+        if payload.user_id == self.bot.user.id:
+            return  # Reactions the bot adds to its own panels
+        a = self.anonymize
+        self.record(
+            event_type, a(payload.guild_id), a(payload.channel_id), a(payload.message_id), a(payload.user_id),
+            a.emoji(payload.emoji), self._is_panel(payload.message_id)
+        )
+
+    async def on_raw_reaction_add(self, payload):
+        self._reaction("reaction_add", payload)
+
+    async def on_raw_reaction_remove(self, payload):
+        self._reaction("reaction_remove", payload)
+
+    async def on_member_join(self, member):
+        self.record("member_join", self.anonymize(member.guild.id), self.anonymize(member.id), member.bot)
+
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        # Fires for uncached members too, unlike on_member_remove
+        self.record("member_remove", self.anonymize(payload.guild_id), self.anonymize(payload.user.id), payload.user.bot)
+
+    async def on_interaction(self, interaction: discord.Interaction):
+        a = self.anonymize
+        where = (a(interaction.guild_id), a(interaction.channel_id), a(interaction.user.id))
+        data = interaction.data or {}
+
+        if interaction.type == discord.InteractionType.component:
+            kind, _, entity = parse_custom_id(data.get("custom_id", ""))
+            # Entities are seller, channel or panel IDs, select values are role IDs
+            entity = a(entity) if entity and entity.isdigit() else None
+            values = [a(value) if value.isdigit() else None for value in data.get("values", [])]
+            message_id = a(interaction.message.id) if interaction.message else None
+            self.record("component", *where, message_id, kind, entity, values)
+        elif interaction.type == discord.InteractionType.modal_submit:
+            self.record("modal", *where)
+        elif interaction.type == discord.InteractionType.application_command:
+            self.record("command", *where, data.get("name"))
\ No newline at end of file
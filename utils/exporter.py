@@ -0,0 +1,150 @@
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils.currency_manager import TRANSACTIONS_FILE
+from utils.feedback_store import FEEDBACK_LOG_FILE
+from utils.ticket_system import TICKET_LOG_FILE
+
+# Directory the compressed exports are written to
+EXPORT_DIR = 'exports'
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# Source log and CSV columns of every dataset
+DATASETS = {
+    "feedback": (FEEDBACK_LOG_FILE, ("created_at", "guild_id", "user_id", "rating", "title", "feedback")),
+    "transactions": (TRANSACTIONS_FILE, ("created_at", "guild_id", "user_id", "amount", "balance", "reason", "counterparty_id")),
+    "tickets": (TICKET_LOG_FILE, ("created_at", "event", "kind", "guild_id", "channel_id", "user_id", "item", "seller_id", "price", "paid")),
+}
+
+# Compressed bytes kept free below the upload limit, gzip holds some output back until the part is closed
+PART_HEADROOM = 256 * 1024
+
+# Leading characters that make spreadsheet apps read a CSV cell as a formula
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def iter_rows(log_file: str, guild_id: int) -> Iterator[Dict]:
+    """Stream the entries of a guild from a JSONL log, one at a time"""
+    if not os.path.exists(log_file):
+        return
+    guild_id = str(guild_id)
+    with open(log_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if row.get("guild_id") == guild_id:
+                yield row
+
+def csv_safe(row: Dict) -> Dict:
+    """Quote text cells that a spreadsheet app would run as a formula"""
+    return {
+        key: "'" + value if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES) else value
+        for key, value in row.items()
+    }
+
+def iter_lines(rows: Iterator[Dict], fields: Tuple[str, ...], fmt: str) -> Iterator[bytes]:
+    """Encode rows as CSV or JSONL lines"""
+    if fmt == "jsonl":
+        for row in rows:
+            yield (json.dumps(row, ensure_ascii=False) + "\n").encode('utf-8')
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+    for row in rows:
+        writer.writerow(csv_safe(row))
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+def csv_header(fields: Tuple[str, ...]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(fields)
+    return buffer.getvalue().encode('utf-8')
+
+class PartWriter:
+    """Writes lines into gzip files, starting a new part before one outgrows the size limit
+
+    Each part is written under a temporary name and renamed when it is complete.
+    """
+
+    def __init__(self, base_path: str, extension: str, part_limit: int, header: Optional[bytes] = None):
+        self.base_path = base_path
+        self.extension = extension
+        self.part_limit = max(part_limit - PART_HEADROOM, PART_HEADROOM)
+        self.header = header
+        self.paths: List[str] = []
+        self.raw = None
+        self.gzip = None
+        self.temp_path = None
+
+    def _open(self) -> None:
+        path = f"{self.base_path}-{len(self.paths) + 1}.{self.extension}.gz"
+        self.temp_path = path + ".tmp"
+        self.raw = open(self.temp_path, 'wb')
+        self.gzip = gzip.GzipFile(filename=os.path.basename(path)[:-3], fileobj=self.raw, mode='wb')
+        if self.header:
+            self.gzip.write(self.header)
+
+    def write(self, line: bytes) -> None:
+        if self.gzip is None:
+            self._open()
+        self.gzip.write(line)
+        # raw.tell() is the compressed size written so far
+        if self.raw.tell() >= self.part_limit:
+            self.close()
+
+    def close(self) -> None:
+        if self.gzip is not None:
+            self.gzip.close()
+            self.raw.close()
+            self.gzip = None
+            self.raw = None
+            path = self.temp_path[:-len(".tmp")]
+            os.replace(self.temp_path, path)
+            self.paths.append(path)
+            self.temp_path = None
+
+    def discard(self) -> None:
+        """Remove the part being written and every completed part"""
+        if self.raw is not None:
+            self.raw.close()
+            self.gzip = None
+            self.raw = None
+        for path in self.paths + ([self.temp_path] if self.temp_path else []):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.paths = []
+        self.temp_path = None
+
+def export_dataset(dataset: str, fmt: str, guild_id: int, part_limit: int, export_dir: str = EXPORT_DIR) -> Tuple[List[str], int]:
+    """Stream a dataset of a guild into compressed files on disk (blocking, run in a thread)
+
+    Returns the paths of the written parts and the number of exported rows.
+    """
+    log_file, fields = DATASETS[dataset]
+    os.makedirs(export_dir, exist_ok=True)
+
+    timestamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%d-%H%M%S')
+    base_path = os.path.join(export_dir, f"{dataset}-{guild_id}-{timestamp}")
+    writer = PartWriter(base_path, fmt, part_limit, csv_header(fields) if fmt == "csv" else None)
+
+    count = 0
+    try:
+        for line in iter_lines(iter_rows(log_file, guild_id), fields, fmt):
+            writer.write(line)
+            count += 1
+        writer.close()
+    except BaseException:
+        # Don't leave partial exports behind
+        writer.discard()
+        raise
+
+    return writer.paths, count
\ No newline at end of file
@@ -0,0 +1,241 @@
+import discord
+import glob
+import json
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+from utils.store import Store, log_store_error, owns_guild
+
+# Shared store of feedback embeds that have not been posted yet, entry ID -> entry
+FEEDBACK_DIGEST_FILE = 'feedback_digest_queue.json'
+
+# Append-only queue files written by earlier versions, one per worker, imported into the store once
+LEGACY_DIGEST_FILES = 'feedback_digest_queue*.jsonl'
+
+# Discord limits per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+# Messages sent per channel and flush, the rest waits for the next flush
+MAX_MESSAGES_PER_FLUSH = 5
+
+# Flushes in a row a channel may be missing or inaccessible before it counts as undeliverable
+# (the feedback cog flushes every 5 seconds, so about five minutes)
+MAX_FAILED_FLUSHES = 60
+
+# Seconds between attempts to post to an undeliverable channel, its entries stay queued meanwhile
+UNDELIVERABLE_RETRY_INTERVAL = 300
+
+def migrate_legacy_queues(store: Store, channel_guilds: Dict[int, int]) -> None:
+    """Import queue files of earlier versions into the shared store (blocking)
+
+    Their entries don't record a guild, it is looked up from the feedback channels in
+    channel_guilds. Entries of unknown channels are posted by the first worker.
+    """
+    for path in sorted(glob.glob(LEGACY_DIGEST_FILES)):
+        # Renaming first makes sure only one worker imports a file
+        migrated = path + ".migrated"
+        try:
+            os.rename(path, migrated)
+        except OSError:
+            continue
+        count = 0
+        try:
+            with open(migrated, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    guild_id = channel_guilds.get(int(entry["channel_id"]))
+                    entry_id = uuid.uuid4().hex
+                    store.set(entry_id, {**entry, "id": entry_id, "guild_id": str(guild_id) if guild_id else None})
+                    count += 1
+            print(f"Imported {count} queued feedback digest(s) from {path}")
+        except Exception as e:
+            print(f"Error importing feedback digests from {path}: {e}")
+
+class FeedbackDigestQueue:
+    """Durable queue of feedback embeds posted to their channels as combined messages
+
+    Entries live in a shared store, each worker posts the ones of its own guilds.
+    """
+
+    def __init__(self, store: Store, channel_guilds: Optional[Dict[int, int]] = None):
+        self.store = store
+        self.queues: Dict[int, List[Dict]] = {}  # channel_id -> pending entries, oldest first
+        self.failed_flushes: Dict[int, int] = {}  # channel_id -> flushes in a row the channel could not be reached
+        self.retry_at: Dict[int, float] = {}  # channel_id -> next attempt to post to an undeliverable channel
+        self.metrics = {
+            "enqueued": 0,
+            "posted": 0,
+            "messages": 0,
+            "failures": 0,
+            "rerouted": 0,
+            "max_depth": 0
+        }
+        self._load(channel_guilds or {})
+
+    def _load(self, channel_guilds: Dict[int, int]) -> None:
+        """Load the entries of this worker's guilds that were queued before a restart (blocking)"""
+        migrate_legacy_queues(self.store, channel_guilds)
+        try:
+            for _, entry in self.store.items():
+                if owns_guild(int(entry["guild_id"]) if entry.get("guild_id") else None):
+                    self.queues.setdefault(int(entry["channel_id"]), []).append(entry)
+        except Exception as e:
+            print(f"Error loading feedback digest queue: {e}")
+
+        for entries in self.queues.values():
+            entries.sort(key=lambda entry: entry["queued_at"])
+
+    def _remove(self, entries: List[Dict]) -> None:
+        """Delete posted entries from the store"""
+        for entry in entries:
+            self.store.adelete(entry["id"]).add_done_callback(log_store_error)
+
+    async def enqueue(self, guild_id: int, channel_id: int, embed: discord.Embed) -> None:
+        """Persist an embed to the store before it is acknowledged"""
+        entry_id = uuid.uuid4().hex
+        entry = {
+            "id": entry_id,
+            "guild_id": str(guild_id),
+            "channel_id": str(channel_id),
+            "queued_at": time.time(),
+            "embed": embed.to_dict()
+        }
+        await self.store.aset(entry_id, entry)
+
+        self.queues.setdefault(channel_id, []).append(entry)
+        self.metrics["enqueued"] += 1
+        self.metrics["max_depth"] = max(self.metrics["max_depth"], self.depth)
+
+    @property
+    def depth(self) -> int:
+        return sum(len(entries) for entries in self.queues.values())
+
+    @property
+    def undeliverable(self) -> int:
+        """Entries waiting for a channel that could not be reached for too long"""
+        return sum(
+            len(entries) for channel_id, entries in self.queues.items()
+            if self.failed_flushes.get(channel_id, 0) >= MAX_FAILED_FLUSHES
+        )
+
+    def oldest_age(self) -> float:
+        """Seconds the oldest pending entry has been waiting"""
+        oldest = [entries[0]["queued_at"] for entries in self.queues.values() if entries]
+        return time.time() - min(oldest) if oldest else 0.0
+
+    def _chunks(self, entries: List[Dict]) -> List[List[Dict]]:
+        """Split entries into messages within the embed count and size limits"""
+        chunks, current, size = [], [], 0
+        for entry in entries:
+            entry_size = len(discord.Embed.from_dict(entry["embed"]))
+            if current and (len(current) >= MAX_EMBEDS_PER_MESSAGE or size + entry_size > MAX_EMBED_CHARS_PER_MESSAGE):
+                chunks.append(current)
+                current, size = [], 0
+            current.append(entry)
+            size += entry_size
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _reroute(self, channel_id: int, guild_channels: Dict[int, int]) -> bool:
+        """Move the entries of an undeliverable channel to their guild's current feedback channel"""
+        entries = self.queues[channel_id]
+        guild_id = entries[0].get("guild_id")
+        target = guild_channels.get(int(guild_id)) if guild_id else None
+        if not target or target == channel_id:
+            return False
+
+        for entry in entries:
+            entry["channel_id"] = str(target)
+            self.store.aset(entry["id"], entry).add_done_callback(log_store_error)
+        queue = self.queues.setdefault(target, [])
+        queue.extend(entries)
+        queue.sort(key=lambda entry: entry["queued_at"])
+
+        del self.queues[channel_id]
+        self.failed_flushes.pop(channel_id, None)
+        self.retry_at.pop(channel_id, None)
+        self.metrics["rerouted"] += len(entries)
+        print(f"Moved {len(entries)} queued feedback digest(s) from channel {channel_id} to channel {target}")
+        return True
+
+    async def _failed(self, bot, channel_id: int, reason: str) -> None:
+        """Count a flush that could not reach a channel, alerting the guild once it is undeliverable
+
+        The entries are kept and posted once the channel is reachable again.
+        """
+        failed = self.failed_flushes.get(channel_id, 0) + 1
+        self.failed_flushes[channel_id] = failed
+        if failed < MAX_FAILED_FLUSHES:
+            return
+
+        self.retry_at[channel_id] = time.time() + UNDELIVERABLE_RETRY_INTERVAL
+        if failed > MAX_FAILED_FLUSHES:
+            return
+
+        entries = self.queues[channel_id]
+        print(f"Feedback digest channel {channel_id} unreachable after {failed} flushes, "
+              f"keeping {len(entries)} queued digest(s): {reason}")
+        guild = bot.get_guild(int(entries[0]["guild_id"])) if entries[0].get("guild_id") else None
+        alert_channel = guild.system_channel if guild else None
+        if not alert_channel or not alert_channel.permissions_for(guild.me).send_messages:
+            return
+        try:
+            await alert_channel.send(
+                f"⚠️ {len(entries)} feedback submission(s) could not be posted to <#{channel_id}> ({reason}). "
+                "They are kept and posted once the bot can send there again, or to the new channel after `/setfeedback`."
+            )
+        except discord.HTTPException as e:
+            print(f"Error alerting guild {guild.id} about undeliverable feedback: {e}")
+
+    async def flush(self, bot, interval: Dict[int, float], guild_channels: Optional[Dict[int, int]] = None) -> None:
+        """Post due queues, each channel is due when full or its oldest entry waited the interval
+
+        interval maps channel IDs to their flush interval in seconds. guild_channels maps guild
+        IDs to their current feedback channel, entries of unreachable channels are moved there.
+        """
+        now = time.time()
+        guild_channels = guild_channels or {}
+
+        for channel_id, entries in list(self.queues.items()):
+            if not entries:
+                continue
+            if self.failed_flushes.get(channel_id, 0) >= MAX_FAILED_FLUSHES:
+                if self._reroute(channel_id, guild_channels) or now < self.retry_at.get(channel_id, 0):
+                    continue
+            due = len(entries) >= MAX_EMBEDS_PER_MESSAGE or now - entries[0]["queued_at"] >= interval.get(channel_id, 0)
+            if not due:
+                continue
+
+            channel = bot.get_channel(channel_id)
+            if not channel:
+                await self._failed(bot, channel_id, "channel not found")
+                continue
+
+            for chunk in self._chunks(entries)[:MAX_MESSAGES_PER_FLUSH]:
+                try:
+                    await channel.send(embeds=[discord.Embed.from_dict(entry["embed"]) for entry in chunk])
+                except (discord.NotFound, discord.Forbidden) as e:
+                    print(f"Error posting feedback digest: {e}")
+                    self.metrics["failures"] += 1
+                    await self._failed(bot, channel_id, str(e))
+                    break
+                except Exception as e:
+                    # Keep the entries for the next flush
+                    print(f"Error posting feedback digest: {e}")
+                    self.metrics["failures"] += 1
+                    break
+
+                self.failed_flushes.pop(channel_id, None)
+                self.retry_at.pop(channel_id, None)
+                self._remove(chunk)
+                del entries[:len(chunk)]
+                self.metrics["posted"] += len(chunk)
+                self.metrics["messages"] += 1
+
+            if not entries:
+                self.queues.pop(channel_id, None)
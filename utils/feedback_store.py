@@ -0,0 +1,176 @@
+import datetime
+import json
+import os
+from typing import Dict, Iterator, Optional
+from utils.store import Store, log_store_error, owns_guild
+
+# Append-only log of every feedback submission
+FEEDBACK_LOG_FILE = 'feedback_log.jsonl'
+
+# Shared store of the running rating aggregates, guild ID -> aggregates
+FEEDBACK_STATS_FILE = 'feedback_stats.json'
+
+# Number of daily buckets kept per guild
+DAILY_RETENTION_DAYS = 400
+
+STATS_PERIODS = ("day", "week", "month", "all")
+
+# Key of the stats store holding the log size the aggregates were built from
+LOG_SIZE_KEY = "_log_size"
+
+def _empty_aggregate() -> Dict:
+    return {"count": 0, "sum": 0, "histogram": [0, 0, 0, 0, 0]}
+
+def _add_rating(aggregate: Dict, rating: int) -> None:
+    aggregate["count"] += 1
+    aggregate["sum"] += rating
+    aggregate["histogram"][rating - 1] += 1
+
+def _add_record(guild_stats: Dict, record: Dict) -> None:
+    """Add one submission to the total, daily and monthly aggregates of its guild"""
+    day = record["created_at"][:10]
+    month = record["created_at"][:7]
+
+    _add_rating(guild_stats["total"], record["rating"])
+
+    days = guild_stats["days"]
+    if day not in days:
+        days[day] = _empty_aggregate()
+        # Drop daily buckets past the retention period
+        cutoff = (datetime.date.fromisoformat(day) - datetime.timedelta(days=DAILY_RETENTION_DAYS)).isoformat()
+        for old_day in [d for d in days if d < cutoff]:
+            del days[old_day]
+    _add_rating(days[day], record["rating"])
+
+    _add_rating(guild_stats["months"].setdefault(month, _empty_aggregate()), record["rating"])
+
+def _new_guild_stats() -> Dict:
+    return {"total": _empty_aggregate(), "days": {}, "months": {}}
+
+def _log_size(log_file: str) -> int:
+    return os.path.getsize(log_file) if os.path.exists(log_file) else 0
+
+def rebuild_stale_stats(stats_store: Store, log_file: str = FEEDBACK_LOG_FILE) -> None:
+    """Rebuild the aggregates from the log if they don't cover all of it (blocking)
+
+    Only run while no other process appends to the log: at startup of a single
+    process, or by the cluster launcher before it starts the workers.
+    """
+    # A crash between the log append and the stats update leaves them out of step
+    if stats_store.get(LOG_SIZE_KEY) == _log_size(log_file):
+        return
+    print("Feedback stats don't match the feedback log, rebuilding them")
+
+    stats = {}
+    size = 0
+    if os.path.exists(log_file):
+        with open(log_file, 'rb') as f:
+            for line in f:
+                size += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Partly written line
+                _add_record(stats.setdefault(str(record["guild_id"]), _new_guild_stats()), record)
+
+    for guild_id, _ in stats_store.items():
+        if guild_id != LOG_SIZE_KEY and guild_id not in stats:
+            stats_store.delete(guild_id)
+    for guild_id, guild_stats in stats.items():
+        stats_store.set(guild_id, guild_stats)
+    stats_store.set(LOG_SIZE_KEY, size)
+
+class FeedbackStore:
+    """Stores feedback submissions and keeps rating aggregates up to date on every submit
+
+    The aggregates live in a shared store keyed by guild, each worker keeps the ones
+    of its own guilds in memory.
+    """
+
+    def __init__(self, stats_store: Store, log_file=FEEDBACK_LOG_FILE):
+        self.stats_store = stats_store
+        self.log_file = log_file
+        self.stats = self._load_stats()
+        self.dirty = set()  # Guilds whose aggregates changed since the last flush
+        self.unflushed_bytes = 0  # Bytes appended to the log since the last flush
+
+    def _load_stats(self) -> Dict:
+        """Load the aggregates of this worker's guilds (blocking)"""
+        try:
+            return {
+                guild_id: guild_stats for guild_id, guild_stats in self.stats_store.items()
+                if guild_id != LOG_SIZE_KEY and owns_guild(int(guild_id))
+            }
+        except Exception as e:
+            print(f"Error loading feedback stats: {e}")
+            return {}
+
+    def add(self, guild_id: int, user_id: int, title: str, feedback: str, rating: int) -> Dict:
+        """Persist a submission and update its aggregates"""
+        record = {
+            "guild_id": str(guild_id),
+            "user_id": str(user_id),
+            "title": title,
+            "feedback": feedback,
+            "rating": rating,
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        }
+
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8')
+        try:
+            with open(self.log_file, 'ab') as f:
+                f.write(line)
+        except Exception as e:
+            print(f"Error saving feedback: {e}")
+            line = b""
+
+        _add_record(self.stats.setdefault(record["guild_id"], _new_guild_stats()), record)
+        self.dirty.add(record["guild_id"])
+        self.unflushed_bytes += len(line)
+        return record
+
+    def flush(self) -> None:
+        """Write the changed aggregates to the store
+
+        Submissions that were not flushed before a crash leave the stored log size
+        behind the log, so the aggregates are rebuilt at the next start.
+        """
+        for guild_id in self.dirty:
+            self.stats_store.aset(guild_id, self.stats[guild_id]).add_done_callback(log_store_error)
+        if self.unflushed_bytes:
+            # Every worker appends to the same log, so its size is kept with an atomic increment
+            self.stats_store.aincr(LOG_SIZE_KEY, self.unflushed_bytes).add_done_callback(log_store_error)
+        self.dirty.clear()
+        self.unflushed_bytes = 0
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Stream stored submissions from the log, one at a time"""
+        if not os.path.exists(self.log_file):
+            return
+        with open(self.log_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def summary(self, guild_id: int, period: str = "all", today: Optional[datetime.date] = None) -> Dict:
+        """Get the count, sum and histogram of a guild for a period"""
+        guild_stats = self.stats.get(str(guild_id))
+        if not guild_stats:
+            return _empty_aggregate()
+
+        today = today or datetime.datetime.now(datetime.timezone.utc).date()
+        if period == "all":
+            return guild_stats["total"]
+        if period == "month":
+            return guild_stats["months"].get(today.isoformat()[:7], _empty_aggregate())
+
+        # Sum the daily buckets of the period
+        days = 1 if period == "day" else 7
+        result = _empty_aggregate()
+        for offset in range(days):
+            bucket = guild_stats["days"].get((today - datetime.timedelta(days=offset)).isoformat())
+            if bucket:
+                result["count"] += bucket["count"]
+                result["sum"] += bucket["sum"]
+                result["histogram"] = [a + b for a, b in zip(result["histogram"], bucket["histogram"])]
+        return result
@@ -0,0 +1,90 @@
+import discord
+import time
+from discord.ui import View
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from utils.metrics import HANDLER_SECONDS
+
+# Handlers receive the interaction and the guild ID and entity parsed from the custom_id
+Handler = Callable[[discord.Interaction, Optional[int], Optional[str]], Awaitable[None]]
+
+# custom_ids used before structured ids were introduced
+LEGACY_CUSTOM_IDS = {
+    "create_ticket": "ticket_create",
+    "close_ticket": "ticket_close",
+    "purchase_item": "shop_buy",
+    "more_info": "shop_info",
+}
+LEGACY_FEEDBACK_PREFIX = "feedback_button_"
+
+def make_custom_id(kind: str, guild_id: Optional[int] = None, entity=None) -> str:
+    """Build a structured custom_id of the form kind:guild:entity"""
+    parts = [kind]
+    if guild_id is not None or entity is not None:
+        parts.append(str(guild_id or 0))
+    if entity is not None:
+        parts.append(str(entity))
+    return ":".join(parts)
+
+def parse_custom_id(custom_id: str) -> Tuple[str, Optional[int], Optional[str]]:
+    """Split a custom_id into kind, guild ID and entity"""
+    legacy = LEGACY_CUSTOM_IDS.get(custom_id)
+    if legacy:
+        return legacy, None, None
+    if custom_id.startswith(LEGACY_FEEDBACK_PREFIX):
+        return "feedback", None, custom_id[len(LEGACY_FEEDBACK_PREFIX):]
+
+    kind, _, rest = custom_id.partition(":")
+    guild, _, entity = rest.partition(":")
+    return kind, int(guild) if guild.isdigit() and int(guild) else None, entity or None
+
+class RoutedView(View):
+    """View used only to lay out components, their interactions are dispatched by the router"""
+
+    def __init__(self):
+        super().__init__(timeout=None)
+        # The router handles the components from on_interaction, so the view stops listening
+        # right away and discord.py never stores it per message
+        self.stop()
+
+class InteractionRouter:
+    """Dispatches component interactions to handlers by the kind in their custom_id"""
+
+    def __init__(self):
+        self.handlers: Dict[str, Handler] = {}
+        self.attached = False
+
+    def register(self, kind: str, handler: Handler) -> None:
+        self.handlers[kind] = handler
+
+    def unregister(self, kind: str) -> None:
+        self.handlers.pop(kind, None)
+
+    def attach(self, bot) -> None:
+        """Listen for interactions on the bot, only once"""
+        if not self.attached:
+            bot.add_listener(self.dispatch, 'on_interaction')
+            self.attached = True
+
+    async def dispatch(self, interaction: discord.Interaction) -> None:
+        """Run the handler registered for a component interaction"""
+        if interaction.type != discord.InteractionType.component:
+            return
+
+        custom_id = interaction.data.get("custom_id", "")
+        kind, guild_id, entity = parse_custom_id(custom_id)
+        handler = self.handlers.get(kind)
+        if handler is None:
+            return
+
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            await handler(interaction, guild_id, entity)
+        except Exception as e:
+            status = "error"
+            print(f"Error handling interaction {custom_id}: {e}")
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - start, kind="component", name=kind, status=status)
+
+# Shared router for all persistent components
+router = InteractionRouter()
@@ -0,0 +1,25 @@
+class LazyStores:
+    """Mixin for cogs whose state is read from disk by load_stores
+
+    The bot calls load_stores at startup. For lazy cogs it doesn't, and the
+    first access to one of the attributes in STORES loads them instead.
+    Either way on_stores_loaded runs on the event loop once the stores are in.
+    """
+
+    STORES = ()
+
+    def __getattr__(self, name):
+        # Only called for attributes that are not set yet
+        if name in type(self).STORES:
+            print(f"Loading stores of {type(self).__name__} on first use")
+            self.load_stores()
+            self.on_stores_loaded()
+            return object.__getattribute__(self, name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def stores_loaded(self) -> bool:
+        return all(name in vars(self) for name in type(self).STORES)
+
+    def on_stores_loaded(self) -> None:
+        """Start work that needs the stores, like background loops"""
+        pass
\ No newline at end of file
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+from utils.metrics import LOOP_BLOCKS, LOOP_BLOCKED_SECONDS, LOOP_LAG
+
+# Loop delay in seconds past which the watchdog captures a stack
+DEFAULT_THRESHOLD = 0.25
+# Seconds between heartbeats of the loop and checks of the watchdog thread
+DEFAULT_INTERVAL = 0.1
+# Frames of the blocking task's stack to log
+STACK_LIMIT = 25
+
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+_TASK_ID = re.compile(r"-[0-9a-f]{8,}$|^Task-\d+$")
+
+def task_event(task: Optional[asyncio.Task]) -> str:
+    """Name of the event or handler a task runs, without per-task ids"""
+    if task is None:
+        return "callback"
+    name = task.get_name()
+    if name.startswith("discord.py: "):
+        # discord.py names event tasks after the event, e.g. "discord.py: on_message"
+        return name[len("discord.py: "):]
+    if _TASK_ID.search(name):
+        stripped = _TASK_ID.sub("", name)
+        if stripped:
+            return stripped
+        coro = task.get_coro()
+        return getattr(coro, "__qualname__", "task")
+    return name
+
+def format_loop_stack(frame) -> str:
+    """Format a stack of the loop thread, starting at the callback the loop is running"""
+    stack = traceback.extract_stack(frame)
+    # Drop the frames of the loop itself, everything after its last frame belongs to the callback
+    for index in range(len(stack) - 1, -1, -1):
+        if stack[index].filename.startswith(_ASYNCIO_DIR):
+            stack = stack[index + 1:] or stack[index:]
+            break
+    return "".join(traceback.format_list(stack[-STACK_LIMIT:]))
+
+class LoopWatchdog:
+    """Watches the event loop from a thread and logs the stack of handlers that block it"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, interval: float = DEFAULT_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.counts: Dict[str, int] = {}  # event -> blocks
+        self.loop = None
+        self.loop_thread_id = None
+        self.last_beat = 0.0
+        self.blocked = None  # (event, start of the block) while the loop is blocked
+        self.stopped = threading.Event()
+        self.heartbeat_task = None
+        self.thread = None
+
+    def start(self) -> None:
+        """Start the heartbeat on the running loop and the watchdog thread"""
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self.stopped.clear()
+        self.heartbeat_task = self.loop.create_task(self._heartbeat(), name="loop-watchdog-heartbeat")
+        self.thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+            self.heartbeat_task = None
+
+    async def _heartbeat(self) -> None:
+        """Record when the loop last woke up and how late it was"""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            LOOP_LAG.observe(max(0.0, now - start - self.interval))
+            self.last_beat = now
+
+            blocked, self.blocked = self.blocked, None
+            if blocked:
+                event, blocked_at = blocked
+                duration = now - blocked_at
+                LOOP_BLOCKED_SECONDS.observe(duration, event=event)
+                print(f"Event loop unblocked after {duration:.2f}s ({event})")
+
+    def _watch(self) -> None:
+        while not self.stopped.wait(self.interval):
+            last_beat = self.last_beat
+            stalled = time.monotonic() - last_beat - self.interval
+            if stalled < self.threshold or self.blocked:
+                continue
+            try:
+                self._capture(last_beat, stalled)
+            except Exception as e:
+                print(f"Error capturing blocked loop stack: {e}")
+
+    def _capture(self, last_beat: float, stalled: float) -> None:
+        """Log the stack of whatever the loop thread is running"""
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None or self.last_beat != last_beat:
+            return  # The loop recovered while we looked
+        event = task_event(asyncio.current_task(self.loop))
+        stack = format_loop_stack(frame)
+
+        self.blocked = (event, last_beat + self.interval)
+        self.counts[event] = self.counts.get(event, 0) + 1
+        LOOP_BLOCKS.inc(event=event)
+        print(f"Event loop blocked for {stalled:.2f}s by {event}, stack:\n{stack}")
\ No newline at end of file
@@ -0,0 +1,112 @@
+import discord
+import asyncio
+import functools
+import time
+from typing import Dict, Optional, Tuple
+
+# Maximum number of user IDs per gateway member query
+QUERY_BATCH_SIZE = 100
+
+def _fail(waiting: Dict[int, asyncio.Future], error: Exception) -> None:
+    for future in waiting.values():
+        if not future.done():
+            future.set_exception(error)
+
+class MemberResolver:
+    """Resolves members missing from the cache with batched gateway member queries"""
+
+    def __init__(self, window: float = 0.1, ttl: float = 60.0, max_cached: int = 1000):
+        self.window = window  # Seconds to collect lookups before querying the gateway
+        self.ttl = ttl  # Seconds a resolved member stays cached
+        self.max_cached = max_cached
+        self.cache: Dict[Tuple[int, int], Tuple[float, Optional[discord.Member]]] = {}
+        self.pending: Dict[int, Dict[int, asyncio.Future]] = {}
+        self.tasks: Dict[int, asyncio.Task] = {}
+
+    def remember(self, member: discord.Member) -> None:
+        """Cache a member object received from an event or API response"""
+        self.cache[(member.guild.id, member.id)] = (time.monotonic() + self.ttl, member)
+
+    def forget(self, guild_id: int, user_id: int) -> None:
+        """Drop a cached member, e.g. after it changed"""
+        self.cache.pop((guild_id, user_id), None)
+
+    async def resolve(self, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+        """Get a member from the cache or fetch it in the next batched query"""
+        member = guild.get_member(user_id)
+        if member:
+            return member
+
+        cached = self.cache.get((guild.id, user_id))
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        # Join the pending batch for this guild
+        waiting = self.pending.setdefault(guild.id, {})
+        future = waiting.get(user_id)
+        if future is None:
+            future = waiting[user_id] = asyncio.get_running_loop().create_future()
+            if guild.id not in self.tasks:
+                task = self.tasks[guild.id] = asyncio.create_task(self._flush_later(guild))
+                task.add_done_callback(functools.partial(self._flush_done, guild.id))
+
+        # Shield the shared future so one cancelled caller doesn't cancel the others
+        return await asyncio.shield(future)
+
+    async def _flush_later(self, guild: discord.Guild) -> None:
+        await asyncio.sleep(self.window)
+        self.tasks.pop(guild.id, None)
+        waiting = self.pending.pop(guild.id, {})
+        try:
+            await self._query(guild, waiting)
+        finally:
+            # Don't leave callers waiting when the query was cancelled
+            _fail(waiting, RuntimeError("Member lookup was cancelled"))
+
+    def _flush_done(self, guild_id: int, task: asyncio.Task) -> None:
+        """Fail the batch of a flush that was cancelled before it took the batch"""
+        if self.tasks.get(guild_id) is not task:
+            return
+        del self.tasks[guild_id]
+        _fail(self.pending.pop(guild_id, {}), RuntimeError("Member lookup was cancelled"))
+
+    async def _query(self, guild: discord.Guild, waiting: Dict[int, asyncio.Future]) -> None:
+        """Resolve a batch of user IDs with as few member chunk requests as possible"""
+        user_ids = list(waiting)
+        expires = time.monotonic() + self.ttl
+
+        for start in range(0, len(user_ids), QUERY_BATCH_SIZE):
+            batch = user_ids[start:start + QUERY_BATCH_SIZE]
+            try:
+                members = await guild.query_members(user_ids=batch, cache=False)
+            except Exception as e:
+                # Fail the lookups without caching them, the next event queries again
+                print(f"Error querying members: {e}")
+                _fail({user_id: waiting[user_id] for user_id in batch}, e)
+                continue
+
+            found = {member.id: member for member in members}
+            for user_id in batch:
+                member = found.get(user_id)
+                # Members that left are cached as None as well
+                self.cache[(guild.id, user_id)] = (expires, member)
+                future = waiting[user_id]
+                if not future.done():
+                    future.set_result(member)
+
+        self._prune()
+
+    def _prune(self) -> None:
+        """Drop expired entries once the cache grows past its limit"""
+        if len(self.cache) <= self.max_cached:
+            return
+        now = time.monotonic()
+        for key in [key for key, (expires, _) in self.cache.items() if expires <= now]:
+            del self.cache[key]
+
+        # Evict the oldest entries if everything is still fresh
+        while len(self.cache) > self.max_cached:
+            del self.cache[next(iter(self.cache))]
+
+# Shared resolver for cogs that need members which may not be cached
+member_resolver = MemberResolver()
\ No newline at end of file
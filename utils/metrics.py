@@ -0,0 +1,236 @@
+import bisect
+import functools
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+import aiohttp
+from aiohttp import web
+
+# Upper bounds in seconds, from a fast cache hit to a slow chain of API calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    """Base for metrics with a fixed set of label names"""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}")
+        return lines
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.values: Dict[Tuple[str, ...], List[float]] = {}  # per bucket counts, then +Inf count and sum
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            counts = self.values.get(key)
+            if counts is None:
+                counts = self.values[key] = [0.0] * (len(self.buckets) + 2)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of a with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, counts in sorted(self.values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+class Registry:
+    """Holds all metrics and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Add a function that updates gauges right before each scrape"""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+registry = Registry()
+
+HANDLER_SECONDS = registry.register(Histogram(
+    "lvbot_handler_seconds", "Duration of commands, component callbacks and listeners",
+    ("kind", "name", "status")
+))
+REST_REQUESTS = registry.register(Counter(
+    "lvbot_rest_requests_total", "REST calls to the Discord API by route and status", ("method", "route", "status")
+))
+REST_RATE_LIMITS = registry.register(Counter(
+    "lvbot_rest_rate_limited_total", "REST calls answered with 429 by route", ("method", "route")
+))
+GATEWAY_LATENCY = registry.register(Gauge(
+    "lvbot_gateway_latency_seconds", "Heartbeat latency per shard", ("shard",)
+))
+LOOP_LAG = registry.register(Histogram(
+    "lvbot_event_loop_lag_seconds", "Delay of the event loop in running a scheduled wakeup",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+))
+LOOP_BLOCKS = registry.register(Counter(
+    "lvbot_event_loop_blocks_total", "Times the loop watchdog caught a handler blocking the event loop", ("event",)
+))
+LOOP_BLOCKED_SECONDS = registry.register(Histogram(
+    "lvbot_event_loop_blocked_seconds", "How long the event loop stayed blocked once the watchdog caught it", ("event",),
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+))
+STORE_FLUSH_SECONDS = registry.register(Histogram(
+    "lvbot_store_flush_seconds", "Duration of writing a store to disk", ("store",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+))
+
+def instrument(kind: str, name: Optional[str] = None):
+    """Record the duration of a coroutine function in the handler histogram
+
+    Usage:
+        @commands.Cog.listener()
+        @instrument("listener")
+        async def on_raw_reaction_add(self, payload): ...
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            status = "ok"
+            try:
+                return await func(*args, **kwargs)
+            except BaseException:
+                status = "error"
+                raise
+            finally:
+                HANDLER_SECONDS.observe(time.perf_counter() - start, kind=kind, name=label, status=status)
+        return wrapper
+    return decorator
+
+# Snowflakes, emojis and webhook/interaction tokens in API paths, replaced so routes stay low-cardinality
+_ROUTE_TOKEN = re.compile(r"/(webhooks|interactions)/(\d+)/[^/]+")
+_ROUTE_ID = re.compile(r"/\d{15,}")
+_ROUTE_EMOJI = re.compile(r"/reactions/[^/]+")
+
+def route_template(path: str) -> str:
+    path = path.split("/api/v", 1)[-1].split("/", 1)[-1]
+    path = _ROUTE_TOKEN.sub(r"/\1/{id}/{token}", "/" + path)
+    path = _ROUTE_EMOJI.sub("/reactions/{emoji}", path)
+    return _ROUTE_ID.sub("/{id}", path)
+
+def http_trace() -> aiohttp.TraceConfig:
+    """aiohttp trace config counting REST calls and rate limits by route"""
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_end(session, context, params):
+        route = route_template(params.url.path)
+        status = params.response.status
+        REST_REQUESTS.inc(method=params.method, route=route, status=status)
+        if status == 429:
+            REST_RATE_LIMITS.inc(method=params.method, route=route)
+
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+class MetricsServer:
+    """Serves the registry on /metrics over HTTP"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.runner = None
+
+    async def _metrics(self, request):
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, self.host, self.port).start()
+        print(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
\ No newline at end of file
@@ -0,0 +1,128 @@
+import json
+from typing import Dict, List, Optional
+from utils.role_scheduler import parse_duration
+
+# YAML specs are optional and need PyYAML
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+PANEL_MODES = ("reactions", "select")
+
+# Discord limits per panel message
+MAX_PANEL_REACTIONS = 20
+MAX_SELECT_OPTIONS = 25
+
+def load_panel_spec(content: bytes, filename: str) -> List[Dict]:
+    """Parse a JSON or YAML panel spec into a list of normalized panels"""
+    text = content.decode('utf-8')
+
+    if filename.lower().endswith(('.yml', '.yaml')):
+        if yaml is None:
+            raise ValueError("YAML specs require PyYAML to be installed. Please upload a JSON spec instead.")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+
+    panels = data.get("panels") if isinstance(data, dict) else data
+    if not isinstance(panels, list) or not panels:
+        raise ValueError("The spec must contain a non-empty list of panels")
+
+    normalized = [_normalize_panel(entry, index) for index, entry in enumerate(panels, 1)]
+
+    keys = [panel["key"] for panel in normalized if panel["key"]]
+    if len(keys) != len(set(keys)):
+        raise ValueError("Panel keys must be unique")
+    return normalized
+
+def _normalize_panel(entry: Dict, index: int) -> Dict:
+    """Validate one panel entry and convert it to the stored representation"""
+    if not isinstance(entry, dict):
+        raise ValueError(f"Panel {index} must be an object")
+
+    label = entry.get("key") or f"panel {index}"
+    for field in ("channel_id", "title", "roles"):
+        if not entry.get(field):
+            raise ValueError(f"{label}: missing `{field}`")
+
+    mode = entry.get("mode", "reactions")
+    if mode not in PANEL_MODES:
+        raise ValueError(f"{label}: mode must be one of {', '.join(PANEL_MODES)}")
+
+    duration = entry.get("duration")
+    if isinstance(duration, str):
+        duration = parse_duration(duration)
+
+    roles = []
+    for role in entry["roles"]:
+        if not role.get("role_id") or not role.get("emoji"):
+            raise ValueError(f"{label}: every role needs `role_id` and `emoji`")
+        roles.append({
+            "id": int(role["role_id"]),
+            "emoji": str(role["emoji"]),
+            "name": role.get("name")
+        })
+
+    limit = MAX_SELECT_OPTIONS if mode == "select" else MAX_PANEL_REACTIONS
+    if len(roles) > limit:
+        raise ValueError(f"{label}: a {mode} panel holds at most {limit} roles")
+    if len({role["emoji"] for role in roles}) != len(roles):
+        raise ValueError(f"{label}: emojis must be unique within a panel")
+
+    return {
+        "key": entry.get("key"),
+        "message_id": int(entry["message_id"]) if entry.get("message_id") else None,
+        "channel_id": int(entry["channel_id"]),
+        "title": str(entry["title"]),
+        "description": str(entry.get("description", "")),
+        "mode": mode,
+        "duration": int(duration) if duration else None,
+        "roles": roles
+    }
+
+def diff_panel(record: Optional[Dict], panel: Dict) -> List[str]:
+    """List what differs between a stored panel and its spec"""
+    if record is None:
+        return ["new panel"]
+
+    changes = []
+    if record.get("channel_id") != panel["channel_id"]:
+        changes.append("channel")
+    if record.get("title") != panel["title"] or record.get("description") != panel["description"]:
+        changes.append("text")
+    if record.get("mode", "reactions") != panel["mode"]:
+        changes.append("mode")
+    if record.get("duration") != panel["duration"]:
+        changes.append("duration")
+
+    roles = {role["emoji"]: role["id"] for role in panel["roles"]}
+    names = {role["emoji"]: role["name"] for role in panel["roles"]}
+    added = len(roles.keys() - record["roles"].keys())
+    removed = len(record["roles"].keys() - roles.keys())
+    changed = sum(1 for emoji in roles.keys() & record["roles"].keys() if roles[emoji] != record["roles"][emoji])
+    if added or removed or changed:
+        changes.append(f"roles (+{added}, -{removed}, ~{changed})")
+    elif names != record.get("names", {}):
+        changes.append("role names")
+    return changes
+
+def export_panel_spec(records: Dict[int, Dict]) -> str:
+    """Convert stored panels back into a JSON spec"""
+    panels = []
+    for message_id, record in records.items():
+        names = record.get("names", {})
+        panels.append({
+            "key": record.get("key") or str(message_id),
+            "message_id": str(message_id),
+            "channel_id": str(record["channel_id"]),
+            "title": record.get("title", ""),
+            "description": record.get("description", ""),
+            "mode": record.get("mode", "reactions"),
+            "duration": record.get("duration"),
+            "roles": [
+                {"role_id": str(role_id), "emoji": emoji, "name": names.get(emoji)}
+                for emoji, role_id in record["roles"].items()
+            ]
+        })
+    return json.dumps({"panels": panels}, indent=4, ensure_ascii=False)
@@ -0,0 +1,112 @@
+import discord
+import asyncio
+from typing import Dict, Tuple
+from utils.member_resolver import MemberResolver
+
+class RoleMutationQueue:
+    """Coalesces role changes per member and applies the net diff in one edit"""
+
+    def __init__(self, bot, resolver: MemberResolver, delay: float = 1.5):
+        self.bot = bot
+        self.resolver = resolver
+        self.delay = delay  # Seconds to collect changes after the first event
+        self.pending: Dict[Tuple[int, int], Dict[int, bool]] = {}
+        self.tasks: Dict[Tuple[int, int], asyncio.Task] = {}
+
+    def queue(self, guild_id: int, member_id: int, role_id: int, add: bool) -> None:
+        """Queue a role to be added or removed, the latest event for a role wins"""
+        key = (guild_id, member_id)
+        self.pending.setdefault(key, {})[role_id] = add
+
+        # Start a flush timer for this member if none is running
+        if key not in self.tasks:
+            self.tasks[key] = asyncio.create_task(self._flush_later(key))
+
+    async def _flush_later(self, key: Tuple[int, int]) -> None:
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.tasks.pop(key, None)
+        await self._apply(key)
+
+    async def flush_all(self) -> None:
+        """Apply every pending change immediately"""
+        for task in list(self.tasks.values()):
+            task.cancel()
+        self.tasks.clear()
+        await asyncio.gather(*(self._apply(key) for key in list(self.pending)))
+
+    async def _apply(self, key: Tuple[int, int]) -> None:
+        """Apply the net role changes of a member"""
+        changes = self.pending.pop(key, None)
+        if not changes:
+            return
+
+        guild_id, member_id = key
+        guild = self.bot.get_guild(guild_id)
+        if not guild:
+            return
+
+        # Members outside the cache are fetched in batches
+        cached = guild.get_member(member_id)
+        try:
+            member = cached or await self.resolver.resolve(guild, member_id)
+        except Exception as e:
+            print(f"Error resolving member {member_id}: {e}")
+            return
+        if not member:
+            return
+
+        roles = {}
+        for role_id, add in changes.items():
+            role = guild.get_role(role_id)
+            # Skip roles the bot cannot manage so they don't fail the whole edit
+            if not role or role.managed or role >= guild.me.top_role:
+                print(f"Skipping unmanageable role {role_id} for member {member_id}")
+                continue
+            roles[role_id] = add
+
+        try:
+            if cached:
+                await self._replace_roles(member, roles)
+            else:
+                await self._update_roles(member, roles)
+        except discord.Forbidden:
+            print(f"Missing permissions to update roles for member {member_id}")
+        except Exception as e:
+            print(f"Error updating roles: {e}")
+        finally:
+            # Resolved snapshots no longer match the member's roles
+            self.resolver.forget(guild_id, member_id)
+
+    async def _replace_roles(self, member: discord.Member, roles: Dict[int, bool]) -> None:
+        """Apply the changes to a cached member in one edit, the gateway keeps its roles current"""
+        current = {role.id for role in member.roles if not role.is_default()}
+        desired = set(current)
+        for role_id, add in roles.items():
+            if add:
+                desired.add(role_id)
+            else:
+                desired.discard(role_id)
+
+        if desired != current:
+            await member.edit(
+                roles=[discord.Object(id=role_id) for role_id in desired],
+                reason="Reaction role update"
+            )
+
+    async def _update_roles(self, member: discord.Member, roles: Dict[int, bool]) -> None:
+        """Apply the changes to a resolved member role by role
+        
+        The roles of a resolved member may be outdated, so replacing the whole
+        set could revert changes made since. Adding or removing single roles
+        is safe either way. Changes the resolved roles already show are skipped,
+        which saves a request per reactor when panels are reconciled at startup.
+        """
+        current = {role.id for role in member.roles}
+        to_add = [discord.Object(id=role_id) for role_id, add in roles.items() if add and role_id not in current]
+        to_remove = [discord.Object(id=role_id) for role_id, add in roles.items() if not add and role_id in current]
+        if to_add:
+            await member.add_roles(*to_add, reason="Reaction role update")
+        if to_remove:
+            await member.remove_roles(*to_remove, reason="Reaction role update")
\ No newline at end of file
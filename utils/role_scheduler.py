@@ -0,0 +1,156 @@
+import asyncio
+import glob
+import heapq
+import json
+import os
+import re
+import time
+from typing import Callable, Dict, List, Tuple
+from utils.store import Store, log_store_error, owns_guild
+
+# Shared store of timed role grants, "guild_id:user_id:role_id" -> expiry timestamp
+TEMP_ROLE_GRANTS_FILE = 'temp_role_grants.json'
+
+# Grant lists written by earlier versions, one per worker, imported into the store once
+LEGACY_TEMP_ROLES_FILES = 'temp_roles*.json'
+
+# Duration units accepted by parse_duration
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+DURATION_REGEX = r'(\d+)\s*([smhdw])'
+
+def parse_duration(text: str) -> int:
+    """Parse a duration such as '7d', '1h30m' or '2w' into seconds"""
+    cleaned = text.strip().lower()
+    matches = re.findall(DURATION_REGEX, cleaned)
+    if not matches or re.sub(DURATION_REGEX, '', cleaned).strip():
+        raise ValueError(f"Invalid duration: {text}")
+
+    seconds = sum(int(amount) * DURATION_UNITS[unit] for amount, unit in matches)
+    if seconds <= 0:
+        raise ValueError("Duration must be positive")
+    return seconds
+
+def _grant_key(guild_id: int, user_id: int, role_id: int) -> str:
+    return f"{guild_id}:{user_id}:{role_id}"
+
+def migrate_legacy_grants(store: Store) -> None:
+    """Import grant lists of earlier versions into the shared store (blocking)"""
+    for path in sorted(glob.glob(LEGACY_TEMP_ROLES_FILES)):
+        # Renaming first makes sure only one worker imports a file
+        migrated = path + ".migrated"
+        try:
+            os.rename(path, migrated)
+        except OSError:
+            continue
+        try:
+            with open(migrated, 'r') as f:
+                entries = json.load(f)
+            for entry in entries:
+                key = _grant_key(int(entry["guild_id"]), int(entry["user_id"]), int(entry["role_id"]))
+                if float(entry["expires_at"]) > float(store.get(key, 0)):
+                    store.set(key, float(entry["expires_at"]))
+            print(f"Imported {len(entries)} temporary role grant(s) from {path}")
+        except Exception as e:
+            print(f"Error importing temporary roles from {path}: {e}")
+
+class TempRoleScheduler:
+    """Revokes time-limited roles at their expiry, sleeping until the next deadline
+
+    Grants live in a shared store, each worker schedules the ones of its own guilds.
+    """
+
+    def __init__(self, revoke: Callable[[int, int, int], None], store: Store, batch_window: float = 1.0):
+        self.revoke = revoke  # Called with (guild_id, user_id, role_id) for every expired grant
+        self.store = store
+        self.batch_window = batch_window  # Grants expiring this close together are revoked in one batch
+        self.grants: Dict[Tuple[int, int, int], float] = {}
+        self.heap: List[Tuple[float, int, int, int]] = []
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._load()
+
+    def _load(self) -> None:
+        """Load the grants of this worker's guilds and rebuild the heap in linear time (blocking)"""
+        migrate_legacy_grants(self.store)
+        try:
+            for grant, expires_at in self.store.items():
+                key = tuple(int(part) for part in grant.split(":"))
+                if owns_guild(key[0]):
+                    self.grants[key] = float(expires_at)
+        except Exception as e:
+            print(f"Error loading temporary roles: {e}")
+
+        self.heap = [(expires_at, *key) for key, expires_at in self.grants.items()]
+        heapq.heapify(self.heap)
+
+    def schedule(self, guild_id: int, user_id: int, role_id: int, seconds: float) -> float:
+        """Schedule a role to be revoked after a number of seconds, replacing any earlier expiry"""
+        key = (guild_id, user_id, role_id)
+        expires_at = time.time() + seconds
+        self.grants[key] = expires_at
+        heapq.heappush(self.heap, (expires_at, *key))
+        self.store.aset(_grant_key(*key), expires_at).add_done_callback(log_store_error)
+
+        # Wake the scheduler if this is the new earliest deadline
+        if self.heap[0][0] == expires_at:
+            self._wakeup.set()
+        return expires_at
+
+    def is_active(self, guild_id: int, user_id: int, role_id: int) -> bool:
+        """Whether a member holds an unexpired grant of a role"""
+        return self.grants.get((guild_id, user_id, role_id), 0) > time.time()
+
+    def cancel(self, guild_id: int, user_id: int, role_id: int) -> None:
+        """Forget a grant, its heap entry is discarded when it reaches the top"""
+        if self.grants.pop((guild_id, user_id, role_id), None) is not None:
+            self.store.adelete(_grant_key(guild_id, user_id, role_id)).add_done_callback(log_store_error)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+
+            # Drop entries of grants that were cancelled or renewed
+            while self.heap and self.grants.get(tuple(self.heap[0][1:])) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+
+            if not self.heap:
+                await self._wakeup.wait()
+                continue
+
+            # Sleep until the next deadline or until an earlier grant is scheduled
+            delay = self.heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._revoke_due()
+
+    def _revoke_due(self) -> None:
+        """Revoke every grant that is due or expires within the batch window"""
+        cutoff = time.time() + self.batch_window
+        due = []
+        while self.heap and self.heap[0][0] <= cutoff:
+            expires_at, *key = heapq.heappop(self.heap)
+            key = tuple(key)
+            if self.grants.get(key) == expires_at:
+                del self.grants[key]
+                due.append(key)
+
+        for guild_id, user_id, role_id in due:
+            self.store.adelete(_grant_key(guild_id, user_id, role_id)).add_done_callback(log_store_error)
+            try:
+                self.revoke(guild_id, user_id, role_id)
+            except Exception as e:
+                print(f"Error revoking temporary role: {e}")
@@ -0,0 +1,180 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from utils.metrics import STORE_FLUSH_SECONDS
+
+# File to store the rolling analytics buckets
+SHOP_ANALYTICS_FILE = 'shop_analytics.json'
+
+# Layout of the analytics file, older files keyed items by title across all guilds
+ANALYTICS_VERSION = 2
+
+# Counter order inside every bucket
+METRICS = ("views", "attempts", "sales", "revenue")
+
+# Rolling windows: name -> (number of buckets, seconds per bucket)
+WINDOWS = {
+    "1h": (60, 60),        # 60 one-minute buckets
+    "24h": (24, 3600),     # 24 one-hour buckets
+    "30d": (30, 86400),    # 30 one-day buckets
+}
+
+class RingBuffer:
+    """Fixed-size ring of time buckets holding one counter per metric"""
+
+    def __init__(self, size: int, bucket_seconds: int):
+        self.size = size
+        self.bucket_seconds = bucket_seconds
+        # epochs[slot] is the absolute bucket index currently stored in that slot
+        self.epochs = [-1] * size
+        self.buckets = [[0.0] * len(METRICS) for _ in range(size)]
+
+    def add(self, timestamp: float, metric: int, amount: float = 1.0) -> None:
+        """Add an amount to a metric in the bucket covering the timestamp"""
+        epoch = int(timestamp // self.bucket_seconds)
+        slot = epoch % self.size
+
+        # Recycle the slot if it still holds an expired bucket
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.buckets[slot] = [0.0] * len(METRICS)
+
+        self.buckets[slot][metric] += amount
+
+    def totals(self, now: float) -> List[float]:
+        """Sum every bucket that still falls inside the window"""
+        oldest = int(now // self.bucket_seconds) - self.size + 1
+        result = [0.0] * len(METRICS)
+        for epoch, bucket in zip(self.epochs, self.buckets):
+            if epoch >= oldest:
+                for i, value in enumerate(bucket):
+                    result[i] += value
+        return result
+
+    def to_dict(self) -> Dict:
+        return {"epochs": self.epochs, "buckets": self.buckets}
+
+    @classmethod
+    def from_dict(cls, size: int, bucket_seconds: int, data: Dict) -> "RingBuffer":
+        ring = cls(size, bucket_seconds)
+        epochs = data.get("epochs", [])
+        buckets = data.get("buckets", [])
+        # Ignore persisted state if the window layout changed
+        if len(epochs) == size and len(buckets) == size:
+            ring.epochs = [int(e) for e in epochs]
+            ring.buckets = [[float(v) for v in bucket] for bucket in buckets]
+        return ring
+
+class ShopAnalytics:
+    """Per-item and per-seller sales counters of every guild aggregated over rolling windows"""
+
+    def __init__(self, analytics_file=SHOP_ANALYTICS_FILE):
+        self.analytics_file = analytics_file
+        # Keyed by (guild ID, item title) and (guild ID, seller ID)
+        self.items: Dict[Tuple[str, str], Dict[str, RingBuffer]] = {}
+        self.sellers: Dict[Tuple[str, str], Dict[str, RingBuffer]] = {}
+        self.dirty = False
+        self._load()
+
+    def _new_rings(self) -> Dict[str, RingBuffer]:
+        return {name: RingBuffer(size, seconds) for name, (size, seconds) in WINDOWS.items()}
+
+    def _load(self) -> None:
+        """Load persisted buckets from file"""
+        if not os.path.exists(self.analytics_file):
+            return
+        try:
+            with open(self.analytics_file, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error loading shop analytics: {e}")
+            return
+
+        if data.get("version") != ANALYTICS_VERSION:
+            print("Ignoring shop analytics without guild IDs from an older version")
+            return
+
+        for section, target in (("items", self.items), ("sellers", self.sellers)):
+            for guild_id, entries in data.get(section, {}).items():
+                for key, windows in entries.items():
+                    target[(guild_id, key)] = {
+                        name: RingBuffer.from_dict(size, seconds, windows.get(name, {}))
+                        for name, (size, seconds) in WINDOWS.items()
+                    }
+
+    def flush(self) -> None:
+        """Write the buckets to file if anything changed since the last flush"""
+        if not self.dirty:
+            return
+        try:
+            data = {"version": ANALYTICS_VERSION}
+            for section, target in (("items", self.items), ("sellers", self.sellers)):
+                entries = data[section] = {}
+                for (guild_id, key), windows in target.items():
+                    entries.setdefault(guild_id, {})[key] = {name: ring.to_dict() for name, ring in windows.items()}
+            with STORE_FLUSH_SECONDS.time(store="shop_analytics"), open(self.analytics_file, 'w') as f:
+                json.dump(data, f)
+            self.dirty = False
+        except Exception as e:
+            print(f"Error saving shop analytics: {e}")
+
+    def _record(self, guild_id: int, item_title: str, seller_id: Optional[int], metric: str, amount: float = 1.0) -> None:
+        """Add a metric to the item and seller rings for every window"""
+        now = time.time()
+        index = METRICS.index(metric)
+
+        keys = [(self.items, (str(guild_id), item_title))]
+        if seller_id:
+            keys.append((self.sellers, (str(guild_id), str(seller_id))))
+
+        for target, key in keys:
+            rings = target.get(key)
+            if rings is None:
+                rings = target[key] = self._new_rings()
+            for ring in rings.values():
+                ring.add(now, index, amount)
+        self.dirty = True
+
+    def record_view(self, guild_id: int, item_title: str, seller_id: Optional[int]) -> None:
+        """Record a More Info click"""
+        self._record(guild_id, item_title, seller_id, "views")
+
+    def record_attempt(self, guild_id: int, item_title: str, seller_id: Optional[int]) -> None:
+        """Record a Purchase button click"""
+        self._record(guild_id, item_title, seller_id, "attempts")
+
+    def record_sale(self, guild_id: int, item_title: str, seller_id: Optional[int], amount: float) -> None:
+        """Record a completed purchase and its revenue"""
+        self._record(guild_id, item_title, seller_id, "sales")
+        self._record(guild_id, item_title, seller_id, "revenue", amount)
+
+    def _totals(self, target: Dict[Tuple[str, str], Dict[str, RingBuffer]], guild_id: int, window: str) -> Dict[str, Dict[str, float]]:
+        now = time.time()
+        guild_id = str(guild_id)
+        result = {}
+        for (key_guild_id, key), rings in target.items():
+            if key_guild_id != guild_id:
+                continue
+            totals = rings[window].totals(now)
+            if any(totals):
+                result[key] = dict(zip(METRICS, totals))
+        return result
+
+    def item_stats(self, guild_id: int, window: str = "24h") -> Dict[str, Dict[str, float]]:
+        """Get the totals per item of a guild for a window"""
+        return self._totals(self.items, guild_id, window)
+
+    def seller_stats(self, guild_id: int, window: str = "24h") -> Dict[str, Dict[str, float]]:
+        """Get the totals per seller of a guild for a window"""
+        return self._totals(self.sellers, guild_id, window)
+
+    def top_items(self, guild_id: int, window: str = "24h", limit: int = 10) -> List[Tuple[str, Dict[str, float]]]:
+        """Get the best selling items of a guild for a window, ordered by revenue then sales"""
+        stats = self.item_stats(guild_id, window)
+        ranked = sorted(
+            stats.items(),
+            key=lambda entry: (entry[1]["revenue"], entry[1]["sales"], entry[1]["views"]),
+            reverse=True
+        )
+        return ranked[:limit]
@@ -0,0 +1,245 @@
+import abc
+import asyncio
+import copy
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.managers import BaseManager
+from typing import Any, List, Optional, Tuple
+from utils.metrics import STORE_FLUSH_SECONDS
+
+# Set by the cluster launcher, workers then use the coordinator instead of their own files
+STORE_ADDRESS = os.getenv('STORE_ADDRESS')  # host:port of the store coordinator
+STORE_AUTHKEY = os.getenv('STORE_AUTHKEY', '')  # hex
+CLUSTER_ID = os.getenv('CLUSTER_ID')
+SHARD_IDS = [int(shard) for shard in os.getenv('SHARD_IDS', '').split(',') if shard.strip()]
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', '0'))
+
+def owns_guild(guild_id: Optional[int]) -> bool:
+    """Whether this worker serves a guild, entries without a guild belong to the first worker"""
+    if guild_id is None:
+        return CLUSTER_ID in (None, "0")
+    if not SHARD_IDS or not SHARD_COUNT:
+        return True
+    # Discord assigns guilds to shards by (guild_id >> 22) % shard_count
+    return (int(guild_id) >> 22) % SHARD_COUNT in SHARD_IDS
+
+def log_store_error(future: asyncio.Future) -> None:
+    """Done callback for store writes that nobody awaits"""
+    if not future.cancelled() and future.exception():
+        print(f"Error writing to store: {future.exception()}")
+
+class Store(abc.ABC):
+    """Key-value store shared by all bot processes, keys are strings and values JSON data
+
+    The blocking methods are for threads and startup. Code on the event loop uses the
+    a-prefixed variants, which return a future right away and run the operations of a
+    store in the order they were called, also when the future is never awaited.
+    """
+
+    _executor = None
+
+    @abc.abstractmethod
+    def get(self, key: str, default=None) -> Any:
+        pass
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abc.abstractmethod
+    def items(self) -> List[Tuple[str, Any]]:
+        pass
+
+    @abc.abstractmethod
+    def incr(self, key: str, amount: float, minimum: Optional[float] = None) -> float:
+        """Atomically add to a number, raises ValueError if it would drop below minimum"""
+        pass
+
+    def _submit(self, func, *args) -> asyncio.Future:
+        """Run an operation on the store's own thread, one at a time"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store")
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def aget(self, key: str, default=None) -> asyncio.Future:
+        return self._submit(self.get, key, default)
+
+    def aset(self, key: str, value: Any) -> asyncio.Future:
+        # Copied so the caller can keep changing the value while the write is pending
+        return self._submit(self.set, key, copy.deepcopy(value))
+
+    def adelete(self, key: str) -> asyncio.Future:
+        return self._submit(self.delete, key)
+
+    def aitems(self) -> asyncio.Future:
+        return self._submit(self.items)
+
+    def aincr(self, key: str, amount: float, minimum: Optional[float] = None) -> asyncio.Future:
+        return self._submit(self.incr, key, amount, minimum)
+
+class JsonStore(Store):
+    """Store kept in memory and written to a JSON file on every change"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = self._load()
+
+    def _load(self) -> dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Error loading {self.path}: {e}")
+        return {}
+
+    def _save(self) -> None:
+        # Write a new file and swap it in, so a crash mid-write never loses the store
+        temp_path = self.path + ".tmp"
+        try:
+            with STORE_FLUSH_SECONDS.time(store=os.path.basename(self.path)):
+                with open(temp_path, 'w') as f:
+                    json.dump(self.data, f, indent=4)
+                os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Error saving {self.path}: {e}")
+
+    def _submit(self, func, *args) -> asyncio.Future:
+        # A local store is in memory, its operations run right away on the loop
+        future = asyncio.get_running_loop().create_future()
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+            self._save()
+
+    def delete(self, key):
+        with self.lock:
+            if key in self.data:
+                del self.data[key]
+                self._save()
+
+    def items(self):
+        with self.lock:
+            return list(self.data.items())
+
+    def incr(self, key, amount, minimum=None):
+        with self.lock:
+            value = float(self.data.get(key, 0)) + amount
+            if minimum is not None and value < minimum:
+                raise ValueError("Insufficient balance")
+            self.data[key] = value
+            self._save()
+            return value
+
+class StoreService:
+    """Serves the JSON stores of all workers from the coordinator process, one JsonStore per file"""
+
+    def __init__(self):
+        self.stores = {}
+        self.lock = threading.Lock()
+
+    def _store(self, path: str) -> JsonStore:
+        with self.lock:
+            if path not in self.stores:
+                self.stores[path] = JsonStore(path)
+            return self.stores[path]
+
+    def get(self, path, key, default=None):
+        return self._store(path).get(key, default)
+
+    def set(self, path, key, value):
+        self._store(path).set(key, value)
+
+    def delete(self, path, key):
+        self._store(path).delete(key)
+
+    def items(self, path):
+        return self._store(path).items()
+
+    def incr(self, path, key, amount, minimum=None):
+        return self._store(path).incr(key, amount, minimum)
+
+class RemoteStore(Store):
+    """Store whose operations run in the coordinator process
+
+    Every call is a round trip to the coordinator, so code on the event loop uses the
+    a-prefixed methods, which make the call on the store's own thread.
+    """
+
+    def __init__(self, path: str, service):
+        self.path = path
+        self.service = service
+
+    def get(self, key, default=None):
+        return self.service.get(self.path, key, default)
+
+    def set(self, key, value):
+        self.service.set(self.path, key, value)
+
+    def delete(self, key):
+        self.service.delete(self.path, key)
+
+    def items(self):
+        return self.service.items(self.path)
+
+    def incr(self, key, amount, minimum=None):
+        return self.service.incr(self.path, key, amount, minimum)
+
+class _CoordinatorManager(BaseManager):
+    pass
+
+class _ClientManager(BaseManager):
+    pass
+
+_ClientManager.register('stores')
+
+_service = None
+_service_lock = threading.Lock()
+
+def serve_stores(authkey: bytes, address=('127.0.0.1', 0)) -> Tuple[str, int]:
+    """Start the store coordinator in a background thread and return its address"""
+    service = StoreService()
+    _CoordinatorManager.register('stores', callable=lambda: service)
+    server = _CoordinatorManager(address=address, authkey=authkey).get_server()
+    threading.Thread(target=server.serve_forever, name="store-coordinator", daemon=True).start()
+    return server.address
+
+def _remote_service():
+    """Connect to the coordinator once per process"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            host, port = STORE_ADDRESS.rsplit(':', 1)
+            manager = _ClientManager(address=(host, int(port)), authkey=bytes.fromhex(STORE_AUTHKEY))
+            manager.connect()
+            _service = manager.stores()
+        return _service
+
+def open_store(path: str) -> Store:
+    """Open a shared store, served by the coordinator when running as a cluster"""
+    if STORE_ADDRESS:
+        return RemoteStore(path, _remote_service())
+    return JsonStore(path)
+
+def worker_file(path: str) -> str:
+    """Path of a file only this worker writes, for data that may be lost when the shards move"""
+    if CLUSTER_ID is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.worker{CLUSTER_ID}{ext}"
\ No newline at end of file
@@ -1,27 +1,52 @@
+import datetime
 import discord
+import json
 from discord.ui import Button, View
 from typing import Optional, Dict, Any
+from utils.interaction_router import RoutedView, make_custom_id
+from utils.member_resolver import member_resolver
+from utils.tracing import tracer
 import re
 
 # Use a price parsing regex to extract numeric value from price strings
 PRICE_REGEX = r'[\$€£]?\s*(\d+(?:\.\d+)?)'
 
-class TicketCloseButton(View):
+# Append-only log of ticket openings and closings
+TICKET_LOG_FILE = 'ticket_log.jsonl'
+
+def log_ticket_event(event: str, channel: discord.abc.GuildChannel, user: discord.abc.User, kind: str, **extra) -> None:
+    """Append a ticket event to the ticket log"""
+    entry = {
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "event": event,
+        "kind": kind,
+        "guild_id": str(channel.guild.id),
+        "channel_id": str(channel.id),
+        "user_id": str(user.id),
+        **extra
+    }
+    try:
+        with open(TICKET_LOG_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"Error saving ticket event: {e}")
+
+class TicketCloseButton(RoutedView):
     """Button for closing tickets"""
     
-    def __init__(self):
-        super().__init__(timeout=None)  # Persistent button
+    def __init__(self, guild_id: Optional[int] = None):
+        super().__init__()  # Persistent button, dispatched by the interaction router
         
         # Add close ticket button
         close_button = Button(
             style=discord.ButtonStyle.danger,
             label="Close Ticket",
             emoji="🔒",
-            custom_id="close_ticket"
+            custom_id=make_custom_id("ticket_close", guild_id)
         )
-        close_button.callback = self.close_ticket_callback
         self.add_item(close_button)
     
+    @tracer.flow("ticket_close")
     async def close_ticket_callback(self, interaction: discord.Interaction):
         """Handle ticket closing"""
         # Check if user has permission to close the ticket
@@ -41,31 +66,35 @@ class TicketCloseButton(View):
             description="This ticket is being closed...",
             color=discord.Color.orange()
         )
-        await interaction.response.send_message(embed=embed)
+        with tracer.span("respond"):
+            await interaction.response.send_message(embed=embed)
         
         # Archive the channel (move to archived category or delete based on preference)
         try:
             # Find or create archive category
-            archive_category = discord.utils.get(interaction.guild.categories, name="Archived Tickets")
-            if not archive_category:
-                archive_category = await interaction.guild.create_category(
-                    name="Archived Tickets",
-                    reason="Ticket Archive System"
-                )
+            with tracer.span("category"):
+                archive_category = discord.utils.get(interaction.guild.categories, name="Archived Tickets")
+                if not archive_category:
+                    archive_category = await interaction.guild.create_category(
+                        name="Archived Tickets",
+                        reason="Ticket Archive System"
+                    )
             
             # Move to archive
-            await channel.edit(
-                category=archive_category,
-                name=f"closed-{channel.name}",
-                reason=f"Ticket closed by {interaction.user.name}"
-            )
+            with tracer.span("move_channel"):
+                await channel.edit(
+                    category=archive_category,
+                    name=f"closed-{channel.name}",
+                    reason=f"Ticket closed by {interaction.user.name}"
+                )
             
             # Lock the channel
-            await channel.set_permissions(
-                interaction.guild.default_role,
-                send_messages=False,
-                read_messages=False
-            )
+            with tracer.span("lock_channel"):
+                await channel.set_permissions(
+                    interaction.guild.default_role,
+                    send_messages=False,
+                    read_messages=False
+                )
             
             # Final message
             embed = discord.Embed(
@@ -73,7 +102,10 @@ class TicketCloseButton(View):
                 description=f"This ticket has been closed by {interaction.user.mention}",
                 color=discord.Color.red()
             )
-            await channel.send(embed=embed)
+            with tracer.span("send_closed_message"):
+                await channel.send(embed=embed)
+            
+            log_ticket_event("closed", channel, interaction.user, "purchase" if "purchase-" in channel.name else "support")
             
         except discord.Forbidden:
             await interaction.followup.send(
@@ -87,22 +119,22 @@ class TicketCloseButton(View):
             )
 
 
-class CreateTicketView(View):
+class CreateTicketView(RoutedView):
     """View with button to create a support ticket"""
     
-    def __init__(self):
-        super().__init__(timeout=None)  # Persistent button
+    def __init__(self, guild_id: Optional[int] = None):
+        super().__init__()  # Persistent button, dispatched by the interaction router
         
         # Create ticket button
         ticket_button = Button(
             style=discord.ButtonStyle.primary,
             label="Create Ticket",
             emoji="🎫",
-            custom_id="create_ticket"
+            custom_id=make_custom_id("ticket_create", guild_id)
         )
-        ticket_button.callback = self.create_ticket_callback
         self.add_item(ticket_button)
     
+    @tracer.flow("ticket_create")
     async def create_ticket_callback(self, interaction: discord.Interaction):
         """Handle ticket creation button click"""
         
@@ -123,12 +155,13 @@ class CreateTicketView(View):
         
         try:
             # Create category if it doesn't exist
-            category = discord.utils.get(guild.categories, name="Support Tickets")
-            if not category:
-                category = await guild.create_category(
-                    name="Support Tickets",
-                    reason="Support Ticket System"
-                )
+            with tracer.span("category"):
+                category = discord.utils.get(guild.categories, name="Support Tickets")
+                if not category:
+                    category = await guild.create_category(
+                        name="Support Tickets",
+                        reason="Support Ticket System"
+                    )
             
             # Set up permissions for the new channel
             overwrites = {
@@ -152,18 +185,22 @@ class CreateTicketView(View):
                 return
             
             # Create the ticket channel
-            channel = await guild.create_text_channel(
-                name=channel_name,
-                overwrites=overwrites,
-                category=category,
-                topic=f"Support ticket for {user.name} | Created: {discord.utils.utcnow().strftime('%Y-%m-%d %H:%M:%S')}"
-            )
+            with tracer.span("create_channel"):
+                channel = await guild.create_text_channel(
+                    name=channel_name,
+                    overwrites=overwrites,
+                    category=category,
+                    topic=f"Support ticket for {user.name} | Created: {discord.utils.utcnow().strftime('%Y-%m-%d %H:%M:%S')}"
+                )
+            
+            log_ticket_event("opened", channel, user, "support")
             
             # Send confirmation to user
-            await interaction.response.send_message(
-                f"Your ticket has been created at {channel.mention}",
-                ephemeral=True
-            )
+            with tracer.span("respond"):
+                await interaction.response.send_message(
+                    f"Your ticket has been created at {channel.mention}",
+                    ephemeral=True
+                )
             
             # Send welcome message in the ticket channel
             embed = discord.Embed(
@@ -184,12 +221,14 @@ class CreateTicketView(View):
             embed.set_footer(text="UE5 Asset Shop Support • Thank you for your patience")
             
             # Add close ticket button to welcome message
-            close_view = TicketCloseButton()
-            await channel.send(f"{user.mention}", embed=embed, view=close_view)
+            close_view = TicketCloseButton(guild.id)
+            with tracer.span("send_welcome"):
+                await channel.send(f"{user.mention}", embed=embed, view=close_view)
             
             # Ping support role if exists
             if support_role:
-                await channel.send(f"{support_role.mention} - New support ticket opened!")
+                with tracer.span("ping_role"):
+                    await channel.send(f"{support_role.mention} - New support ticket opened!")
             
         except discord.Forbidden:
             await interaction.response.send_message(
@@ -204,38 +243,59 @@ class CreateTicketView(View):
 
 
 # Updated ItemView to include real purchases and asset delivery
-class ItemView(View):
+class ItemView(RoutedView):
     """Interactive buttons for shop items with ticket system and real purchases"""
     
-    def __init__(self, *, timeout=None, item_title=None, seller_id=None, price=None):
-        # Change timeout=180 to timeout=None for full persistence
-        super().__init__(timeout=timeout)
+    def __init__(self, *, item_title=None, seller_id=None, price=None, guild_id=None):
+        super().__init__()  # Persistent buttons, dispatched by the interaction router
         self.item_title = item_title if item_title else "Product"
         self.seller_id = seller_id  # Store the seller's ID
         self.price = self._extract_price(price) if price else 0.0
         
-        # Purchase button - add item info to custom_id to make it unique
+        # Purchase button - the seller ID is part of the custom_id, title and price come from the embed
         purchase_button = Button(
             style=discord.ButtonStyle.success,
             label="Purchase",
             emoji="💳",
-            # Use a generic custom_id for persistent buttons
-            custom_id="purchase_item"
+            custom_id=make_custom_id("shop_buy", guild_id, seller_id)
         )
-        purchase_button.callback = self.purchase_callback
         self.add_item(purchase_button)
         
-        # More info button - add item info to custom_id to make it unique
+        # More info button
         info_button = Button(
             style=discord.ButtonStyle.primary,
             label="More Info",
             emoji="ℹ️",
-            # Use a generic custom_id for persistent buttons
-            custom_id="more_info"
+            custom_id=make_custom_id("shop_info", guild_id, seller_id)
         )
-        info_button.callback = self.info_callback
         self.add_item(info_button)
     
+    @classmethod
+    def from_message(cls, message: Optional[discord.Message], seller_id: Optional[str] = None):
+        """Rebuild the item view of a shop message from its embed"""
+        item_title = None
+        price = None
+        
+        if message and message.embeds:
+            embed = message.embeds[0]
+            item_title = (embed.title or "").replace("🛒", "", 1).strip() or None
+            for field in embed.fields:
+                if field.name == "💲 Price":
+                    price = field.value
+        
+        # Legacy purchase_item buttons don't carry the seller, but items posted with /additem
+        # were sent in reply to the seller's command
+        if not seller_id and message:
+            metadata = getattr(message, "interaction_metadata", None)
+            if metadata and metadata.user:
+                seller_id = metadata.user.id
+        
+        return cls(
+            item_title=item_title,
+            seller_id=int(seller_id) if seller_id else None,
+            price=price
+        )
+    
     def _extract_price(self, price_str: str) -> float:
         """Extract numeric price value from a price string (e.g. '$19.99' -> 19.99)"""
         if not price_str:
@@ -249,6 +309,7 @@ class ItemView(View):
                 pass
         return 0.0
     
+    @tracer.flow("shop_purchase")
     async def purchase_callback(self, interaction: discord.Interaction):
         """Handle purchase button click - verify funds and create ticket channel"""
         
@@ -263,6 +324,11 @@ class ItemView(View):
         user = interaction.user
         guild = interaction.guild
         
+        # Record the purchase attempt for shop analytics
+        shop_cog = interaction.client.get_cog('Shop')
+        if shop_cog:
+            shop_cog.analytics.record_attempt(guild.id, self.item_title, self.seller_id)
+        
         # Get CurrencyManager from bot's cogs
         economy_cog = interaction.client.get_cog('Economy')
         if not economy_cog:
@@ -278,29 +344,35 @@ class ItemView(View):
         channel_name = ''.join(c for c in channel_name if c.isalnum() or c in ['-', '_'])
         
         # Check if user has enough funds
-        transaction_result = None
-        has_funds = False
-        user_balance = economy_cog.currency.get_balance(user.id)
+        with tracer.span("payment"):
+            transaction_result = None
+            has_funds = False
+            user_balance = await economy_cog.currency.get_balance(user.id)
         
-        if self.price > 0 and self.seller_id:
-            has_funds = economy_cog.currency.has_sufficient_balance(user.id, self.price)
+            if self.price > 0 and self.seller_id:
+                has_funds = await economy_cog.currency.has_sufficient_balance(user.id, self.price)
         
-        # Process the transaction if user has enough funds
-        if has_funds:
-            transaction_result = economy_cog.currency.process_purchase(
-                user_id=user.id,
-                seller_id=self.seller_id,
-                amount=self.price
-            )
+            # Process the transaction if user has enough funds
+            if has_funds:
+                transaction_result = await economy_cog.currency.process_purchase(
+                    user_id=user.id,
+                    seller_id=self.seller_id,
+                    amount=self.price,
+                    guild_id=guild.id
+                )
+            
+                if shop_cog and transaction_result.get("success"):
+                    shop_cog.analytics.record_sale(guild.id, self.item_title, self.seller_id, self.price)
         
         try:
             # Create category if it doesn't exist
-            category = discord.utils.get(guild.categories, name="Asset Shop Tickets")
-            if not category:
-                category = await guild.create_category(
-                    name="Asset Shop Tickets",
-                    reason="Asset Shop Ticket System"
-                )
+            with tracer.span("category"):
+                category = discord.utils.get(guild.categories, name="Asset Shop Tickets")
+                if not category:
+                    category = await guild.create_category(
+                        name="Asset Shop Tickets",
+                        reason="Asset Shop Ticket System"
+                    )
             
             # Set up permissions for the new channel
             overwrites = {
@@ -312,7 +384,8 @@ class ItemView(View):
             # Add seller permissions if available
             if self.seller_id:
                 try:
-                    seller = await guild.fetch_member(self.seller_id)
+                    with tracer.span("resolve_seller"):
+                        seller = await member_resolver.resolve(guild, int(self.seller_id))
                     if seller:
                         overwrites[seller] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
                 except:
@@ -325,18 +398,28 @@ class ItemView(View):
                 overwrites[admin_role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
             
             # Create the ticket channel
-            channel = await guild.create_text_channel(
-                name=channel_name,
-                overwrites=overwrites,
-                category=category,
-                topic=f"Purchase ticket for {self.item_title} | Customer: {user.name}"
+            with tracer.span("create_channel"):
+                channel = await guild.create_text_channel(
+                    name=channel_name,
+                    overwrites=overwrites,
+                    category=category,
+                    topic=f"Purchase ticket for {self.item_title} | Customer: {user.name}"
+                )
+            
+            log_ticket_event(
+                "opened", channel, user, "purchase",
+                item=self.item_title,
+                seller_id=str(self.seller_id) if self.seller_id else None,
+                price=self.price,
+                paid=bool(transaction_result and transaction_result.get("success"))
             )
             
             # Send confirmation message to user
-            await interaction.response.send_message(
-                f"Purchase ticket created! Please check {channel.mention}.",
-                ephemeral=True
-            )
+            with tracer.span("respond"):
+                await interaction.response.send_message(
+                    f"Purchase ticket created! Please check {channel.mention}.",
+                    ephemeral=True
+                )
             
             # Create the purchase status embed based on transaction result
             if transaction_result and transaction_result.get("success"):
@@ -359,42 +442,43 @@ class ItemView(View):
                 
                 # Add instructions on how to access the asset
                 if asset_channel:
-                    # Search for messages that mention this item in the assets channel
-                    asset_found = False
-                    try:
-                        # Look for the first message containing the item name in the assets channel
-                        async for message in asset_channel.history(limit=100):
-                            if self.item_title.lower() in message.content.lower():
-                                # Found the asset post - share it
-                                embed.add_field(
-                                    name="Asset Download",
-                                    value=f"The asset will be shared below. Please follow the installation instructions.",
-                                    inline=False
-                                )
+                    with tracer.span("asset_delivery"):
+                        # Search for messages that mention this item in the assets channel
+                        asset_found = False
+                        try:
+                            # Look for the first message containing the item name in the assets channel
+                            async for message in asset_channel.history(limit=100):
+                                if self.item_title.lower() in message.content.lower():
+                                    # Found the asset post - share it
+                                    embed.add_field(
+                                        name="Asset Download",
+                                        value=f"The asset will be shared below. Please follow the installation instructions.",
+                                        inline=False
+                                    )
                                 
-                                # Share the asset content
-                                await channel.send(f"**ASSET DOWNLOAD INFORMATION**\n\n{message.content}")
+                                    # Share the asset content
+                                    await channel.send(f"**ASSET DOWNLOAD INFORMATION**\n\n{message.content}")
                                 
-                                # Share any attachments from the asset post
-                                for attachment in message.attachments:
-                                    await channel.send(file=await attachment.to_file())
+                                    # Share any attachments from the asset post
+                                    for attachment in message.attachments:
+                                        await channel.send(file=await attachment.to_file())
                                 
-                                asset_found = True
-                                break
+                                    asset_found = True
+                                    break
                         
-                        # If asset wasn't found, notify that it will be delivered manually
-                        if not asset_found:
+                            # If asset wasn't found, notify that it will be delivered manually
+                            if not asset_found:
+                                embed.add_field(
+                                    name="Asset Delivery",
+                                    value="Your purchased asset will be delivered manually by the seller shortly.",
+                                    inline=False
+                                )
+                        except Exception as e:
                             embed.add_field(
                                 name="Asset Delivery",
-                                value="Your purchased asset will be delivered manually by the seller shortly.",
+                                value="There was an issue with automatic asset delivery. The seller will deliver it manually.",
                                 inline=False
                             )
-                    except Exception as e:
-                        embed.add_field(
-                            name="Asset Delivery",
-                            value="There was an issue with automatic asset delivery. The seller will deliver it manually.",
-                            inline=False
-                        )
                 else:
                     embed.add_field(
                         name="Asset Delivery",
@@ -432,7 +516,7 @@ class ItemView(View):
             # Add seller information if available
             if self.seller_id:
                 try:
-                    seller = await guild.fetch_member(self.seller_id)
+                    seller = await member_resolver.resolve(guild, int(self.seller_id))
                     if seller:
                         embed.add_field(
                             name="Seller",
@@ -445,12 +529,14 @@ class ItemView(View):
             embed.set_footer(text="Unreal Engine 5 Asset Shop • Thank you for your interest!")
             
             # Add close ticket button to the message
-            close_button = TicketCloseButton()
-            await channel.send(f"{user.mention}", embed=embed, view=close_button)
+            close_button = TicketCloseButton(guild.id)
+            with tracer.span("send_ticket_message"):
+                await channel.send(f"{user.mention}", embed=embed, view=close_button)
             
             # Ping seller/admin role if exists
             if admin_role:
-                await channel.send(f"{admin_role.mention} - New purchase ticket opened!")
+                with tracer.span("ping_role"):
+                    await channel.send(f"{admin_role.mention} - New purchase ticket opened!")
             
         except discord.Forbidden:
             await interaction.response.send_message(
@@ -465,7 +551,26 @@ class ItemView(View):
     
     async def info_callback(self, interaction: discord.Interaction):
         """Handle more info button click"""
+        # Record the view for shop analytics
+        shop_cog = interaction.client.get_cog('Shop')
+        if shop_cog:
+            shop_cog.analytics.record_view(interaction.guild_id, self.item_title, self.seller_id)
+            
         await interaction.response.send_message(
             "For more information about this item, please contact the seller directly.",
             ephemeral=True
-        )
\ No newline at end of file
+        )
+
+
+# Interaction router handlers for the persistent ticket and shop buttons
+async def handle_ticket_create(interaction: discord.Interaction, guild_id: Optional[int], entity: Optional[str]):
+    await CreateTicketView(guild_id).create_ticket_callback(interaction)
+
+async def handle_ticket_close(interaction: discord.Interaction, guild_id: Optional[int], entity: Optional[str]):
+    await TicketCloseButton(guild_id).close_ticket_callback(interaction)
+
+async def handle_shop_buy(interaction: discord.Interaction, guild_id: Optional[int], entity: Optional[str]):
+    await ItemView.from_message(interaction.message, entity).purchase_callback(interaction)
+
+async def handle_shop_info(interaction: discord.Interaction, guild_id: Optional[int], entity: Optional[str]):
+    await ItemView.from_message(interaction.message, entity).info_callback(interaction)
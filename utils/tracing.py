@@ -0,0 +1,222 @@
+import asyncio
+import contextvars
+import functools
+import glob
+import json
+import os
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from utils.store import worker_file
+
+# Rotating file holding one JSON line per sampled trace
+TRACE_FILE = 'traces.jsonl'
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_BACKUPS = 3
+
+# Seconds between writes of the buffered traces
+FLUSH_INTERVAL = 5
+# Buffered traces kept while a write is slow, the oldest are dropped beyond that
+MAX_BUFFERED_TRACES = 10000
+
+class Span:
+    """A timed step of a flow, with the steps it awaited nested as children"""
+
+    __slots__ = ("name", "start", "end", "status", "children")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.status = "ok"
+        self.children: List["Span"] = []
+
+    def to_dict(self, origin: float) -> Dict:
+        data = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 2),
+            "duration_ms": round((self.end - self.start) * 1000, 2),
+        }
+        if self.status != "ok":
+            data["status"] = self.status
+        if self.children:
+            data["children"] = [child.to_dict(origin) for child in self.children]
+        return data
+
+# Innermost open span of the current task, None when the flow isn't sampled
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+class Tracer:
+    """Records sampled flows of nested spans to a rotating JSONL file
+
+    Finished traces are buffered and written in a thread every FLUSH_INTERVAL seconds.
+    """
+
+    def __init__(self, trace_file: str = TRACE_FILE, sample_rate: float = 0.1,
+                 max_bytes: int = TRACE_MAX_BYTES, backups: int = TRACE_BACKUPS):
+        self.trace_file = trace_file
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.buffer: List[Dict] = []
+        self._flush_task = None
+
+    @contextmanager
+    def span(self, name: str):
+        """Time a step of the current flow, a no-op when the flow isn't sampled"""
+        parent = _current_span.get()
+        if parent is None:
+            yield
+            return
+
+        span = Span(name)
+        parent.children.append(span)
+        token = _current_span.set(span)
+        try:
+            yield
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+
+    def flow(self, name: str):
+        """Decorator starting a sampled trace around a coroutine function
+
+        Usage:
+            @tracer.flow("ticket_create")
+            async def create_ticket_callback(self, interaction): ...
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if _current_span.get() is not None or random.random() >= self.sample_rate:
+                    return await func(*args, **kwargs)
+
+                root = Span(name)
+                started_at = time.time()
+                token = _current_span.set(root)
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException:
+                    root.status = "error"
+                    raise
+                finally:
+                    root.end = time.perf_counter()
+                    _current_span.reset(token)
+                    self._record(root, started_at)
+            return wrapper
+        return decorator
+
+    def _record(self, root: Span, started_at: float) -> None:
+        self.buffer.append({
+            "trace_id": uuid.uuid4().hex[:16],
+            "flow": root.name,
+            "started_at": round(started_at, 3),
+            "duration_ms": round((root.end - root.start) * 1000, 2),
+            "status": root.status,
+            "spans": [child.to_dict(root.start) for child in root.children],
+        })
+        if len(self.buffer) > MAX_BUFFERED_TRACES:
+            del self.buffer[:len(self.buffer) - MAX_BUFFERED_TRACES]
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            if self.buffer:
+                traces, self.buffer = self.buffer, []
+                await asyncio.to_thread(self._write, traces)
+
+    def close(self) -> None:
+        """Stop the periodic flush and write the remaining traces (blocking)"""
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        traces, self.buffer = self.buffer, []
+        self._write(traces)
+
+    def _write(self, traces: List[Dict]) -> None:
+        if not traces:
+            return
+        path = worker_file(self.trace_file)
+        try:
+            if os.path.exists(path) and os.path.getsize(path) >= self.max_bytes:
+                self._rotate(path)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps(trace, separators=(",", ":")) + "\n" for trace in traces))
+        except Exception as e:
+            print(f"Error saving traces: {e}")
+
+    def _rotate(self, path: str) -> None:
+        """Shift traces.jsonl to traces.jsonl.1 and so on, dropping the oldest file"""
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{index}"):
+                os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+        os.replace(path, f"{path}.1")
+
+def _percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def _walk(spans: List[Dict], prefix: str = ""):
+    for span in spans:
+        path = f"{prefix}{span['name']}"
+        yield path, span
+        yield from _walk(span.get("children", ()), path + "/")
+
+def summarize(trace_file: str = TRACE_FILE, limit: int = 5, since: Optional[float] = None) -> Dict[str, List[Dict]]:
+    """Slowest flows and steps across the trace files of every worker
+
+    Steps are keyed by flow and their path of span names, e.g. shop_purchase: delivery/asset_lookup.
+    Errors are counted for the flow and for every step that failed.
+    """
+    root, ext = os.path.splitext(trace_file)
+    flows: Dict[str, List[float]] = {}
+    steps: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+
+    for path in glob.glob(f"{root}*{ext}*"):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        trace = json.loads(line)
+                    except ValueError:
+                        continue  # Partly written line
+                    if since and trace["started_at"] < since:
+                        continue
+                    flow = trace["flow"]
+                    flows.setdefault(flow, []).append(trace["duration_ms"])
+                    if trace.get("status") == "error":
+                        errors[flow] = errors.get(flow, 0) + 1
+                    for step, span in _walk(trace["spans"]):
+                        key = f"{flow}: {step}"
+                        steps.setdefault(key, []).append(span["duration_ms"])
+                        if span.get("status") == "error":
+                            errors[key] = errors.get(key, 0) + 1
+        except OSError as e:
+            print(f"Error reading traces from {path}: {e}")
+
+    def rank(groups: Dict[str, List[float]]) -> List[Dict]:
+        rows = [
+            {
+                "name": name,
+                "count": len(durations),
+                "p50_ms": _percentile(durations, 0.5),
+                "p95_ms": _percentile(durations, 0.95),
+                "max_ms": max(durations),
+                "errors": errors.get(name, 0),
+            }
+            for name, durations in groups.items()
+        ]
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)[:limit]
+
+    return {"flows": rank(flows), "steps": rank(steps)}
+
+# Shared tracer, its sample rate is set from TRACE_SAMPLE_RATE at startup
+tracer = Tracer()
\ No newline at end of file
@@ -0,0 +1,189 @@
+import asyncio
+import io
+import time
+import aiohttp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+# Welcome cards are optional and need Pillow
+try:
+    from PIL import Image, ImageDraw, ImageFont, ImageOps
+except ImportError:
+    Image = None
+
+CARD_SIZE = (1024, 320)
+AVATAR_SIZE = 200
+DEFAULT_BACKGROUND_COLOR = (43, 45, 49, 255)
+
+RENDER_BUDGET = 3.0  # Seconds before falling back to the text embed
+MAX_PENDING_RENDERS = 8  # Renders queued or running in the pool before new joins fall back to the text embed
+BACKGROUND_RETRY_AFTER = 600  # Seconds a failed background download or decode is not retried, the default background is used meanwhile
+BACKGROUND_TIMEOUT = 10  # Seconds a background download may take
+MAX_BACKGROUND_BYTES = 8 * 1024 * 1024  # Larger backgrounds are not downloaded
+AVATAR_CONCURRENCY = 4  # Concurrent avatar downloads
+
+def _load_font(size: int):
+    try:
+        return ImageFont.truetype("DejaVuSans-Bold.ttf", size)
+    except OSError:
+        return ImageFont.load_default()
+
+def prepare_background(background: Optional[bytes]) -> bytes:
+    """Crop and darken a guild background once so cards only paste onto it (runs in a worker process)"""
+    if background:
+        image = ImageOps.fit(Image.open(io.BytesIO(background)).convert("RGBA"), CARD_SIZE)
+        # Darken the image so the text stays readable
+        image = Image.alpha_composite(image, Image.new("RGBA", CARD_SIZE, (0, 0, 0, 110)))
+    else:
+        image = Image.new("RGBA", CARD_SIZE, DEFAULT_BACKGROUND_COLOR)
+
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+def render_card(background: bytes, avatar: bytes, title: str, subtitle: str) -> bytes:
+    """Render a welcome card as PNG (runs in a worker process)"""
+    card = Image.open(io.BytesIO(background)).convert("RGBA")
+
+    # Round avatar on the left
+    avatar_image = ImageOps.fit(Image.open(io.BytesIO(avatar)).convert("RGBA"), (AVATAR_SIZE, AVATAR_SIZE))
+    mask = Image.new("L", (AVATAR_SIZE, AVATAR_SIZE), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, AVATAR_SIZE, AVATAR_SIZE), fill=255)
+    top = (CARD_SIZE[1] - AVATAR_SIZE) // 2
+    card.paste(avatar_image, (60, top), mask)
+
+    # Title and member number on the right
+    draw = ImageDraw.Draw(card)
+    draw.text((300, top + 40), title, font=_load_font(52), fill=(255, 255, 255, 255))
+    draw.text((300, top + 115), subtitle, font=_load_font(32), fill=(200, 200, 200, 255))
+
+    output = io.BytesIO()
+    card.save(output, format="PNG")
+    return output.getvalue()
+
+class WelcomeCardRenderer:
+    """Renders welcome cards in a process pool within a time budget"""
+
+    def __init__(self, workers: int = 2, budget: float = RENDER_BUDGET):
+        self.workers = workers
+        self.budget = budget
+        self.pool = None
+        # guild_id -> (url, prepared background, time to retry a failed download or None)
+        self.backgrounds: Dict[int, Tuple[Optional[str], bytes, Optional[float]]] = {}
+        # guild_id -> (url, task) of backgrounds being prepared, shared by the joins waiting for them
+        self.background_tasks: Dict[int, Tuple[Optional[str], asyncio.Task]] = {}
+        self.avatar_semaphore = asyncio.Semaphore(AVATAR_CONCURRENCY)
+        self.pending = 0  # Renders waiting for their result
+        self.jobs = set()  # Pool jobs not finished yet, including ones whose render timed out
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def close(self) -> None:
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    async def _run(self, func, *args):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # A timed out render keeps running in its worker, so jobs are tracked until they finish
+        job = self.pool.submit(func, *args)
+        self.jobs.add(job)
+        job.add_done_callback(self.jobs.discard)
+        return await asyncio.wrap_future(job)
+
+    @property
+    def in_flight(self) -> int:
+        """Renders in progress, counting timed out renders until their pool job finishes"""
+        # Every waiting render has at most one job in the pool, the rest belong to timed out renders
+        return max(self.pending, len(self.jobs))
+
+    async def _background(self, guild_id: int, url: Optional[str]) -> bytes:
+        """Get the prepared background of a guild, downloading it once per URL"""
+        cached = self.backgrounds.get(guild_id)
+        if cached and cached[0] == url and (cached[2] is None or cached[2] > time.monotonic()):
+            return cached[1]
+
+        # Joins during a download wait for it instead of downloading again
+        in_flight = self.background_tasks.get(guild_id)
+        if in_flight is None or in_flight[0] != url:
+            task = asyncio.create_task(self._load_background(guild_id, url))
+            in_flight = self.background_tasks[guild_id] = (url, task)
+            task.add_done_callback(lambda _: self._background_done(guild_id, task))
+
+        # Shield the shared task so a render running out of budget doesn't cancel it for the others
+        return await asyncio.shield(in_flight[1])
+
+    def _background_done(self, guild_id: int, task: asyncio.Task) -> None:
+        in_flight = self.background_tasks.get(guild_id)
+        if in_flight and in_flight[1] is task:
+            del self.background_tasks[guild_id]
+
+    async def _download(self, url: str) -> bytes:
+        timeout = aiohttp.ClientTimeout(total=BACKGROUND_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                if (response.content_length or 0) > MAX_BACKGROUND_BYTES:
+                    raise ValueError(f"larger than {MAX_BACKGROUND_BYTES} bytes")
+                data = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    data += chunk
+                    if len(data) > MAX_BACKGROUND_BYTES:
+                        raise ValueError(f"larger than {MAX_BACKGROUND_BYTES} bytes")
+                return bytes(data)
+
+    async def _load_background(self, guild_id: int, url: Optional[str]) -> bytes:
+        """Download and prepare a background, falling back to the default one for a while on failure"""
+        prepared = None
+        retry_at = None
+        if url:
+            try:
+                prepared = await self._run(prepare_background, await self._download(url))
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                print(f"Error downloading welcome card background {url}: {e}")
+                retry_at = time.monotonic() + BACKGROUND_RETRY_AFTER
+            except Exception as e:
+                # Not an image Pillow can read
+                print(f"Error decoding welcome card background {url}: {e}")
+                retry_at = time.monotonic() + BACKGROUND_RETRY_AFTER
+
+        if prepared is None:
+            prepared = await self._run(prepare_background, None)
+        self.backgrounds[guild_id] = (url, prepared, retry_at)
+        return prepared
+
+    async def _avatar(self, member) -> bytes:
+        async with self.avatar_semaphore:
+            return await member.display_avatar.replace(size=256, format="png").read()
+
+    async def render(self, member, background_url: Optional[str], title: str, subtitle: str) -> Optional[bytes]:
+        """Render a card, or return None if it can't be done within the budget"""
+        if not self.available or self.in_flight >= MAX_PENDING_RENDERS:
+            return None
+
+        self.pending += 1
+        try:
+            return await asyncio.wait_for(self._render(member, background_url, title, subtitle), timeout=self.budget)
+        except asyncio.TimeoutError:
+            print(f"Welcome card for {member} exceeded the render budget")
+            return None
+        except Exception as e:
+            print(f"Error rendering welcome card: {e}")
+            return None
+        finally:
+            self.pending -= 1
+
+    async def _render(self, member, background_url, title, subtitle) -> bytes:
+        background, avatar = await asyncio.gather(
+            self._background(member.guild.id, background_url),
+            self._avatar(member)
+        )
+        return await self._run(render_card, background, avatar, title, subtitle)
+
+    def invalidate(self, guild_id: int) -> None:
+        """Forget the cached background of a guild"""
+        self.backgrounds.pop(guild_id, None)
+        self.background_tasks.pop(guild_id, None)
@@ -0,0 +1,44 @@
+import string
+from typing import List, Optional, Tuple
+
+# Placeholders that can be used in welcome messages
+PLACEHOLDERS = ("user", "user_name", "guild", "member_count", "rules")
+
+DEFAULT_WELCOME_MESSAGE = "Welcome {user} to our server! We're glad to have you here."
+
+class WelcomeTemplate:
+    """Welcome message compiled once into literal text and placeholder slots"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.pieces: List[Tuple[str, Optional[str]]] = self._compile(source)
+
+    @staticmethod
+    def _compile(source: str) -> List[Tuple[str, Optional[str]]]:
+        """Split the message into (literal, placeholder) pairs"""
+        # Messages saved by older versions used {} for the user mention
+        text = source.replace("{}", "{user}")
+
+        try:
+            parsed = list(string.Formatter().parse(text))
+        except ValueError:
+            # Unbalanced braces, show the message as it was written
+            return [(source, None)]
+
+        pieces = []
+        for literal, field, spec, conversion in parsed:
+            if field is None:
+                pieces.append((literal, None))
+            elif field in PLACEHOLDERS:
+                pieces.append((literal, field))
+            else:
+                # Keep unknown placeholders as plain text
+                pieces.append((literal + "{" + field + "}", None))
+        return pieces
+
+    def render(self, **values: str) -> str:
+        """Fill in the placeholders"""
+        return "".join(
+            literal + values.get(field, "") if field else literal
+            for literal, field in self.pieces
+        )